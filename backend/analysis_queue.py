@@ -0,0 +1,212 @@
+"""
+AI Analiz İş Kuyruğu
+trigger-analysis isteği LLM yanıtını beklemeden iş kimliği döner; sınırlı
+sayıda worker kuyruktaki denemeleri tekrar deneme ve üstel geri çekilme
+(backoff) ile işler. Kuyrukta birikmiş işler toplu olarak alınabilir.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '3'))
+ANALYSIS_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_MAX_ATTEMPTS', '3'))
+ANALYSIS_BACKOFF_SECONDS = float(os.environ.get('ANALYSIS_BACKOFF_SECONDS', '2'))
+ANALYSIS_QUEUE_BATCH_SIZE = int(os.environ.get('ANALYSIS_QUEUE_BATCH_SIZE', '5'))
+
+# Bellekte tutulan en fazla iş kaydı (bitenler eskiden yeniye atılır)
+MAX_TRACKED_JOBS = 500
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Tekrar denemenin anlamsız olduğu hatalar (örn. kayıt bulunamadı)"""
+
+
+class AnalysisQueue:
+    """
+    Upload başına tek aktif iş tutan, sınırlı eşzamanlılıklı kuyruk.
+
+    handler(upload_id) analizi yapar; hata verirse max_attempts'e kadar
+    backoff * 2^(deneme-1) saniye beklenip tekrar denenir. Son deneme de
+    başarısız olursa on_failure(upload_id, hata_mesajı) çağrılır.
+
+    batch_handler verilirse bir worker kuyrukta bekleyen en fazla batch_size
+    işi birlikte alır; batch_handler(upload_ids) -> {upload_id: sonuç | Exception}.
+    Toplu çalıştırmada başarısız olan işler tek tek handler ile tekrar denenir.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Awaitable[Dict]],
+        on_failure: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        workers: int = ANALYSIS_WORKERS,
+        max_attempts: int = ANALYSIS_MAX_ATTEMPTS,
+        backoff: float = ANALYSIS_BACKOFF_SECONDS,
+        batch_handler: Optional[Callable[[List[str]], Awaitable[Dict[str, object]]]] = None,
+        batch_size: int = ANALYSIS_QUEUE_BATCH_SIZE
+    ):
+        self.handler = handler
+        self.on_failure = on_failure
+        self.batch_handler = batch_handler
+        self.batch_size = batch_size if batch_handler is not None else 1
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.jobs: Dict[str, Dict] = {}
+        self._active_by_upload: Dict[str, Dict] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    def active_job(self, upload_id: str) -> Optional[Dict]:
+        """Upload için kuyrukta bekleyen veya çalışan iş"""
+        return self._active_by_upload.get(upload_id)
+
+    def submit(self, upload_id: str) -> Dict:
+        """Analizi kuyruğa ekler; aynı upload zaten aktifse mevcut işi döner"""
+        job = self.active_job(upload_id)
+        if job:
+            return job
+
+        job = self._track(upload_id, "queued")
+        self._ensure_workers()
+        self._queue.put_nowait(job)
+        return job
+
+    def claim(self, upload_id: str) -> Optional[Dict]:
+        """
+        Kuyruk dışında (SSE akışıyla) yapılan analizi upload'ın aktif işi
+        olarak kaydeder; böylece eşzamanlı tetikleme aynı upload'ı ikinci kez
+        analiz etmez. Upload zaten aktifse None döner. İş release ile bırakılır.
+        """
+        if self.active_job(upload_id):
+            return None
+        job = self._track(upload_id, "running")
+        job["attempts"] = 1
+        return job
+
+    def release(self, job: Dict, result: Optional[Dict] = None, error: Optional[str] = None):
+        """claim ile alınan işi sonuçlandırır"""
+        if error is None:
+            self._complete(job, result)
+        else:
+            job["status"] = "failed"
+            job["error"] = error
+        if self._active_by_upload.get(job["upload_id"]) is job:
+            del self._active_by_upload[job["upload_id"]]
+
+    def _track(self, upload_id: str, status: str) -> Dict:
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "upload_id": upload_id,
+            "status": status,
+            "attempts": 0,
+            "error": None,
+            "result": None,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        self.jobs[job["job_id"]] = job
+        self._active_by_upload[upload_id] = job
+        self._prune()
+        return job
+
+    async def join(self):
+        """Kuyruktaki tüm işler bitene kadar bekle"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _ensure_workers(self):
+        # Worker'lar ilk işte, çalışan event loop içinde başlatılır. İsteğin
+        # context'ini (metrics'in RequestStats'ı, sorgu bütçesi) devralmasınlar
+        # diye boş bir Context ile oluşturulur
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._work(), context=contextvars.Context()))
+
+    async def _work(self):
+        while True:
+            jobs = [await self._queue.get()]
+            while len(jobs) < self.batch_size and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+            try:
+                if len(jobs) > 1:
+                    await self._run_batch(jobs)
+                else:
+                    await self._run(jobs[0])
+            finally:
+                for job in jobs:
+                    self._active_by_upload.pop(job["upload_id"], None)
+                    self._queue.task_done()
+
+    async def _run(self, job: Dict):
+        while True:
+            job["attempts"] += 1
+            job["status"] = "running"
+            try:
+                self._complete(job, await self.handler(job["upload_id"]))
+                return
+            except Exception as e:
+                if not await self._retry_after(job, e):
+                    return
+
+    async def _run_batch(self, jobs: List[Dict]):
+        for job in jobs:
+            job["attempts"] += 1
+            job["status"] = "running"
+
+        try:
+            outcomes = await self.batch_handler([job["upload_id"] for job in jobs])
+        except Exception as e:
+            outcomes = {job["upload_id"]: e for job in jobs}
+
+        async def settle(job: Dict):
+            outcome = outcomes.get(job["upload_id"])
+            if outcome is None:
+                outcome = RuntimeError("Toplu analiz sonucu dönmedi")
+            if not isinstance(outcome, Exception):
+                self._complete(job, outcome)
+            elif await self._retry_after(job, outcome):
+                await self._run(job)
+
+        await asyncio.gather(*(settle(job) for job in jobs))
+
+    @staticmethod
+    def _complete(job: Dict, result: Dict):
+        job["result"] = result
+        job["status"] = "completed"
+        job["error"] = None
+
+    async def _retry_after(self, job: Dict, error: Exception) -> bool:
+        """Hata sonrası: tekrar denenecekse backoff kadar bekleyip True döner"""
+        job["error"] = str(error)
+        if isinstance(error, PermanentJobError) or job["attempts"] >= self.max_attempts:
+            job["status"] = "failed"
+            logger.warning("Analiz başarısız (upload=%s): %s", job["upload_id"], error)
+            if self.on_failure:
+                try:
+                    await self.on_failure(job["upload_id"], str(error))
+                except Exception:
+                    logger.exception("Analiz hata durumu kaydedilemedi (upload=%s)", job["upload_id"])
+            return False
+        await asyncio.sleep(self.backoff * 2 ** (job["attempts"] - 1))
+        return True
+
+    def _prune(self):
+        if len(self.jobs) <= MAX_TRACKED_JOBS:
+            return
+        for job_id in [jid for jid, job in self.jobs.items() if job["status"] in ("completed", "failed")]:
+            if len(self.jobs) <= MAX_TRACKED_JOBS:
+                break
+            del self.jobs[job_id]
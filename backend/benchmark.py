@@ -0,0 +1,464 @@
+"""
+Offline Benchmark
+server.py'deki rapor, analiz ve koç paneli endpoint'lerini canlı Supabase
+olmadan, bellek içi taklit (fake_supabase.py) üzerinde sentetik bir sınıfla
+ölçer. Her endpoint için p50/p95 gecikme, round-trip (Supabase isteği) sayısı
+ve yanıt boyutu raporlanır.
+
+--latency-ms her Supabase isteğine sabit ağ gecikmesi ekler; sıralı ve
+eşzamanlı sorguların farkı ancak bu şekilde görünür.
+
+--cold-start N serverless soğuk başlangıcını ölçer: her örnek yeni bir
+Python sürecinde server import'u ve ilk isteğin süresidir.
+
+--encoding büyük yanıtlarda eski serileştirme yolu (jsonable_encoder +
+stdlib json) ile route'un response_model + orjson yolunu ve gzip/br
+boyutlarını karşılaştırır.
+
+Kullanım:
+    cd backend
+    python benchmark.py --students 100 --months 6 --runs 30 --latency-ms 20
+    python benchmark.py --json > bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --fail-on-regression
+    python benchmark.py --cold-start 10
+    python benchmark.py --encoding
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+import compression
+from fake_supabase import FAKE_URL, FakeSupabase
+from tyt_ayt_topics import BOLUM_TEMPLATES, BOLUMLER, TOPICS_BY_SUBJECT, normalize_bolum, normalize_name
+
+# server.py import edilirken ortam değişkenleri okunur
+os.environ.setdefault("SUPABASE_URL", FAKE_URL)
+os.environ.setdefault("SUPABASE_ANON_KEY", "fake-key")
+os.environ.setdefault("ANALYSIS_CACHE_PATH", "")
+
+SORU_LESSONS = {
+    "TYT": ("Türkçe", "Matematik", "Geometri", "Fizik", "Kimya", "Biyoloji", "Tarih", "Coğrafya"),
+    "AYT": ("Matematik", "Fizik", "Kimya", "Biyoloji", "Edebiyat", "Tarih-1", "Coğrafya-1"),
+}
+GUNLER = ("Pazartesi", "Salı", "Çarşamba", "Perşembe", "Cuma", "Cumartesi", "Pazar")
+
+# (ad, yol şablonu); {sid} sıradaki öğrenci id'si, {today} bugünün tarihi
+SCENARIOS = (
+    ("rapor günlük", "/api/student/{sid}/reports/daily?date={today}"),
+    ("rapor haftalık", "/api/student/{sid}/reports/weekly"),
+    ("rapor aylık", "/api/student/{sid}/reports/monthly"),
+    ("rapor 90 gün", "/api/student/{sid}/reports/range?start={quarter_ago}&end={today}&bucket_days=7"),
+    ("son 7 gün özeti", "/api/student/{sid}/last-7-days-summary"),
+    ("öğrenci analizi", "/api/student/{sid}/analysis"),
+    ("konu skorları", "/api/exam/topic-scores/{sid}"),
+    ("öğrenci denemeleri", "/api/exam/student-exams/{sid}"),
+    ("soru takip listesi", "/api/student/{sid}/soru-takip"),
+    ("konular", "/api/topics/{sid}"),
+    ("görevler", "/api/tasks/{sid}"),
+    ("bildirimler", "/api/student/{sid}/notifications"),
+    ("koç öğrenci listesi", "/api/students"),
+    ("koç öğrenci analizi", "/api/coach/students-analysis"),
+    ("koç haftalık özet", "/api/coach/reports/weekly-summary"),
+    ("koç deneme sayfası", "/api/exam/coach-overview"),
+    ("koç bildirimleri", "/api/student/coach/notifications"),
+)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(day: date, rng: random.Random) -> str:
+    moment = datetime.combine(day, dt_time(rng.randint(8, 22), rng.randint(0, 59), rng.randint(0, 59)), timezone.utc)
+    return moment.isoformat()
+
+
+def _exam_subjects(exam: str, skill: float, rng: random.Random) -> List[Dict]:
+    subjects = []
+    for lesson in SORU_LESSONS[exam][:4]:
+        catalog = TOPICS_BY_SUBJECT.get((exam, normalize_name(lesson)), ())
+        topics = []
+        for entry in rng.sample(catalog, min(4, len(catalog))):
+            total = rng.randint(2, 6)
+            correct = min(total, max(0, round(total * rng.gauss(skill, 0.15))))
+            wrong = rng.randint(0, total - correct)
+            topics.append({"name": entry.topic, "total": total, "correct": correct, "wrong": wrong})
+        correct = sum(t["correct"] for t in topics)
+        wrong = sum(t["wrong"] for t in topics)
+        total = sum(t["total"] for t in topics)
+        subjects.append({
+            "name": lesson, "correct": correct, "wrong": wrong, "blank": total - correct - wrong,
+            "total": total, "topics": topics
+        })
+    return subjects
+
+
+def generate_cohort(students: int = 50, months: int = 6, seed: int = 0, today: Optional[date] = None) -> Dict[str, List[Dict]]:
+    """
+    Gerçekçi bir sınıf üretir: her öğrenci için bölüm şablonundan konular,
+    aylar boyunca neredeyse her gün soru takip girişi, haftalık görevler,
+    ayda iki deneme (eski exams + exam_uploads/exam_analysis), branş
+    taramaları ve bildirimler. Aynı seed aynı veriyi üretir.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    days = months * 30
+    tables: Dict[str, List[Dict]] = {name: [] for name in (
+        "students", "topics", "soru_takip", "tasks", "exams", "exam_uploads",
+        "exam_analysis", "brans_tarama", "notifications"
+    )}
+
+    for n in range(students):
+        student_id = _uuid(rng)
+        bolum = rng.choice(BOLUMLER)
+        skill = rng.uniform(0.45, 0.85)
+        diligence = rng.uniform(0.5, 0.95)
+        tables["students"].append({
+            "id": student_id, "ad": f"Öğrenci{n + 1}", "soyad": f"Soyad{n + 1}", "bolum": bolum,
+            "hedef": None, "notlar": None, "token": _uuid(rng), "onboarding_completed": True,
+            "created_at": _timestamp(today - timedelta(days=days), rng)
+        })
+
+        for row in BOLUM_TEMPLATES[normalize_bolum(bolum)]:
+            tables["topics"].append({
+                **row, "id": _uuid(rng), "student_id": student_id,
+                "durum": rng.choice(("baslanmadi", "baslanmadi", "devam", "tamamlandi"))
+            })
+
+        for offset in range(days, -1, -1):
+            day = today - timedelta(days=offset)
+            if rng.random() < diligence:
+                for _ in range(rng.randint(1, 4)):
+                    exam = "TYT" if rng.random() < 0.6 else "AYT"
+                    solved = rng.randint(10, 60)
+                    correct = min(solved, max(0, round(solved * rng.gauss(skill, 0.1))))
+                    wrong = rng.randint(0, solved - correct)
+                    tables["soru_takip"].append({
+                        "id": _uuid(rng), "student_id": student_id, "date": day.isoformat(),
+                        "lesson": f"{exam} {rng.choice(SORU_LESSONS[exam])}", "topic": None, "source": None,
+                        "solved": solved, "correct": correct, "wrong": wrong, "blank": solved - correct - wrong,
+                        "created_at": _timestamp(day, rng)
+                    })
+
+            if day.weekday() == 0:
+                for index in range(rng.randint(4, 7)):
+                    task_day = day + timedelta(days=rng.randint(0, 6))
+                    tables["tasks"].append({
+                        "id": _uuid(rng), "student_id": student_id, "aciklama": f"Görev {index + 1}",
+                        "sure": rng.choice((30, 45, 60, 90)), "tarih": task_day.isoformat(),
+                        "gun": GUNLER[task_day.weekday()], "order_index": index,
+                        "completed": task_day < today and rng.random() < diligence,
+                        "verilme_tarihi": _timestamp(day, rng), "created_at": _timestamp(day, rng)
+                    })
+                lesson = rng.choice(SORU_LESSONS["TYT"])
+                total = 20
+                correct = min(total, round(total * rng.gauss(skill, 0.1)))
+                tables["brans_tarama"].append({
+                    "id": _uuid(rng), "student_id": student_id, "date": day.isoformat(), "lesson": lesson,
+                    "correct": correct, "wrong": total - correct, "blank": 0, "total": total,
+                    "net": correct - (total - correct) / 4, "accuracy": correct / total * 100,
+                    "created_at": _timestamp(day, rng)
+                })
+
+            if day.day in (1, 15):
+                exam = "TYT" if day.day == 1 else "AYT"
+                subjects = _exam_subjects(exam, skill, rng)
+                upload_id = _uuid(rng)
+                created_at = _timestamp(day, rng)
+                exam_name = f"{exam} Deneme {day.isoformat()}"
+                breakdown = []
+                total_net = 0.0
+                for subject in subjects:
+                    net = subject["correct"] - subject["wrong"] / 4
+                    total_net += net
+                    breakdown.append({k: subject[k] for k in ("name", "total", "correct", "wrong", "blank")} | {"net": round(net, 2)})
+                tables["exam_uploads"].append({
+                    "id": upload_id, "student_id": student_id, "uploaded_by": "student", "file_url": None,
+                    "file_type": "manual", "exam_date": day.isoformat(), "exam_name": exam_name,
+                    "analysis_status": "completed" if offset > 3 else "pending", "created_at": created_at,
+                    "analysis_updated_at": created_at
+                })
+                tables["exam_analysis"].append({
+                    "id": _uuid(rng), "upload_id": upload_id, "student_id": student_id,
+                    "total_net": round(total_net, 2), "subject_breakdown": json.dumps(breakdown),
+                    "topic_breakdown": json.dumps(subjects), "weak_topics": json.dumps([]),
+                    "recommendations": "Analiz bekleniyor.",
+                    "ai_raw_response": json.dumps({"exam_name": exam_name, "exam_type": exam, "subjects": subjects}),
+                    "created_at": created_at
+                })
+                for subject in breakdown:
+                    tables["exams"].append({
+                        "id": _uuid(rng), "student_id": student_id, "tarih": day.isoformat(), "sinav_tipi": exam,
+                        "ders": subject["name"], "dogru": subject["correct"], "yanlis": subject["wrong"],
+                        "net": subject["net"], "created_at": created_at
+                    })
+
+            if rng.random() < 0.3:
+                for user_id in (student_id, "coach"):
+                    tables["notifications"].append({
+                        "id": _uuid(rng), "user_id": user_id, "type": "info", "title": "Bildirim",
+                        "message": f"{day.isoformat()} bildirimi", "is_read": offset > 7 or rng.random() < 0.5,
+                        "created_at": _timestamp(day, rng)
+                    })
+
+    return tables
+
+# Serileştirme karşılaştırmasındaki büyük yanıtlar
+ENCODING_SCENARIOS = (
+    "koç öğrenci analizi", "koç haftalık özet", "koç deneme sayfası",
+    "soru takip listesi", "görevler", "konular",
+)
+
+# Soğuk başlangıçta ölçülen ilk istekler: veritabanına dokunmayan giriş ve koç listesi
+COLD_START_PATHS = (
+    ("POST", "/api/coach/login"),
+    ("GET", "/api/students"),
+)
+
+# Yeni süreçte çalışır; taklit veritabanı import'tan sonra bağlanır, istemci
+# (postgrest dahil) ilk istekte kurulduğu için ilk isteğin süresine girer
+COLD_START_SCRIPT = """
+import time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+
+import asyncio, json, httpx
+from db import LazyDatabase
+from fake_supabase import FAKE_URL, FakeSupabase
+
+fake = FakeSupabase()
+fake.load({{"students": [{{"id": "s1", "ad": "Ali", "bolum": "Sayısal"}}]}})
+server.supabase = LazyDatabase(FAKE_URL, "fake-key", transport=httpx.MockTransport(fake.handle))
+
+async def first_request():
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        request_started = time.perf_counter()
+        await client.request({method!r}, {path!r}, json={{"email": "", "password": ""}} if {method!r} == "POST" else None)
+        return time.perf_counter() - request_started
+
+print(json.dumps({{"import": imported - started, "first_request": asyncio.run(first_request())}}))
+"""
+
+
+def run_cold_start(samples: int) -> Dict[str, Dict]:
+    """Her yol için medyan import ve ilk istek süresi (ms)"""
+    results = {}
+    for method, path in COLD_START_PATHS:
+        imports, first_requests = [], []
+        for _ in range(samples):
+            output = subprocess.run(
+                [sys.executable, "-c", COLD_START_SCRIPT.format(method=method, path=path)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, check=True
+            ).stdout
+            timing = json.loads(output.strip().splitlines()[-1])
+            imports.append(timing["import"] * 1000)
+            first_requests.append(timing["first_request"] * 1000)
+        results[f"{method} {path}"] = {
+            "import_ms": round(statistics.median(imports), 1),
+            "first_request_ms": round(statistics.median(first_requests), 1),
+            "total_ms": round(statistics.median(i + r for i, r in zip(imports, first_requests)), 1)
+        }
+    return results
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(fake: FakeSupabase, app, student_ids: List[str], runs: int,
+                        only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    today = date.today()
+    values = {"today": today.isoformat(), "quarter_ago": (today - timedelta(days=90)).isoformat()}
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, template in SCENARIOS:
+            if only and not any(part in name for part in only):
+                continue
+
+            timings, round_trips, sizes, wire_sizes = [], [], [], []
+            # İlk istek ısınma (import, önbellek, bağlantı havuzu); ölçülmez
+            for attempt in range(runs + 1):
+                path = template.format(sid=student_ids[attempt % len(student_ids)], **values)
+                fake.reset_calls()
+                started = time.perf_counter()
+                response = await client.get(path)
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name}: {path} -> {response.status_code} {response.text[:200]}")
+                if attempt:
+                    timings.append(elapsed * 1000)
+                    round_trips.append(len(fake.calls))
+                    sizes.append(len(response.content))
+                    wire_sizes.append(response.num_bytes_downloaded)
+
+            results[name] = {
+                "p50_ms": round(_percentile(timings, 50), 2),
+                "p95_ms": round(_percentile(timings, 95), 2),
+                "round_trips": max(round_trips),
+                "bytes": round(sum(sizes) / len(sizes)),
+                "wire_bytes": round(sum(wire_sizes) / len(wire_sizes))
+            }
+    return results
+
+
+def _mean_ms(encode, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        encode()
+    return (time.perf_counter() - started) / runs * 1000
+
+
+async def run_encoding(app, student_ids: List[str], runs: int) -> Dict[str, Dict]:
+    """
+    Yanıt gövdesi bir kez alınır, iki serileştirme yolu aynı veriyle ölçülür:
+    modelsiz dict (jsonable_encoder + JSONResponse) ve route'un kendi yolu
+    (response_model varsa pydantic-core, ardından orjson)
+    """
+    today = date.today()
+    values = {"today": today.isoformat(), "quarter_ago": (today - timedelta(days=90)).isoformat()}
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, template in SCENARIOS:
+            if name not in ENCODING_SCENARIOS:
+                continue
+            path = template.format(sid=student_ids[0], **values)
+            payload = (await client.get(path)).json()
+            route = next(
+                route for route in app.routes
+                if route.matches({"type": "http", "path": path.split("?")[0], "method": "GET"})[0] == Match.FULL
+            )
+
+            async def typed_body():
+                content = await serialize_response(field=route.response_field, response_content=payload)
+                return route.response_class(content).body
+
+            body = await typed_body()
+            started = time.perf_counter()
+            for _ in range(runs):
+                await typed_body()
+            typed_ms = (time.perf_counter() - started) / runs * 1000
+
+            results[name] = {
+                "json_ms": round(_mean_ms(lambda: JSONResponse(jsonable_encoder(payload)).body, runs), 3),
+                "typed_ms": round(typed_ms, 3),
+                "bytes": len(body),
+                "gzip_bytes": len(compression.compress(body, "gzip")),
+                "br_bytes": len(compression.compress(body, "br")) if compression.brotli is not None else None
+            }
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Round-trip artışı veya p95'te toleransı aşan yavaşlama"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["round_trips"] > before["round_trips"]:
+            regressions.append(f"{name}: round-trip {before['round_trips']} -> {result['round_trips']}")
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canlı Supabase olmadan endpoint benchmark'ı")
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--runs", type=int, default=20, help="Endpoint başına ölçülen istek sayısı")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Supabase isteği başına eklenen gecikme")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Sadece adında bu ifadeler geçen senaryolar")
+    parser.add_argument("--json", action="store_true", help="Sonuçları JSON olarak yaz")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki --json çıktısı")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p95 için izin verilen oransal yavaşlama")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--cold-start", type=int, metavar="N", help="Sadece soğuk başlangıcı N yeni süreçle ölç")
+    parser.add_argument("--encoding", action="store_true", help="Büyük yanıtlarda serileştirme süresi ve sıkıştırma")
+    args = parser.parse_args()
+
+    if args.cold_start:
+        results = run_cold_start(args.cold_start)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return 0
+        print(f"Soğuk başlangıç (medyan, {args.cold_start} süreç)\n")
+        print(f"{'ilk istek':<24}{'import ms':>12}{'istek ms':>12}{'toplam ms':>12}")
+        for name, result in results.items():
+            print(f"{name:<24}{result['import_ms']:>12.1f}{result['first_request_ms']:>12.1f}{result['total_ms']:>12.1f}")
+        return 0
+
+    started = time.perf_counter()
+    cohort = generate_cohort(args.students, args.months, args.seed)
+    fake = FakeSupabase(latency=args.latency_ms / 1000)
+    fake.load(cohort)
+    setup_seconds = time.perf_counter() - started
+
+    import server
+    server.supabase = fake.client()
+
+    student_ids = [student["id"] for student in cohort["students"]]
+
+    if args.encoding:
+        results = asyncio.run(run_encoding(server.app, student_ids, args.runs))
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return 0
+        print(f"Serileştirme: {args.students} öğrenci x {args.months} ay, yanıt başına {args.runs} ölçüm\n")
+        print(f"{'endpoint':<24}{'json ms':>10}{'tipli ms':>10}{'KB':>10}{'gzip KB':>10}{'br KB':>10}")
+        for name, result in results.items():
+            br = f"{result['br_bytes'] / 1024:>10.1f}" if result["br_bytes"] is not None else f"{'-':>10}"
+            print(f"{name:<24}{result['json_ms']:>10.2f}{result['typed_ms']:>10.2f}"
+                  f"{result['bytes'] / 1024:>10.1f}{result['gzip_bytes'] / 1024:>10.1f}{br}")
+        return 0
+
+    results = asyncio.run(run_benchmark(fake, server.app, student_ids, args.runs, args.only))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        sizes = ", ".join(f"{table} {len(rows)}" for table, rows in fake.tables.items())
+        print(f"Sınıf: {args.students} öğrenci x {args.months} ay ({setup_seconds:.1f} s) - {sizes}")
+        print(f"Supabase gecikmesi: {args.latency_ms:g} ms/istek, endpoint başına {args.runs} ölçüm\n")
+        print(f"{'endpoint':<24}{'p50 ms':>10}{'p95 ms':>10}{'round-trip':>12}{'KB':>10}{'kablo KB':>10}")
+        for name, result in results.items():
+            print(f"{name:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                  f"{result['round_trips']:>12}{result['bytes'] / 1024:>10.1f}{result['wire_bytes'] / 1024:>10.1f}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"GERİLEME: {regression}", file=sys.stderr)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
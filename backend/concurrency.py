@@ -0,0 +1,54 @@
+"""
+İstek Kapsamlı Eşzamanlılık
+Bir endpoint içindeki bağımsız Supabase çağrılarını aynı anda çalıştırır,
+gerçekten bağımlı olanları (örn. upload_id -> analysis) sıraya koyar.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+def _first_error(group: BaseExceptionGroup) -> BaseException:
+    error = group.exceptions[0]
+    while isinstance(error, BaseExceptionGroup):
+        error = error.exceptions[0]
+    return error
+
+
+class RequestTaskGroup:
+    """
+    asyncio.TaskGroup üzerine ince bir katman:
+
+        async with RequestTaskGroup() as group:
+            upload = group.spawn(insert_upload)
+            group.spawn(insert_analysis, upload)   # upload bittikten sonra, sonucu ile
+            student = group.spawn(fetch_student)   # upload ile eşzamanlı
+        upload.result()
+
+    Bir görev hata verirse kalanlar iptal edilir ve ilk hata (ExceptionGroup
+    olmadan) olduğu gibi yükseltilir; böylece mevcut HTTPException /
+    except Exception akışı değişmez.
+    """
+
+    def __init__(self):
+        self._group = asyncio.TaskGroup()
+
+    async def __aenter__(self) -> "RequestTaskGroup":
+        await self._group.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self._group.__aexit__(exc_type, exc, tb)
+        except BaseExceptionGroup as group:
+            raise _first_error(group) from None
+
+    def spawn(self, factory: Callable[..., Awaitable[Any]], *after: asyncio.Task) -> asyncio.Task:
+        """
+        factory'yi görev olarak başlatır. after verilirse önce o görevler
+        beklenir ve sonuçları sırayla factory'ye argüman olarak geçilir.
+        """
+        async def run():
+            results = [await task for task in after]
+            return await factory(*results)
+
+        return self._group.create_task(run())
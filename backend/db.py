@@ -0,0 +1,170 @@
+"""
+Async Veri Erişim Katmanı
+Supabase (PostgREST) sorgularını event loop'u bloklamadan çalıştırır.
+Tüm tablolar tek bir havuzlu (keep-alive) httpx.AsyncClient'ı paylaşır.
+
+postgrest ilk istemci kurulurken yüklenir; sunucu import'u (serverless
+soğuk başlangıç) veritabanına dokunmayan istekler için bu maliyeti ödemez.
+"""
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+import httpx
+
+from metrics import InstrumentedTransport, allow_extra_calls
+
+if TYPE_CHECKING:
+    from postgrest import AsyncRequestBuilder, AsyncRPCFilterRequestBuilder, AsyncSelectRequestBuilder
+
+logger = logging.getLogger(__name__)
+
+# Bağlantı havuzu ayarları (worker başına)
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '20'))
+DB_MAX_KEEPALIVE = int(os.environ.get('DB_MAX_KEEPALIVE', '10'))
+DB_KEEPALIVE_EXPIRY = float(os.environ.get('DB_KEEPALIVE_EXPIRY', '30'))
+DB_TIMEOUT = float(os.environ.get('DB_TIMEOUT', '30'))
+
+# Supabase varsayılan max-rows sınırı (tek istekte dönen en fazla satır)
+DB_PAGE_SIZE = int(os.environ.get('DB_PAGE_SIZE', '1000'))
+
+
+class AsyncDatabase:
+    """
+    supabase-py ile aynı zincir yapısını sunan async istemci:
+
+        response = await db.table("students").select("*").eq("id", sid).execute()
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        from postgrest import AsyncPostgrestClient, DEFAULT_POSTGREST_CLIENT_HEADERS
+
+        # Her istek metrics.InstrumentedTransport'tan geçer (round-trip sayısı, süre, bayt)
+        self.http = http_client or httpx.AsyncClient(
+            timeout=httpx.Timeout(DB_TIMEOUT),
+            transport=InstrumentedTransport(transport or httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=DB_MAX_CONNECTIONS,
+                    max_keepalive_connections=DB_MAX_KEEPALIVE,
+                    keepalive_expiry=DB_KEEPALIVE_EXPIRY
+                )
+            )),
+            follow_redirects=True
+        )
+        headers: Dict[str, str] = {
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apikey": key,
+            "Authorization": f"Bearer {key}"
+        }
+        self.rest = AsyncPostgrestClient(
+            f"{url.rstrip('/')}/rest/v1",
+            headers=headers,
+            http_client=self.http
+        )
+
+    def table(self, name: str) -> "AsyncRequestBuilder":
+        return self.rest.table(name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> "AsyncRPCFilterRequestBuilder":
+        return self.rest.rpc(fn, params or {})
+
+    async def count(self, table: str, **filters) -> int:
+        """Satır taşımadan sayım (HEAD + count=exact), filtreler eq olarak uygulanır"""
+        query = self.table(table).select("*", count="exact", head=True)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        response = await query.execute()
+        return response.count or 0
+
+    async def aclose(self) -> None:
+        """Havuzdaki bağlantıları kapat (uygulama kapanırken)"""
+        await self.http.aclose()
+
+
+class LazyDatabase:
+    """
+    AsyncDatabase ile aynı arayüz; istemci ilk sorguda kurulur.
+
+    Sıcak serverless örneğinde modül global'i korunur, yani istemci ve
+    bağlantı havuzu istekler arasında yeniden kullanılır. Havuzdaki
+    bağlantılar kuruldukları event loop'a bağlıdır: çalıştırıcı her çağrıda
+    yeni loop açıyorsa istemci o loop için yeniden kurulur; eskisinin
+    havuzu kapatılır (eski loop hâlâ çalışıyorsa onda, değilse yeni loop'ta).
+    """
+
+    def __init__(self, url: str, key: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = url
+        self.key = key
+        self.transport = transport
+        self._db: Optional[AsyncDatabase] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = set()
+
+    def get(self) -> AsyncDatabase:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._db is None or self._loop is not loop:
+            if self._db is not None:
+                self._discard(self._db, self._loop, loop)
+            self._db = AsyncDatabase(self.url, self.key, transport=self.transport)
+            self._loop = loop
+        return self._db
+
+    def _discard(self, db: AsyncDatabase, old_loop: Optional[asyncio.AbstractEventLoop],
+                 loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Loop değişince bırakılan istemcinin bağlantı havuzunu kapatır"""
+        if old_loop is not None and old_loop.is_running():
+            asyncio.run_coroutine_threadsafe(_close_quietly(db), old_loop)
+        elif loop is not None:
+            task = loop.create_task(_close_quietly(db))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def table(self, name: str) -> "AsyncRequestBuilder":
+        return self.get().table(name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> "AsyncRPCFilterRequestBuilder":
+        return self.get().rpc(fn, params)
+
+    async def count(self, table: str, **filters) -> int:
+        return await self.get().count(table, **filters)
+
+    async def aclose(self) -> None:
+        if self._db is not None:
+            await self._db.aclose()
+            self._db = None
+
+
+async def _close_quietly(db: AsyncDatabase) -> None:
+    try:
+        await db.aclose()
+    except Exception:
+        logger.debug("Eski veritabanı istemcisi kapatılamadı", exc_info=True)
+
+
+async def fetch_all(build_query: Callable[[], "AsyncSelectRequestBuilder"], page_size: Optional[int] = None) -> List[Dict]:
+    """
+    Çok öğrencili sorgularda max-rows sınırına takılmamak için sayfalayarak okur.
+    build_query her çağrıda yeni (sıralı) bir sorgu döndürmelidir; sonuç
+    sınırın altındaysa tek istek yeterlidir.
+    """
+    page_size = page_size or DB_PAGE_SIZE
+    rows: List[Dict] = []
+    start = 0
+    while True:
+        page = await build_query().range(start, start + page_size - 1).execute()
+        rows.extend(page.data)
+        if len(page.data) < page_size:
+            return rows
+        start += page_size
+        # Sonraki sayfa veri boyutundan gelir, route bütçesine eklenir
+        allow_extra_calls()
@@ -1,36 +1,270 @@
 """
 Deneme Sonuç Analiz Modülü
 Manuel veri girişi + AI metin analizi (Vision YOK)
+
+numpy ve emergentintegrations ilk kullanımda yüklenir: ikisi de sunucu
+import süresinin (serverless soğuk başlangıç) büyük kısmını oluşturuyordu.
 """
 import os
+import re
 import json
-from typing import Dict, List, Optional
-from datetime import datetime, timezone
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import date, datetime, timezone
+import httpx
+from analysis_cache import AnalysisCache, cache_key
+from metrics import llm_span
+from tyt_ayt_topics import find_topic
+
+if TYPE_CHECKING:
+    from emergentintegrations.llm.chat import UserMessage
+
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-4o-mini"
+
+# LlmChat parça parça yanıt vermez. Adres ve anahtar ikisi de verilmişse akışlı
+# analiz sağlayıcının OpenAI uyumlu /chat/completions stream=True ucundan
+# okunur; verilmemişse LlmChat ile tek parça döner.
+LLM_STREAM_BASE_URL = os.environ.get('LLM_STREAM_BASE_URL')
+LLM_STREAM_API_KEY = os.environ.get('LLM_STREAM_API_KEY')
+LLM_STREAM_TIMEOUT = float(os.environ.get('LLM_STREAM_TIMEOUT', '60'))
+
+# Toplu analizde tek LLM çağrısına giren deneme sayısı ve eşzamanlı çağrı sınırı
+ANALYSIS_BATCH_SIZE = int(os.environ.get('ANALYSIS_BATCH_SIZE', '5'))
+ANALYSIS_BATCH_CONCURRENCY = int(os.environ.get('ANALYSIS_BATCH_CONCURRENCY', '3'))
+
+# Konu değerlendirme eşikleri (tüm akışlarda ortak)
+WEAK_ACCURACY = 60      # başarı oranı bunun altındaysa zayıf
+WEAK_WRONG = 3          # deneme başına (ağırlıklı) yanlış en az bu kadarsa zayıf (sadece deneme kayıtları)
+STRONG_ACCURACY = 80    # zayıf değilse ve başarı oranı en az bu kadarsa güçlü
+RECENCY_HALF_LIFE_DAYS = 14  # bu kadar gün önceki veri yarı ağırlık alır
+
+SYSTEM_MESSAGE = """Sen bir TYT-AYT deneme sonuç analiz asistanısın. 
+            Verilen deneme sonuçlarını ve önceden hesaplanmış zayıf/güçlü konu
+            listelerini kullanarak şunları yap (listeleri yeniden hesaplama):
+            
+            1. Zayıf konuların neden öncelikli olduğunu kısaca açıkla
+            2. Güçlü konuları kısaca belirt
+            3. Kısa ve öz çalışma önerileri sun (maksimum 5 madde)
+            4. Genel başarı değerlendirmesi yap
+            
+            KISA VE ÖZ YANIT VER. Maksimum 200 kelime.
+            JSON formatında yanıt verme, düz metin olarak yaz."""
+
+BATCH_SYSTEM_MESSAGE = SYSTEM_MESSAGE + """
+            
+            Birden fazla deneme gönderilirse her birini ayrı ayrı analiz et.
+            Her analizin başına yalnızca kendi başlığını yaz: ### DENEME <numara>"""
+
+class TextMessage(NamedTuple):
+    """chat_factory ile verilen LLM'lere giden mesaj (UserMessage ile aynı .text alanı)"""
+    text: str
+
+
+BATCH_HEADER = re.compile(r"^\s*###\s*DENEME\s+(\d+)\s*$", re.MULTILINE)
+
+
+def split_batch_response(response: str, count: int) -> Dict[int, str]:
+    """
+    Toplu LLM yanıtını "### DENEME n" başlıklarından bölerek
+    {0 tabanlı indeks: analiz metni} döner. Eksik, boş veya tekrarlanan
+    bölümler dahil edilmez.
+    """
+    parts = BATCH_HEADER.split(response)
+    sections = {}
+    for number, text in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        text = text.strip()
+        if 0 <= index < count and text and index not in sections:
+            sections[index] = text
+    return sections
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _catalog_topic_name(name: str, subject: str, exam: Optional[str]) -> str:
+    match = find_topic(name, subject=subject, exam=exam)
+    return match.topic if match else name
+
+
+def exam_topic_records(exam_data: Dict, when=None) -> List[Dict]:
+    """
+    Deneme verisindeki konu satırlarını score_topics girdisine çevirir;
+    katalogda bulunan konu adları kanonik yazıma çevrilir ("turev" -> "Türev")
+    """
+    exam = exam_data.get("exam_type")
+    return [
+        {
+            "subject": subject["name"],
+            "topic": _catalog_topic_name(topic["name"], subject["name"], exam),
+            "total": topic.get("total", 0),
+            "correct": topic.get("correct", 0),
+            "wrong": topic.get("wrong", 0),
+            "date": when
+        }
+        for subject in exam_data.get("subjects", [])
+        for topic in subject.get("topics") or []
+    ]
+
+
+def soru_takip_records(rows: Iterable[Dict]) -> List[Dict]:
+    """
+    soru_takip(_daily) satırlarını ders düzeyinde score_topics girdisine çevirir.
+    Günlük ders satırları onlarca soru içerdiğinden deneme başına yanlış
+    eşiği (WEAK_WRONG) bunlara uygulanmaz; sadece başarı oranı değerlendirilir.
+    """
+    return [
+        {
+            "subject": row["lesson"],
+            "topic": None,
+            "total": row["solved"],
+            "correct": row["correct"],
+            "wrong": row["wrong"],
+            "date": row["date"],
+            "wrong_rule": False
+        }
+        for row in rows
+    ]
+
+
+def score_topics(
+    records: Iterable[Dict],
+    today: Optional[date] = None,
+    half_life_days: float = RECENCY_HALF_LIFE_DAYS
+) -> Dict:
+    """
+    Konu (veya ders) bazlı sonuçları tek geçişte, vektörel olarak puanlar
+    
+    Aynı konuya ait kayıtlar birleştirilir; her kayıt yaşına göre
+    0.5 ** (gün / half_life_days) ağırlığı alır (tarihsiz kayıt = bugün).
+    Zayıf/güçlü kararı yakın döneme ağırlık veren başarı oranıyla verilir;
+    trend = ağırlıklı başarı - düz başarı (pozitif = son dönemde yükseliyor).
+    
+    Args:
+        records: [{subject, topic (None = ders düzeyi), total, correct, wrong, date,
+                  wrong_rule (varsayılan True; False = WEAK_WRONG eşiği dışında)}]
+        today: Yaş hesabı için referans gün (varsayılan: bugün)
+        
+    Returns:
+        {
+            "topics": [{name, subject, topic, total, correct, wrong, net, accuracy,
+                        recent_accuracy, trend, samples}],
+            "weak_topics": [name, ...],    # en zayıftan başlayarak
+            "strong_topics": [name, ...]   # en güçlüden başlayarak
+        }
+    """
+    records = [record for record in records if record.get("total", 0) > 0]
+    if not records:
+        return {"topics": [], "weak_topics": [], "strong_topics": []}
+    
+    import numpy as np
+    
+    today = today or date.today()
+    names = np.array([
+        f"{record['subject']} - {record['topic']}" if record.get("topic") else record["subject"]
+        for record in records
+    ])
+    keys, first_index, inverse = np.unique(names, return_index=True, return_inverse=True)
+    
+    total = np.array([record["total"] for record in records], dtype=float)
+    correct = np.array([record.get("correct", 0) for record in records], dtype=float)
+    wrong = np.array([record.get("wrong", 0) for record in records], dtype=float)
+    wrong_rule = np.array([record.get("wrong_rule", True) for record in records], dtype=float)
+    ages = np.array([
+        (today - record_date).days if record_date else 0
+        for record_date in (_as_date(record.get("date")) for record in records)
+    ], dtype=float)
+    weights = 0.5 ** (np.clip(ages, 0, None) / half_life_days)
+    
+    def per_topic(values):
+        return np.bincount(inverse, weights=values, minlength=len(keys))
+    
+    topic_total = per_topic(total)
+    topic_correct = per_topic(correct)
+    topic_wrong = per_topic(wrong)
+    
+    accuracy = topic_correct / topic_total * 100
+    recent_accuracy = per_topic(weights * correct) / per_topic(weights * total) * 100
+    # Deneme başına yanlış sadece eşiğin geçerli olduğu (deneme) kayıtlarından
+    rule_weight = per_topic(weights * wrong_rule)
+    wrong_per_sample = np.divide(
+        per_topic(weights * wrong * wrong_rule), rule_weight,
+        out=np.zeros(len(keys)), where=rule_weight > 0
+    )
+    net = topic_correct - topic_wrong / 4.0
+    samples = np.bincount(inverse, minlength=len(keys))
+    
+    weak = (recent_accuracy < WEAK_ACCURACY) | (wrong_per_sample >= WEAK_WRONG)
+    strong = ~weak & (recent_accuracy >= STRONG_ACCURACY)
+    
+    # Zayıflar: en düşük başarı önce, eşitlikte çok yanlış önce; güçlüler: en yüksek başarı önce
+    weak_index = np.flatnonzero(weak)
+    weak_index = weak_index[np.lexsort((-wrong_per_sample[weak_index], recent_accuracy[weak_index]))]
+    strong_index = np.flatnonzero(strong)
+    strong_index = strong_index[np.argsort(-recent_accuracy[strong_index], kind="stable")]
+    
+    topics = [
+        {
+            "name": str(keys[i]),
+            "subject": records[first_index[i]]["subject"],
+            "topic": records[first_index[i]].get("topic"),
+            "total": int(topic_total[i]),
+            "correct": int(topic_correct[i]),
+            "wrong": int(topic_wrong[i]),
+            "net": round(float(net[i]), 2),
+            "accuracy": round(float(accuracy[i]), 1),
+            "recent_accuracy": round(float(recent_accuracy[i]), 1),
+            "trend": round(float(recent_accuracy[i] - accuracy[i]), 1),
+            "samples": int(samples[i])
+        }
+        for i in range(len(keys))
+    ]
+    
+    return {
+        "topics": topics,
+        "weak_topics": [str(keys[i]) for i in weak_index],
+        "strong_topics": [str(keys[i]) for i in strong_index]
+    }
 
 
 class ExamAnalyzer:
     """Deneme sonuçlarını analiz eden sınıf (sadece manuel giriş)"""
     
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-    
-    async def analyze_exam_text(self, exam_data: Dict) -> Dict:
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[AnalysisCache] = None,
+        chat_factory: Optional[Callable[[str, str], object]] = None,
+        stream_transport: Optional[httpx.AsyncBaseTransport] = None,
+        stream_url: Optional[str] = LLM_STREAM_BASE_URL,
+        stream_api_key: Optional[str] = LLM_STREAM_API_KEY
+    ):
         """
-        Manuel girilen deneme verilerini AI ile analiz eder
-        
         Args:
-            exam_data: {
-                "exam_name": str,
-                "exam_type": "TYT" | "AYT",
-                "subjects": [{name, total, correct, wrong, blank, topics: [...]}]
-            }
-            
-        Returns:
-            AI analiz sonuçları
+            api_key: LLM anahtarı
+            cache: AI yanıt önbelleği (None = kapalı)
+            chat_factory: (session_id, system_message) -> send_message(TextMessage)
+                metodu olan nesne. Verilmezse LlmChat (ve UserMessage) kullanılır;
+                testlerde emergentintegrations olmadan sahte bir LLM verilebilir.
+                Sohbette stream_message varsa akışlı analiz onu kullanır.
+            stream_transport: Akışlı analizde sağlayıcıya giden istekler için
+                httpx transport'u (testlerde sahte sağlayıcı)
+            stream_url, stream_api_key: OpenAI uyumlu akış ucu ve anahtarı;
+                ikisi de verilmezse akışlı analiz sohbet yolunu kullanır
         """
-        
-        # Veriyi metin formatına çevir
+        self.api_key = api_key
+        self.cache = cache
+        self.chat_factory = chat_factory
+        self.stream_transport = stream_transport
+        self.stream_url = stream_url
+        self.stream_api_key = stream_api_key
+    
+    def build_text_data(self, exam_data: Dict) -> str:
+        """Deneme verisini LLM'e gidecek sabit metin formatına çevirir"""
         text_data = f"Deneme Adı: {exam_data.get('exam_name', '')}\n"
         text_data += f"Deneme Türü: {exam_data.get('exam_type', 'TYT')}\n\n"
         text_data += "DERS BAZLI SONUÇLAR:\n"
@@ -47,41 +281,251 @@ class ExamAnalyzer:
                     text_data += f"    - {topic['name']}: {topic['total']} soru, "
                     text_data += f"{topic['correct']}D {topic['wrong']}Y {topic['blank']}B\n"
         
-        # AI chat oluştur
-        chat = LlmChat(
+        # Zayıf/güçlü konular yerelde hesaplanır, LLM sadece yorumlar
+        scores = score_topics(exam_topic_records(exam_data))
+        if scores["topics"]:
+            text_data += "\nÖN HESAPLANMIŞ KONU DURUMU:\n"
+            text_data += f"  Zayıf: {', '.join(scores['weak_topics']) or 'yok'}\n"
+            text_data += f"  Güçlü: {', '.join(scores['strong_topics']) or 'yok'}\n"
+        
+        return text_data
+    
+    def _new_chat(self, system_message: str):
+        session_id = f"exam-analysis-{datetime.now().timestamp()}"
+        if self.chat_factory is not None:
+            return self.chat_factory(session_id, system_message)
+        from emergentintegrations.llm.chat import LlmChat
+        return LlmChat(
             api_key=self.api_key,
-            session_id=f"exam-analysis-{datetime.now().timestamp()}",
-            system_message="""Sen bir TYT-AYT deneme sonuç analiz asistanısın. 
-            Verilen deneme sonuçlarını analiz et ve şunları yap:
-            
-            1. Zayıf konuları belirle (başarı oranı %60 altı veya 3+ yanlış)
-            2. Güçlü konuları belirle (başarı oranı %80 üstü)
-            3. Kısa ve öz çalışma önerileri sun (maksimum 5 madde)
-            4. Genel başarı değerlendirmesi yap
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(LLM_PROVIDER, LLM_MODEL)
+    
+    def _cache_key(self, text_data: str) -> str:
+        return cache_key(text_data, f"{LLM_PROVIDER}/{LLM_MODEL}", SYSTEM_MESSAGE)
+    
+    def _cached_result(self, text_data: str) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._cache_key(text_data))
+        if cached is None:
+            return None
+        return {
+            "success": True,
+            "ai_analysis": cached,
+            "raw_input": text_data,
+            "cached": True
+        }
+    
+    def _success_result(self, text_data: str, ai_analysis: str) -> Dict:
+        # Boş yanıt önbelleğe yazılmaz; yoksa aynı deneme hep boş analiz alırdı
+        if self.cache is not None and ai_analysis:
+            self.cache.set(self._cache_key(text_data), ai_analysis)
+        return {
+            "success": True,
+            "ai_analysis": ai_analysis,
+            "raw_input": text_data,
+            "cached": False
+        }
+    
+    @staticmethod
+    def _failure_result(error: str) -> Dict:
+        return {
+            "success": False,
+            "error": error,
+            "ai_analysis": "AI analizi yapılamadı."
+        }
+    
+    async def analyze_exam_text(self, exam_data: Dict) -> Dict:
+        """
+        Manuel girilen deneme verilerini AI ile analiz eder
+        
+        Args:
+            exam_data: {
+                "exam_name": str,
+                "exam_type": "TYT" | "AYT",
+                "subjects": [{name, total, correct, wrong, blank, topics: [...]}]
+            }
             
-            KISA VE ÖZ YANIT VER. Maksimum 200 kelime.
-            JSON formatında yanıt verme, düz metin olarak yaz."""
-        ).with_model("openai", "gpt-4o-mini")
+        Returns:
+            AI analiz sonuçları
+        """
+        
+        # Veriyi metin formatına çevir
+        text_data = self.build_text_data(exam_data)
         
+        # Aynı veri + model + sistem mesajı daha önce analiz edildiyse LLM'e gitme
+        cached = self._cached_result(text_data)
+        if cached is not None:
+            return cached
+        
+        return await self._analyze_text(text_data)
+    
+    def _message(self, text: str) -> "UserMessage | TextMessage":
+        if self.chat_factory is not None:
+            return TextMessage(text)
+        from emergentintegrations.llm.chat import UserMessage
+        return UserMessage(text=text)
+    
+    @staticmethod
+    def _user_text(text_data: str) -> str:
+        return f"Bu deneme sonuçlarını analiz et:\n\n{text_data}"
+    
+    def _user_message(self, text_data: str) -> "UserMessage | TextMessage":
+        return self._message(self._user_text(text_data))
+    
+    async def _analyze_text(self, text_data: str) -> Dict:
         try:
-            user_message = UserMessage(
-                text=f"Bu deneme sonuçlarını analiz et:\n\n{text_data}"
-            )
-            
-            response = await chat.send_message(user_message)
+            # AI chat oluştur
+            chat = self._new_chat(SYSTEM_MESSAGE)
+            with llm_span("analyze"):
+                response = await chat.send_message(self._user_message(text_data))
+            return self._success_result(text_data, response.strip())
             
-            return {
-                "success": True,
-                "ai_analysis": response.strip(),
-                "raw_input": text_data
-            }
+        except Exception as e:
+            return self._failure_result(str(e))
+    
+    async def stream_exam_text(self, exam_data: Dict) -> AsyncIterator[str]:
+        """
+        analyze_exam_text'in akış hali: yanıt metnini parça parça, geldikçe verir
+        
+        Önbellekte varsa tüm metin tek parça döner. Akış ucu ve anahtarı
+        ayarlıysa sağlayıcıdan akıtılır; değilse sohbetin stream_message'ı
+        (yoksa tek parça send_message) kullanılır. Hata durumunda başarısız
+        sonuç yerine exception yükseltir; akış tamamlanınca birleşmiş metin
+        (boş değilse) önbelleğe yazılır.
+        """
+        text_data = self.build_text_data(exam_data)
+        
+        cached = self._cached_result(text_data)
+        if cached is not None:
+            yield cached["ai_analysis"]
+            return
+        
+        parts = []
+        if self.stream_url and self.stream_api_key:
+            chunks = self._provider_stream(SYSTEM_MESSAGE, self._user_text(text_data))
+        else:
+            chat = self._new_chat(SYSTEM_MESSAGE)
+            stream_message = getattr(chat, "stream_message", None)
+            if stream_message is None:
+                with llm_span("analyze"):
+                    parts.append(await chat.send_message(self._user_message(text_data)))
+                yield parts[0]
+                chunks = None
+            else:
+                chunks = stream_message(self._user_message(text_data))
+        
+        if chunks is not None:
+            # Süre ilk parçadan son parçaya kadar (istemcinin okuma hızı dahil)
+            with llm_span("stream"):
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    yield chunk
+        
+        self._success_result(text_data, "".join(parts).strip())
+    
+    async def _provider_stream(self, system_message: str, text: str) -> AsyncIterator[str]:
+        """OpenAI uyumlu stream=True yanıtının SSE "data:" satırlarındaki içerik parçaları"""
+        async with httpx.AsyncClient(
+            base_url=self.stream_url,
+            timeout=httpx.Timeout(LLM_STREAM_TIMEOUT),
+            transport=self.stream_transport
+        ) as client:
+            async with client.stream(
+                "POST",
+                "/chat/completions",
+                headers={"Authorization": f"Bearer {self.stream_api_key}"},
+                json={
+                    "model": LLM_MODEL,
+                    "stream": True,
+                    "messages": [
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": text}
+                    ]
+                }
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise RuntimeError(f"LLM akışı başarısız ({response.status_code}): {response.text[:200]}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        return
+                    choices = json.loads(data).get("choices") or []
+                    content = choices[0].get("delta", {}).get("content") if choices else None
+                    if content:
+                        yield content
+    
+    async def analyze_exam_batch(
+        self,
+        exams: List[Dict],
+        batch_size: int = ANALYSIS_BATCH_SIZE,
+        concurrency: int = ANALYSIS_BATCH_CONCURRENCY
+    ) -> List[Dict]:
+        """
+        Birden fazla denemeyi az sayıda LLM çağrısıyla analiz eder
+        
+        Önbellekte olmayan denemeler batch_size'lık gruplar halinde tek
+        mesajda gönderilir, en fazla concurrency grup aynı anda çalışır.
+        Yanıtta bölümü eksik/bozuk olan denemeler başarısız döner; diğerleri
+        etkilenmez.
+        
+        Args:
+            exams: analyze_exam_text ile aynı formatta deneme verileri
             
+        Returns:
+            exams ile aynı sırada analyze_exam_text formatında sonuçlar
+        """
+        results: List[Optional[Dict]] = [None] * len(exams)
+        pending: List[Tuple[int, str]] = []
+        
+        for index, exam_data in enumerate(exams):
+            text_data = self.build_text_data(exam_data)
+            cached = self._cached_result(text_data)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, text_data))
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run_group(group: List[Tuple[int, str]]):
+            async with semaphore:
+                await self._analyze_group(group, results)
+        
+        size = max(1, batch_size)
+        await asyncio.gather(*(run_group(pending[i:i + size]) for i in range(0, len(pending), size)))
+        return results
+    
+    async def _analyze_group(self, group: List[Tuple[int, str]], results: List[Optional[Dict]]):
+        if len(group) == 1:
+            index, text_data = group[0]
+            results[index] = await self._analyze_text(text_data)
+            return
+        
+        blocks = "\n\n".join(
+            f"### DENEME {number}\n{text_data}" for number, (_, text_data) in enumerate(group, start=1)
+        )
+        
+        try:
+            chat = self._new_chat(BATCH_SYSTEM_MESSAGE)
+            message = self._message(f"Bu {len(group)} denemenin sonuçlarını ayrı ayrı analiz et:\n\n{blocks}")
+            with llm_span("batch"):
+                response = await chat.send_message(message)
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "ai_analysis": "AI analizi yapılamadı."
-            }
+            for index, _ in group:
+                results[index] = self._failure_result(str(e))
+            return
+        
+        sections = split_batch_response(response, len(group))
+        for position, (index, text_data) in enumerate(group):
+            if position in sections:
+                results[index] = self._success_result(text_data, sections[position])
+            else:
+                results[index] = self._failure_result("Toplu yanıtta bu denemenin analizi bulunamadı")
     
     def calculate_net_from_manual(self, subject_data: List[Dict]) -> Dict:
         """
@@ -121,7 +565,7 @@ class ExamAnalyzer:
     
     def identify_weak_topics(self, topic_breakdown: List[Dict]) -> List[str]:
         """
-        Zayıf konuları tespit eder
+        Zayıf konuları tespit eder (score_topics eşikleriyle)
         
         Args:
             topic_breakdown: [{subject, topic, correct, wrong, blank}]
@@ -129,21 +573,17 @@ class ExamAnalyzer:
         Returns:
             Zayıf konu listesi
         """
-        weak_topics = []
-        
-        for topic in topic_breakdown:
-            correct = topic.get("correct", 0)
-            wrong = topic.get("wrong", 0)
-            total = correct + wrong + topic.get("blank", 0)
-            
-            if total > 0:
-                accuracy = (correct / total) * 100
-                
-                # Başarı %50'nin altındaysa veya 3'ten fazla yanlış varsa zayıf konu
-                if accuracy < 50 or wrong > 3:
-                    weak_topics.append(f"{topic.get('subject', '')} - {topic.get('topic', '')}")
-        
-        return weak_topics
+        records = [
+            {
+                "subject": topic.get("subject", ""),
+                "topic": topic.get("topic", ""),
+                "total": topic.get("correct", 0) + topic.get("wrong", 0) + topic.get("blank", 0),
+                "correct": topic.get("correct", 0),
+                "wrong": topic.get("wrong", 0)
+            }
+            for topic in topic_breakdown
+        ]
+        return score_topics(records)["weak_topics"]
     
     def generate_recommendations(self, weak_topics: List[str], subject_stats: List[Dict]) -> str:
         """
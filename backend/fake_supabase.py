@@ -0,0 +1,468 @@
+"""
+Bellek İçi Supabase (PostgREST) Taklidi
+Benchmark ve testlerde canlı Supabase projesi olmadan endpoint çalıştırmak için.
+AsyncDatabase'in kendisi kullanılır; sadece HTTP katmanı (httpx.MockTransport)
+bellekteki tablolara yönlendirilir. Böylece sorgu zinciri, sayfalama ve
+eşzamanlılık gerçekteki gibi çalışır ve her istek bir round-trip olarak sayılır.
+
+Desteklenen PostgREST alt kümesi (server.py'nin kullandığı kadarı):
+select (kolon listesi, count=exact, HEAD), eq/neq/gt/gte/lt/lte/in/is/like/ilike,
+or=(...) ve and(...) iç içe, order (asc/desc, nullsfirst/nullslast),
+limit/offset + max-rows, insert/upsert (on_conflict), update, delete ve
+migrations/ altındaki RPC'ler.
+"""
+import asyncio
+import fnmatch
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from db import AsyncDatabase, DB_PAGE_SIZE
+
+FAKE_URL = "https://fake.supabase.local"
+
+# Tek kolonlu "id" birincil anahtarı dışındaki tekillikler
+# (bkz. migrations/002 ve 004)
+UNIQUE_KEYS = {
+    "topics": ("student_id", "ders", "konu"),
+    "soru_takip_daily": ("student_id", "date", "lesson"),
+}
+# id kolonu olmayan tablolar
+NO_ID_TABLES = {"soru_takip_daily"}
+
+# eq filtresi gelen bu kolonlar için hash indeks kullanılır (tam tarama yerine)
+INDEXED_COLUMNS = ("id", "student_id", "user_id", "upload_id")
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class FakeError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_top(text: str) -> List[str]:
+    """Virgülle ayır; parantez ve tırnak içindeki virgüller hariç"""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\" and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _coerce(value: str, sample: Any) -> Any:
+    """Filtre değerini (metin) satırdaki değerin tipine çevirir"""
+    if isinstance(sample, bool):
+        return value.lower() == "true"
+    if isinstance(sample, (int, float)):
+        return float(value)
+    return value
+
+
+def _compare(actual: Any, op: str, raw: str) -> bool:
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}[raw.lower()]
+        return actual is expected
+    if actual is None:
+        return False
+    if op == "in":
+        items = [_unquote(item) for item in _split_top(raw.strip()[1:-1])]
+        return any(actual == _coerce(item, actual) for item in items)
+    if op in ("like", "ilike"):
+        pattern = raw.replace("%", "*")
+        if op == "ilike":
+            return fnmatch.fnmatchcase(str(actual).lower(), pattern.lower())
+        return fnmatch.fnmatchcase(str(actual), pattern)
+
+    expected = _coerce(raw, actual)
+    if op == "eq":
+        return actual == expected
+    if op == "neq":
+        return actual != expected
+    if op == "gt":
+        return actual > expected
+    if op == "gte":
+        return actual >= expected
+    if op == "lt":
+        return actual < expected
+    if op == "lte":
+        return actual <= expected
+    raise FakeError(400, "PGRST100", f"Desteklenmeyen operatör: {op}")
+
+
+def _condition(column: str, expression: str) -> Callable[[Dict], bool]:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+    raw = _unquote(raw)
+    if negate:
+        return lambda row: not _compare(row.get(column), op, raw)
+    return lambda row: _compare(row.get(column), op, raw)
+
+
+def _logic(name: str, inner: str) -> Callable[[Dict], bool]:
+    """or=(a.eq.1,and(b.lt.2,c.gt.3)) gibi ifadeleri yüklem fonksiyonuna çevirir"""
+    predicates = []
+    for part in _split_top(inner):
+        if part.startswith(("and(", "or(")):
+            nested, _, rest = part.partition("(")
+            predicates.append(_logic(nested, rest[:-1]))
+        else:
+            column, _, expression = part.partition(".")
+            predicates.append(_condition(column, expression))
+    combine = any if name == "or" else all
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _sort(rows: List[Dict], order: str) -> List[Dict]:
+    for spec in reversed(order.split(",")):
+        column, *modifiers = spec.split(".")
+        desc = "desc" in modifiers
+        # Postgres varsayılanı: artanda NULL sonda, azalanda başta
+        nulls_first = "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+
+        def key(row, column=column, flip=nulls_first != desc):
+            value = row.get(column)
+            return ((value is None) != flip, "" if value is None else value)
+
+        rows.sort(key=key, reverse=desc)
+    return rows
+
+
+class FakeSupabase:
+    """
+    fake = FakeSupabase()
+    fake.load({"students": [...], "soru_takip": [...]})
+    server.supabase = fake.client()
+    ...
+    fake.calls  # [(method, "students"), ...]
+    """
+
+    def __init__(self, latency: float = 0.0, max_rows: int = DB_PAGE_SIZE):
+        self.tables: Dict[str, List[Dict]] = {}
+        self._indexes: Dict[str, Dict[Tuple[str, ...], Dict[tuple, List[Dict]]]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self.latency = latency
+        self.max_rows = max_rows
+        self.triggers: Dict[str, Callable[[Optional[Dict], Optional[Dict]], None]] = {
+            "soru_takip": self._soru_takip_rollup
+        }
+        self.rpcs: Dict[str, Callable[..., Any]] = {
+            "student_activity_summary": self._rpc_student_activity_summary,
+            "delete_student": self._rpc_delete_student,
+            "onboard_students": self._rpc_onboard_students,
+        }
+
+    # --- Kurulum -----------------------------------------------------------
+
+    def client(self) -> AsyncDatabase:
+        return AsyncDatabase(FAKE_URL, "fake-key", transport=httpx.MockTransport(self.handle))
+
+    def load(self, tables: Dict[str, Iterable[Dict]]):
+        """Tabloları doldurur (trigger'lar çalışır, round-trip sayılmaz)"""
+        for table, rows in tables.items():
+            self.insert(table, [dict(row) for row in rows])
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    def call_counts(self) -> Counter:
+        return Counter(name for _, name in self.calls)
+
+    # --- Tablo işlemleri ---------------------------------------------------
+
+    def rows(self, table: str) -> List[Dict]:
+        return self.tables.setdefault(table, [])
+
+    def _with_defaults(self, table: str, row: Dict) -> Dict:
+        if table not in NO_ID_TABLES:
+            row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        return row
+
+    def _index(self, table: str, columns: Tuple[str, ...]) -> Dict[tuple, List[Dict]]:
+        indexes = self._indexes.setdefault(table, {})
+        if columns not in indexes:
+            index: Dict[tuple, List[Dict]] = {}
+            for row in self.rows(table):
+                index.setdefault(tuple(row.get(column) for column in columns), []).append(row)
+            indexes[columns] = index
+        return indexes[columns]
+
+    def _append(self, table: str, row: Dict):
+        self.rows(table).append(row)
+        for columns, index in self._indexes.get(table, {}).items():
+            index.setdefault(tuple(row.get(column) for column in columns), []).append(row)
+
+    def _find_conflict(self, table: str, row: Dict, columns: Tuple[str, ...]) -> Optional[Dict]:
+        matches = self._index(table, columns).get(tuple(row.get(column) for column in columns))
+        return matches[0] if matches else None
+
+    def _candidates(self, table: str, params: List[Tuple[str, str]]) -> List[Dict]:
+        for key, value in params:
+            if key in INDEXED_COLUMNS and value.startswith("eq."):
+                return self._index(table, (key,)).get((_unquote(value[3:]),), [])
+        return self.rows(table)
+
+    def insert(self, table: str, records: List[Dict], on_conflict: Optional[Tuple[str, ...]] = None,
+               resolution: Optional[str] = None) -> List[Dict]:
+        stored = []
+        for record in records:
+            row = self._with_defaults(table, dict(record))
+            keys = [("id",)] if table not in NO_ID_TABLES else []
+            if table in UNIQUE_KEYS:
+                keys.append(UNIQUE_KEYS[table])
+            conflict = None
+            for columns in ([on_conflict] if on_conflict else keys):
+                conflict = self._find_conflict(table, row, columns)
+                if conflict is not None:
+                    break
+
+            if conflict is not None:
+                if resolution == "ignore":
+                    continue
+                if resolution == "merge":
+                    old = dict(conflict)
+                    conflict.update(record)
+                    self._indexes.pop(table, None)
+                    self._trigger(table, old, conflict)
+                    stored.append(dict(conflict))
+                    continue
+                raise FakeError(409, "23505", f"{table}: tekillik ihlali")
+
+            self._append(table, row)
+            self._trigger(table, None, row)
+            stored.append(dict(row))
+        return stored
+
+    def update(self, table: str, predicate: Callable[[Dict], bool], values: Dict,
+               params: List[Tuple[str, str]] = ()) -> List[Dict]:
+        updated = []
+        for row in list(self._candidates(table, params)):
+            if predicate(row):
+                old = dict(row)
+                row.update(values)
+                self._trigger(table, old, row)
+                updated.append(dict(row))
+        if updated:
+            self._indexes.pop(table, None)
+        return updated
+
+    def delete(self, table: str, predicate: Callable[[Dict], bool]) -> List[Dict]:
+        kept, deleted = [], []
+        for row in self.rows(table):
+            (deleted if predicate(row) else kept).append(row)
+        self.tables[table] = kept
+        if deleted:
+            self._indexes.pop(table, None)
+        for row in deleted:
+            self._trigger(table, row, None)
+        return deleted
+
+    def _trigger(self, table: str, old: Optional[Dict], new: Optional[Dict]):
+        trigger = self.triggers.get(table)
+        if trigger is not None:
+            trigger(old, new)
+
+    def _soru_takip_rollup(self, old: Optional[Dict], new: Optional[Dict]):
+        """migrations/002 trigger'ının karşılığı: soru_takip_daily'ye delta uygula"""
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None:
+                continue
+            key = {"student_id": row["student_id"], "date": row["date"], "lesson": row["lesson"]}
+            daily = self._find_conflict("soru_takip_daily", key, UNIQUE_KEYS["soru_takip_daily"])
+            if daily is None:
+                daily = {**key, "solved": 0, "correct": 0, "wrong": 0, "blank": 0, "entries": 0}
+                self._append("soru_takip_daily", daily)
+            for column in ("solved", "correct", "wrong", "blank"):
+                daily[column] += sign * (row.get(column) or 0)
+            daily["entries"] += sign
+            daily["updated_at"] = _now()
+
+    # --- HTTP --------------------------------------------------------------
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = request.url.path.split("/rest/v1/", 1)[-1]
+        self.calls.append((request.method, path))
+        try:
+            if path.startswith("rpc/"):
+                return self._handle_rpc(path[4:], request)
+            return self._handle_table(path, request)
+        except FakeError as e:
+            return httpx.Response(e.status, json={"code": e.code, "message": str(e), "details": None, "hint": None})
+
+    def _predicate(self, params: List[Tuple[str, str]]) -> Callable[[Dict], bool]:
+        predicates = []
+        for key, value in params:
+            if key in RESERVED_PARAMS:
+                continue
+            if key in ("or", "and"):
+                predicates.append(_logic(key, value[1:-1]))
+            else:
+                predicates.append(_condition(key, value))
+        return lambda row: all(predicate(row) for predicate in predicates)
+
+    def _handle_table(self, table: str, request: httpx.Request) -> httpx.Response:
+        params = list(request.url.params.multi_items())
+        options = dict(params)
+        prefer = request.headers.get("prefer", "")
+        predicate = self._predicate(params)
+
+        if request.method in ("GET", "HEAD"):
+            rows = [row for row in self._candidates(table, params) if predicate(row)]
+            total = len(rows)
+            if "order" in options:
+                rows = _sort(rows, options["order"])
+            offset = int(options.get("offset", 0))
+            limit = min(int(options.get("limit", self.max_rows)), self.max_rows)
+            rows = rows[offset:offset + limit]
+
+            select = options.get("select", "*")
+            if select != "*":
+                columns = [column.strip() for column in select.split(",")]
+                rows = [{column: row.get(column) for column in columns} for row in rows]
+
+            headers = {}
+            if "count=" in prefer:
+                span = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+                headers["content-range"] = f"{span}/{total}"
+            if request.method == "HEAD":
+                return httpx.Response(200, headers=headers)
+            return httpx.Response(200, content=json.dumps(rows, default=str).encode(), headers=headers)
+
+        if request.method == "POST":
+            body = json.loads(request.content or b"[]")
+            records = body if isinstance(body, list) else [body]
+            resolution = None
+            if "resolution=ignore-duplicates" in prefer:
+                resolution = "ignore"
+            elif "resolution=merge-duplicates" in prefer:
+                resolution = "merge"
+            on_conflict = tuple(options["on_conflict"].split(",")) if options.get("on_conflict") else None
+            result = self.insert(table, records, on_conflict, resolution)
+            return self._written(201, result, prefer)
+
+        if request.method == "PATCH":
+            result = self.update(table, predicate, json.loads(request.content), params)
+            return self._written(200, result, prefer)
+
+        if request.method == "DELETE":
+            result = self.delete(table, predicate)
+            return self._written(200, result, prefer)
+
+        raise FakeError(405, "PGRST000", f"Desteklenmeyen metod: {request.method}")
+
+    @staticmethod
+    def _written(status: int, rows: List[Dict], prefer: str) -> httpx.Response:
+        if "return=minimal" in prefer:
+            return httpx.Response(status if status != 200 else 204)
+        return httpx.Response(status, content=json.dumps(rows, default=str).encode())
+
+    def _handle_rpc(self, name: str, request: httpx.Request) -> httpx.Response:
+        function = self.rpcs.get(name)
+        if function is None:
+            raise FakeError(404, "PGRST202", f"Fonksiyon bulunamadı: {name}")
+        params = json.loads(request.content) if request.content else dict(request.url.params)
+        result = function(**params)
+        return httpx.Response(200, content=json.dumps(result, default=str).encode())
+
+    # --- RPC'ler (migrations/ altındaki SQL fonksiyonlarının karşılıkları) ----
+
+    def _rpc_student_activity_summary(self, since: Optional[str] = None) -> List[Dict]:
+        totals: Dict[str, Dict] = {}
+        for row in self.rows("soru_takip"):
+            if since and row["date"] < since:
+                continue
+            stats = totals.setdefault(row["student_id"], {
+                "student_id": row["student_id"], "total_solved": 0, "total_correct": 0, "last_activity": None
+            })
+            stats["total_solved"] += row.get("solved") or 0
+            stats["total_correct"] += row.get("correct") or 0
+            if stats["last_activity"] is None or row["date"] > stats["last_activity"]:
+                stats["last_activity"] = row["date"]
+        return list(totals.values())
+
+    def _rpc_delete_student(self, p_student_id: str) -> Dict[str, int]:
+        matches = lambda row: row.get("student_id") == p_student_id
+        counts = {}
+        for table in (
+            "topics", "tasks", "exams", "calendar_notes", "exam_analysis", "exam_uploads",
+            "topic_progress", "brans_tarama", "task_pool",
+            "soru_takip", "soru_takip_daily", "students_sources", "weekly_plan"
+        ):
+            counts[table] = len(self.delete(table, matches))
+        counts["notifications"] = len(self.delete("notifications", lambda row: row.get("user_id") == p_student_id))
+        counts["students"] = len(self.delete("students", lambda row: row.get("id") == p_student_id))
+        return counts
+
+    def _rpc_onboard_students(self, p_students: List[Dict], p_templates: Dict[str, List[Dict]]) -> List[Dict]:
+        result = []
+        for student in p_students:
+            student_id = student.get("id") or str(uuid.uuid4())
+            profile_fields = {k: student.get(k) for k in ("ad", "soyad", "bolum", "hedef", "notlar")}
+            # ON CONFLICT (id) DO UPDATE: profil alanları güncellenir, token kalır
+            if not self.insert("students", [{"id": student_id, **profile_fields, "token": student.get("token")}],
+                               resolution="ignore"):
+                self.update("students", lambda row: row["id"] == student_id, profile_fields)
+
+            topics = [
+                {"student_id": student_id, "durum": "baslanmadi", **template}
+                for template in p_templates.get(student.get("template"), [])
+            ]
+            created = self.insert("topics", topics, UNIQUE_KEYS["topics"], resolution="ignore")
+
+            onboarded = False
+            profile = student.get("onboarding")
+            record = next(row for row in self.rows("students") if row["id"] == student_id)
+            if isinstance(profile, dict) and not record.get("onboarding_completed"):
+                record.update(profile, onboarding_completed=True)
+                onboarded = True
+                self.insert("notifications", [{
+                    "user_id": student_id, "type": "success", "title": "Hoş Geldin!",
+                    "message": "Profilin tamamlandı. Artık kişiselleştirilmiş çalışma planına erişebilirsin.",
+                    "is_read": False
+                }])
+
+            result.append({
+                **{k: record.get(k) for k in ("id", "ad", "soyad", "bolum", "hedef", "notlar", "token", "onboarding_completed")},
+                "topics_created": len(created),
+                "onboarded": onboarded
+            })
+        return result
@@ -0,0 +1,301 @@
+"""
+İstek Ölçümleri
+Her HTTP isteği için Supabase çağrı sayısı/süresi, LLM süresi, Python'da
+geçen süre ve yanıt boyutu toplanır; route bazlı Prometheus histogramları
+olarak /metrics'ten (METRICS_TOKEN ayarlıysa) okunur ve yanıta
+Server-Timing header'ı eklenir.
+
+İstek bağlamı contextvar ile taşınır: RequestTaskGroup'un başlattığı
+görevler de aynı isteğin sayaçlarına yazar. İstek dışı işler (analiz
+kuyruğu) sadece genel Supabase/LLM histogramlarına düşer.
+
+Route'lar @query_budget(n) ile veri boyutundan bağımsız en fazla kaç
+Supabase çağrısı yapacaklarını bildirir. Veri boyutuyla artması beklenen
+devam çağrıları (fetch_all'un sonraki sayfaları, toplu insert parçaları)
+allow_extra_calls() ile o isteğin bütçesine açıkça eklenir. Aşım normalde sadece loglanır;
+QUERY_BUDGET_ENFORCE=1 (testler) iken bütçeyi aşan çağrı yapılmadan
+QueryBudgetExceeded yükseltilir.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+from starlette.datastructures import MutableHeaders
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+INF_LABEL = 'le="+Inf"'
+
+QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', '') == '1'
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(calls: int):
+    """Route başına Supabase çağrı bütçesi; @api_router.get(...) altına yazılır"""
+    def decorate(endpoint):
+        endpoint.query_budget = calls
+        return endpoint
+    return decorate
+
+
+class RequestStats:
+    """Tek isteğin sayaçları; eşzamanlı Supabase çağrılarında duvar saati süresi tutulur"""
+
+    def __init__(self, scope: Optional[Dict] = None):
+        self.scope = scope or {}
+        self.started = time.perf_counter()
+        self.db_calls = 0
+        self.db_bytes = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.extra_calls = 0
+        self._db_active = 0
+        self._db_since = 0.0
+
+    def budget(self) -> Optional[int]:
+        # endpoint, routing sonrası scope'a yazılır
+        budget = getattr(self.scope.get("endpoint"), "query_budget", None)
+        return None if budget is None else budget + self.extra_calls
+
+    def db_begin(self):
+        budget = self.budget()
+        if QUERY_BUDGET_ENFORCE and budget is not None and self.db_calls + self._db_active >= budget:
+            raise QueryBudgetExceeded(
+                f"{self.scope.get('method')} {self.scope.get('path')}: bütçe {budget} Supabase çağrısı"
+            )
+        if self._db_active == 0:
+            self._db_since = time.perf_counter()
+        self._db_active += 1
+
+    def db_end(self, size: int):
+        self.db_calls += 1
+        self.db_bytes += size
+        self._db_active -= 1
+        if self._db_active == 0:
+            self.db_seconds += time.perf_counter() - self._db_since
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def python_seconds(self) -> float:
+        return max(0.0, self.elapsed() - self.db_seconds - self.llm_seconds)
+
+    def server_timing(self) -> str:
+        return ", ".join((
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_calls} istek"',
+            f"llm;dur={self.llm_seconds * 1000:.1f}",
+            f"app;dur={self.python_seconds() * 1000:.1f}",
+            f"total;dur={self.elapsed() * 1000:.1f}",
+        ))
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def allow_extra_calls(calls: int = 1):
+    """Veri boyutuna bağlı devam çağrılarını (sayfa/parça) isteğin bütçesine ekle"""
+    stats = _current.get()
+    if stats is not None:
+        stats.extra_calls += calls
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # etiket değerleri -> [kova sayaçları..., toplam, adet]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            pairs = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_labels(pairs + [le])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(pairs + [INF_LABEL])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {series[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: List[Histogram] = []
+        # (ad, açıklama, [(etiketler, değer)] döndüren fonksiyon)
+        self.gauges: List[Tuple[str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float], labels: Tuple[str, ...] = ()) -> Histogram:
+        histogram = Histogram(name, documentation, buckets, labels)
+        self.histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        """Değeri /metrics okunurken collect() ile hesaplanan gauge"""
+        self.gauges.append((name, documentation, collect))
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for name, documentation, collect in self.gauges:
+            lines.extend((f"# HELP {name} {documentation}", f"# TYPE {name} gauge"))
+            for labels, value in collect():
+                pairs = [f'{label}="{_escape(str(v))}"' for label, v in labels.items()]
+                lines.append(f"{name}{_labels(pairs)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP istek süresi", TIME_BUCKETS, ("route", "method", "status"))
+REQUEST_DB_CALLS = REGISTRY.histogram(
+    "http_request_db_calls", "İstek başına Supabase round-trip sayısı", COUNT_BUCKETS, ("route",))
+REQUEST_DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_seconds", "İstek başına Supabase beklemesi (duvar saati)", TIME_BUCKETS, ("route",))
+REQUEST_DB_BYTES = REGISTRY.histogram(
+    "http_request_db_bytes", "İstek başına Supabase'den okunan bayt", SIZE_BUCKETS, ("route",))
+REQUEST_LLM_SECONDS = REGISTRY.histogram(
+    "http_request_llm_seconds", "İstek başına LLM beklemesi", TIME_BUCKETS, ("route",))
+REQUEST_PYTHON_SECONDS = REGISTRY.histogram(
+    "http_request_python_seconds", "İstek başına Python'da geçen süre (toplam - db - llm)", TIME_BUCKETS, ("route",))
+RESPONSE_BYTES = REGISTRY.histogram(
+    "http_response_bytes", "Yanıt gövdesi boyutu", SIZE_BUCKETS, ("route",))
+DB_REQUEST_SECONDS = REGISTRY.histogram(
+    "supabase_request_duration_seconds", "Tek Supabase isteğinin süresi", TIME_BUCKETS, ("table", "method"))
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Tek LLM çağrısının süresi", TIME_BUCKETS, ("operation",))
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Supabase isteklerini sayar ve süreler (gövde okuması dahil)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = _current.get()
+        if stats is not None:
+            stats.db_begin()
+        started = time.perf_counter()
+        size = 0
+        try:
+            response = await self.transport.handle_async_request(request)
+            size = len(await response.aread())
+            return response
+        finally:
+            DB_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                table=request.url.path.split("/rest/v1/", 1)[-1], method=request.method
+            )
+            if stats is not None:
+                stats.db_end(size)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+@contextmanager
+def llm_span(operation: str):
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_REQUEST_SECONDS.observe(elapsed, operation=operation)
+        if stats is not None:
+            stats.llm_calls += 1
+            stats.llm_seconds += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware (SSE akışlarını tamponlamaz). Route etiketi eşleşen
+    route'un şablonudur (/api/tasks/{student_id}); eşleşmeyen istekler
+    "unmatched" olarak sayılır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._paths: Optional[Dict] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._paths is None or endpoint not in self._paths:
+            self._paths = {getattr(route, "endpoint", None): route.path for route in scope["app"].routes}
+        return self._paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+        size = 0
+
+        async def send_with_timing(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = self._route(scope)
+            REQUEST_SECONDS.observe(stats.elapsed(), route=route, method=scope["method"], status=status)
+            REQUEST_DB_CALLS.observe(stats.db_calls, route=route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route=route)
+            REQUEST_DB_BYTES.observe(stats.db_bytes, route=route)
+            REQUEST_LLM_SECONDS.observe(stats.llm_seconds, route=route)
+            REQUEST_PYTHON_SECONDS.observe(stats.python_seconds(), route=route)
+            RESPONSE_BYTES.observe(size, route=route)
+            budget = stats.budget()
+            if budget is not None and stats.db_calls > budget:
+                logger.warning("Sorgu bütçesi aşıldı: %s %s %d çağrı (bütçe %d)", scope["method"], route, stats.db_calls, budget)
@@ -0,0 +1,86 @@
+"""
+Bildirim Sayacı ve Canlı Akış
+Okunmamış bildirim sayısını süreç içinde önbellekler, yeni bildirimleri
+aynı kullanıcının açık SSE bağlantılarına iletir. Böylece bildirim
+ekranlarının periyodik tam listeleme sorgusu gerekmez.
+
+Sayaç süreç içindedir: başka bir worker'ın yazdığı bildirim TTL dolana
+kadar görülmeyebilir, bu yüzden TTL kısa tutulur.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+NOTIFICATION_COUNT_TTL = float(os.environ.get('NOTIFICATION_COUNT_TTL', '30'))
+NOTIFICATION_HEARTBEAT_SECONDS = float(os.environ.get('NOTIFICATION_HEARTBEAT_SECONDS', '15'))
+# Yavaş istemcinin kuyruğu dolarsa eski olaylar atılır, sayaç yeniden okunur
+NOTIFICATION_QUEUE_SIZE = 100
+
+# Kuyruktaki bu olay "sayacı yeniden oku" anlamına gelir
+RECOUNT = None
+
+
+class NotificationHub:
+    def __init__(self, ttl_seconds: float = NOTIFICATION_COUNT_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def unread_count(self, user_id: str, load: Callable[[], Awaitable[int]]) -> int:
+        cached = self._counts.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl_seconds:
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        count = await load()
+        self._counts[user_id] = (count, time.monotonic())
+        return count
+
+    def invalidate(self, user_id: str):
+        """Sayacı düşür ve açık bağlantılara yeniden saymalarını söyle"""
+        self._counts.pop(user_id, None)
+        self._push(user_id, RECOUNT)
+
+    def publish(self, notifications: Iterable[Dict]):
+        """Yeni yazılmış bildirimleri sayaca işle ve kullanıcılarına ilet"""
+        for notification in notifications:
+            user_id = notification["user_id"]
+            cached = self._counts.get(user_id)
+            if cached is not None and not notification.get("is_read"):
+                self._counts[user_id] = (cached[0] + 1, cached[1])
+            self._push(user_id, notification)
+
+    def _push(self, user_id: str, event: Optional[Dict]):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                event_to_put = RECOUNT
+            else:
+                event_to_put = event
+            queue.put_nowait(event_to_put)
+
+    @contextmanager
+    def subscribe(self, user_id: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def stats(self) -> Dict:
+        return {
+            "cached_counts": len(self._counts),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,122 @@
+"""
+Keyset (Cursor) Sayfalama
+Liste endpoint'leri sıralama kolonları + id üzerinden sayfalanır. Gövde düz
+liste olarak kalır (frontend uyumu); bir sonraki sayfanın cursor'u
+X-Next-Cursor header'ında döner. Aynı sayfa tekrar istendiğinde
+If-None-Match ile gövdesiz 304 döner.
+
+Sıralama kolonları NULL olabilir (örn. order_index); Postgres varsayılanı
+gibi artan sırada NULL'lar sonda, azalan sırada başta kabul edilir. Son
+anahtar (id) NULL olmamalıdır.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Request, Response
+
+from db import DB_PAGE_SIZE
+
+# Tek sayfada dönebilecek en fazla satır (Supabase max-rows ile aynı)
+PAGE_SIZE_MAX = DB_PAGE_SIZE
+
+# (kolon, azalan_mı); son anahtar her zaman tekil olmalı (id)
+SortKey = Tuple[str, bool]
+
+
+def encode_cursor(row: Dict, keys: Sequence[SortKey]) -> str:
+    values = [row[column] for column, _ in keys]
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+    return values
+
+
+def _quote(value: Any) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _equal(column: str, value: Any) -> str:
+    return f"{column}.is.null" if value is None else f"{column}.eq.{_quote(value)}"
+
+
+def _after(column: str, desc: bool, value: Any, nullable: bool = True) -> Optional[str]:
+    """Sırada value'dan sonra gelen değerler; None = bu kolonda sonrası yok"""
+    if value is None:
+        # NULL'lar artan sırada en sonda, azalan sırada en başta
+        return f"{column}.not.is.null" if desc else None
+    if desc or not nullable:
+        return f"{column}.{'lt' if desc else 'gt'}.{_quote(value)}"
+    return f"or({column}.gt.{_quote(value)},{column}.is.null)"
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]) -> str:
+    """
+    (a, b, id) satır karşılaştırmasını PostgREST or=(...) ifadesine çevirir:
+    a.lt.x, and(a.eq.x, b.lt.y), and(a.eq.x, b.eq.y, id.lt.z)
+    NULL değerler is.null / not.is.null ile karşılaştırılır.
+    """
+    clauses = []
+    for i, (column, desc) in enumerate(keys):
+        after = _after(column, desc, values[i], nullable=i < len(keys) - 1)
+        if after is None:
+            continue
+        parts = [_equal(prev, value) for (prev, _), value in zip(keys[:i], values[:i])]
+        parts.append(after)
+        clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return ",".join(clauses)
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, PAGE_SIZE_MAX))
+
+
+async def fetch_page(query, keys: Sequence[SortKey], limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Filtrelenmiş bir select sorgusundan tek sayfa çeker.
+    Dönen cursor sayfa dolduysa son satırın anahtarlarıdır, değilse None.
+    """
+    limit = clamp_limit(limit)
+    if cursor:
+        query = query.or_(keyset_filter(keys, decode_cursor(cursor, keys)))
+    for column, desc in keys:
+        query = query.order(column, desc=desc)
+
+    response = await query.limit(limit).execute()
+    rows = response.data
+    next_cursor = encode_cursor(rows[-1], keys) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+def etag_for(rows: Any) -> str:
+    digest = hashlib.blake2b(orjson.dumps(rows, option=orjson.OPT_SORT_KEYS, default=str), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def page_response(request: Request, response: Response, rows: List[Dict], next_cursor: Optional[str] = None):
+    """
+    Sayfayı ETag ve cursor header'larıyla döner. İstemcideki sürüm aynıysa
+    (If-None-Match) gövde gönderilmez, 304 döner.
+    """
+    headers = {"ETag": etag_for(rows), "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return rows
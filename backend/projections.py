@@ -0,0 +1,24 @@
+"""
+Sorgu Projeksiyonları
+Sıcak okuma yollarında select("*") yerine her endpoint'in ihtiyaç duyduğu kolonlar
+"""
+
+# Öğrenci
+STUDENT_SUMMARY = "id, ad, soyad, bolum"
+STUDENT_NAME = "ad, soyad"
+
+# Soru takip (soru_takip_daily)
+SORU_REPORT = "date, lesson, solved, correct, wrong, blank, entries"
+SORU_LESSON_TOTALS = "lesson, solved, correct, wrong, blank"
+SORU_WINDOW = "student_id, date, solved, correct"
+SORU_TOPIC_HISTORY = "date, lesson, solved, correct, wrong"
+
+# Görevler
+TASK_ACTIVITY = "tarih, sure, completed"
+TASK_STATUS = "completed"
+
+# Deneme analizi
+EXAM_ANALYSIS_LIST = "id, upload_id, student_id, total_net, subject_breakdown, weak_topics, recommendations, created_at"
+EXAM_UPLOAD_TRIGGER = "id, student_id, exam_name"
+EXAM_ANALYSIS_TRIGGER = "id, upload_id, ai_raw_response"
+EXAM_TOPIC_HISTORY = "topic_breakdown, created_at"
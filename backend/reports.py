@@ -0,0 +1,115 @@
+"""
+Rapor Motoru
+soru_takip satırlarını tek geçişte zaman pencerelerine ayıran yardımcılar
+(veritabanı erişimi yok, sadece saf hesaplama)
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+REPORT_FIELDS = ("solved", "correct", "wrong", "blank")
+
+
+def accuracy_rate(correct: int, solved: int) -> float:
+    """Başarı yüzdesi (1 ondalık), soru yoksa 0"""
+    return round((correct / solved * 100), 1) if solved > 0 else 0
+
+
+def _empty_totals() -> Dict:
+    return {field: 0 for field in REPORT_FIELDS}
+
+
+def bucket_report(rows: Iterable[Dict], start: date, end: date, bucket_days: int = 1) -> Dict:
+    """
+    Bir öğrencinin [start, end] aralığındaki günlük özet satırlarını tek geçişte
+    zaman kovalarına ve derslere ayırır
+
+    Kovalar bitiş gününe hizalıdır: son kova her zaman end ile biter, aralık
+    bucket_days'e tam bölünmüyorsa eksik kalan ilk kovadır.
+
+    Args:
+        rows: soru_takip_daily satırları [{date, lesson, solved, correct, wrong, blank, entries}]
+        start, end: Rapor aralığı (ikisi de dahil)
+        bucket_days: Kova uzunluğu (1 = gün, 7 = hafta)
+
+    Returns:
+        {start, end, bucket_days, totals, buckets: [...], lessons: {lesson: totals}}
+    """
+    n_days = (end - start).days + 1
+    n_buckets = -(-n_days // bucket_days)
+
+    buckets = []
+    for i in range(n_buckets):
+        bucket_end = end - timedelta(days=(n_buckets - 1 - i) * bucket_days)
+        bucket_start = max(start, bucket_end - timedelta(days=bucket_days - 1))
+        bucket = {"start": bucket_start.isoformat(), "end": bucket_end.isoformat(), "lessons": []}
+        bucket.update(_empty_totals())
+        buckets.append(bucket)
+
+    totals = _empty_totals()
+    lessons: Dict[str, Dict] = {}
+
+    for row in rows:
+        # Gün indeksi bitişten geriye sayılır (0 = end)
+        day_index = (end - date.fromisoformat(row["date"])).days
+        if day_index < 0 or day_index >= n_days:
+            continue
+
+        bucket = buckets[n_buckets - 1 - day_index // bucket_days]
+        lesson_totals = lessons.get(row["lesson"])
+        if lesson_totals is None:
+            lesson_totals = lessons[row["lesson"]] = _empty_totals()
+
+        for field in REPORT_FIELDS:
+            value = row[field]
+            bucket[field] += value
+            lesson_totals[field] += value
+            totals[field] += value
+        bucket["lessons"].extend([row["lesson"]] * row.get("entries", 1))
+
+    for item in (totals, *buckets, *lessons.values()):
+        item["accuracy"] = accuracy_rate(item["correct"], item["solved"])
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket_days": bucket_days,
+        "totals": totals,
+        "buckets": buckets,
+        "lessons": lessons
+    }
+
+
+def compare_windows(rows: Iterable[Dict], today: date, window_days: int = 7) -> Dict[str, Dict]:
+    """
+    Tüm öğrencilerin satırlarını tek geçişte mevcut ve önceki pencereye ayırır
+
+    Args:
+        rows: [{student_id, date, solved, correct}] (date >= today - 2 * window_days)
+        today: Referans gün
+        window_days: Pencere uzunluğu (7 -> bu hafta vs geçen hafta)
+
+    Returns:
+        {student_id: {"current": {solved, correct, entries}, "previous": {solved, correct}}}
+    """
+    # ISO tarihleri string olarak karşılaştırılabilir, parse etmeye gerek yok
+    boundary = (today - timedelta(days=window_days)).isoformat()
+
+    buckets: Dict[str, Dict] = {}
+    for row in rows:
+        student_buckets = buckets.get(row["student_id"])
+        if student_buckets is None:
+            student_buckets = {
+                "current": {"solved": 0, "correct": 0, "entries": 0},
+                "previous": {"solved": 0, "correct": 0}
+            }
+            buckets[row["student_id"]] = student_buckets
+
+        if row["date"] >= boundary:
+            bucket = student_buckets["current"]
+            bucket["entries"] += 1
+        else:
+            bucket = student_buckets["previous"]
+        bucket["solved"] += row["solved"]
+        bucket["correct"] += row["correct"]
+
+    return buckets
@@ -0,0 +1,155 @@
+"""
+Yanıt Modelleri
+Büyük liste ve koç paneli endpoint'lerinin response_model'leri. Tipli yanıt
+pydantic-core ile tek geçişte serileştirilir; modelsiz dict yanıtlar ise
+FastAPI'nin jsonable_encoder'ından satır satır geçer (200+ satırlık
+listelerde yanıt süresinin büyük kısmı).
+
+Tablo satırları extra="allow" ile tanımlıdır: select("*") ile gelen ve
+burada tanımlı olmayan kolonlar yanıttan düşmez. id dışındaki kolonlar
+Optional'dır: şemada NOT NULL olsa da eski/elle girilmiş satırlardaki NULL
+yanıt doğrulamasında 500'e dönmemeli.
+"""
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class Row(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+# Tablo satırları
+
+class TopicRow(Row):
+    id: str
+    student_id: Optional[str] = None
+    ders: Optional[str] = None
+    konu: Optional[str] = None
+    durum: Optional[str] = None
+    sinav_turu: Optional[str] = None
+    order_index: Optional[int] = None
+    created_at: Optional[str] = None
+
+
+class TaskRow(Row):
+    id: str
+    student_id: Optional[str] = None
+    aciklama: Optional[str] = None
+    sure: Optional[int] = None
+    tarih: Optional[str] = None
+    gun: Optional[str] = None
+    order_index: Optional[int] = None
+    completed: Optional[bool] = None
+    verilme_tarihi: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class ExamRow(Row):
+    id: str
+    student_id: Optional[str] = None
+    tarih: Optional[str] = None
+    sinav_tipi: Optional[str] = None
+    ders: Optional[str] = None
+    dogru: Optional[int] = None
+    yanlis: Optional[int] = None
+    net: Optional[float] = None
+    created_at: Optional[str] = None
+
+
+class SoruTakipRow(Row):
+    id: str
+    student_id: Optional[str] = None
+    date: Optional[str] = None
+    lesson: Optional[str] = None
+    topic: Optional[str] = None
+    source: Optional[str] = None
+    solved: Optional[int] = None
+    correct: Optional[int] = None
+    wrong: Optional[int] = None
+    blank: Optional[int] = None
+    created_at: Optional[str] = None
+
+
+# Deneme listeleri (exam_uploads + exam_analysis birleşimi)
+
+class StudentSummary(Row):
+    id: str
+    ad: Optional[str] = None
+    soyad: Optional[str] = None
+    bolum: Optional[str] = None
+
+
+class ExamUploadRow(Row):
+    id: str
+    student_id: Optional[str] = None
+    uploaded_by: Optional[str] = None
+    file_url: Optional[str] = None
+    file_type: Optional[str] = None
+    exam_date: Optional[str] = None
+    exam_name: Optional[str] = None
+    analysis_status: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class ExamAnalysisSummary(Row):
+    id: str
+    upload_id: Optional[str] = None
+    student_id: Optional[str] = None
+    total_net: Optional[float] = None
+    subject_breakdown: Any = None
+    weak_topics: Any = None
+    recommendations: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class StudentExam(BaseModel):
+    upload: ExamUploadRow
+    analysis: Optional[ExamAnalysisSummary] = None
+
+
+class CoachExam(StudentExam):
+    student: Optional[StudentSummary] = None
+
+
+# Koç paneli özetleri
+
+class StudentAnalysis(BaseModel):
+    student_id: str
+    student_name: str
+    bolum: Optional[str] = None
+    total_questions: int
+    accuracy_rate: float
+    last_activity: Optional[str] = None
+    needs_attention: Optional[bool] = None
+
+
+class StudentsAnalysis(BaseModel):
+    total_students: int
+    students: List[StudentAnalysis]
+    attention_needed: int
+
+
+class WeeklyStudentSummary(BaseModel):
+    student_id: str
+    student_name: str
+    questions_solved: int
+    accuracy_rate: float
+    change: float
+    status: str
+
+
+class WeeklySummaryTotals(BaseModel):
+    total_students: int
+    total_questions_solved: int
+    students_improved: int
+    students_declined: int
+    students_stable: int
+
+
+class WeeklySummary(BaseModel):
+    period: str
+    summary: WeeklySummaryTotals
+    most_improved: List[WeeklyStudentSummary]
+    most_declined: List[WeeklyStudentSummary]
+    all_students: List[WeeklyStudentSummary]
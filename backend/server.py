@@ -1,29 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Header, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Header, UploadFile, File, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
 import json
+import asyncio
+import hmac
 from pathlib import Path
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import uuid
-from datetime import datetime, timezone
-import bcrypt
-from supabase import create_client, Client
-from tyt_ayt_topics import TYT_TOPICS, AYT_SAYISAL, AYT_ESIT_AGIRLIK, AYT_SOZEL
-from exam_analyzer import ExamAnalyzer
+from datetime import datetime, timedelta, timezone
+from db import LazyDatabase, fetch_all
+import metrics
+from metrics import query_budget
+from compression import CompressionMiddleware
+from concurrency import RequestTaskGroup
+from pagination import PAGE_SIZE_MAX, fetch_page, page_response
+from notification_hub import NotificationHub, NOTIFICATION_HEARTBEAT_SECONDS, RECOUNT
+import projections
+import response_models
+from reports import bucket_report, compare_windows
+from tyt_ayt_topics import BOLUM_TEMPLATES, find_topic, normalize_bolum
+from exam_analyzer import ExamAnalyzer, exam_topic_records, score_topics, soru_takip_records
+from analysis_cache import AnalysisCache, ANALYSIS_CACHE_PATH
+from analysis_queue import AnalysisQueue, PermanentJobError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Supabase client
+# Supabase client (async, havuzlu bağlantı) - ilk sorguda kurulur, sıcak örnekte yeniden kullanılır
 supabase_url = os.environ['SUPABASE_URL']
 supabase_key = os.environ['SUPABASE_ANON_KEY']
-supabase: Client = create_client(supabase_url, supabase_key)
+supabase = LazyDatabase(supabase_url, supabase_key)
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+# Yanıtlar stdlib json yerine orjson ile yazılır; route'lar api_router
+# üzerinde kurulduğu için varsayılan yanıt sınıfı router'da da verilir
+app = FastAPI(default_response_class=ORJSONResponse)
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 # Models
 class CoachLogin(BaseModel):
@@ -101,6 +116,13 @@ class StudentOnboarding(BaseModel):
     kullanilan_kaynaklar: list
     program_onceligi: str
 
+class OnboardStudent(StudentCreate):
+    id: Optional[str] = None  # verilirse tekrar içe aktarma aynı öğrenciyi günceller
+    onboarding: Optional[StudentOnboarding] = None
+
+class StudentImport(BaseModel):
+    students: List[OnboardStudent]
+
 class SoruTakip(BaseModel):
     student_id: str
     date: str
@@ -221,8 +243,9 @@ async def change_coach_password(data: ChangePassword):
 
 # Students
 @api_router.get("/students")
+@query_budget(1)
 async def get_students():
-    response = supabase.table("students").select("*").execute()
+    response = await supabase.table("students").select("*").execute()
     return response.data
 
 @api_router.post("/students")
@@ -238,19 +261,146 @@ async def create_student(student: StudentCreate):
         "token": student_token,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    response = supabase.table("students").insert(data).execute()
+    response = await supabase.table("students").insert(data).execute()
     return response.data[0]
 
+# Öğrenci oluşturma + konu şablonu + (varsa) onboarding profili tek RPC'de,
+# tek transaction içinde (bkz. migrations/004_onboarding_pipeline.sql)
+IMPORT_MAX_STUDENTS = 500
+CSV_IMPORT_COLUMNS = ("id", "ad", "soyad", "bolum", "hedef", "notlar")
+
+def _is_uuid(value: str) -> bool:
+    """RPC'lerdeki UUID dönüşümü hata vermeden önce id'yi doğrular"""
+    try:
+        uuid.UUID(value)
+        return True
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+async def _onboard_students(students: List[OnboardStudent]) -> List[Dict]:
+    templates = {}
+    payload = []
+    for student in students:
+        bolum = normalize_bolum(student.bolum)
+        template_key = bolum or "TYT"
+        if template_key not in templates:
+            templates[template_key] = [dict(row) for row in BOLUM_TEMPLATES[bolum]]
+        payload.append({
+            "id": student.id,
+            "ad": student.ad,
+            "soyad": student.soyad,
+            "bolum": student.bolum,
+            "hedef": student.hedef,
+            "notlar": student.notlar,
+            "token": str(uuid.uuid4()),
+            "template": template_key,
+            "onboarding": student.onboarding.model_dump() if student.onboarding else None
+        })
+    
+    response = await supabase.rpc("onboard_students", {"p_students": payload, "p_templates": templates}).execute()
+    # Hoş geldin bildirimi RPC içinde yazılır; sayaçlar ve açık akışlar yenilenir
+    for student in response.data:
+        if student["onboarded"]:
+            notification_hub.invalidate(student["id"])
+    return response.data
+
+@api_router.post("/students/onboard")
+@query_budget(1)
+async def onboard_student(student: OnboardStudent):
+    """Öğrenciyi konularıyla birlikte tek istekte oluştur (tekrar çağrı güvenli)"""
+    if student.id is not None and not _is_uuid(student.id):
+        raise HTTPException(status_code=400, detail="Geçersiz öğrenci id")
+    try:
+        return (await _onboard_students([student]))[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/students/import")
+@query_budget(1)
+async def import_students(data: StudentImport):
+    """
+    Bir sınıfı JSON ile toplu içe aktar - tamamı tek transaction.
+    id'si geçersiz öğrenciler aktarılmaz, skipped listesinde döner.
+    """
+    skipped = [
+        f"Öğrenci {index}: geçersiz id"
+        for index, student in enumerate(data.students, start=1)
+        if student.id is not None and not _is_uuid(student.id)
+    ]
+    students = [student for student in data.students if student.id is None or _is_uuid(student.id)]
+    return await _import_students(students, skipped)
+
+async def _import_students(students: List[OnboardStudent], skipped: List[str]) -> Dict:
+    if not students and not skipped:
+        raise HTTPException(status_code=400, detail="Öğrenci listesi boş")
+    if len(students) + len(skipped) > IMPORT_MAX_STUDENTS:
+        raise HTTPException(status_code=400, detail=f"Tek seferde en fazla {IMPORT_MAX_STUDENTS} öğrenci aktarılabilir")
+    
+    try:
+        onboarded = await _onboard_students(students) if students else []
+        return {
+            "success": True,
+            "imported": len(onboarded),
+            "topics_created": sum(student["topics_created"] for student in onboarded),
+            "students": onboarded,
+            "skipped": skipped
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/students/import/csv")
+@query_budget(1)
+async def import_students_csv(file: UploadFile = File(...)):
+    """
+    Bir sınıfı CSV ile toplu içe aktar
+    Kolonlar (başlık satırı zorunlu): ad, bolum, [soyad, hedef, notlar, id]; ayraç , veya ;
+    id'si geçersiz satırlar aktarılmaz, skipped listesinde döner.
+    """
+    import csv
+    import io
+    
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV UTF-8 olmalı")
+    
+    delimiter = ";" if text.split("\n", 1)[0].count(";") > text.split("\n", 1)[0].count(",") else ","
+    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
+    
+    students = []
+    errors = []
+    skipped = []
+    for line_number, row in enumerate(reader, start=2):
+        row = {
+            (key or "").strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if (key or "").strip().lower() in CSV_IMPORT_COLUMNS
+        }
+        if not any(row.values()):
+            continue
+        if not row.get("ad") or not row.get("bolum"):
+            errors.append(f"Satır {line_number}: ad ve bolum zorunlu")
+            continue
+        if row.get("id") and not _is_uuid(row["id"]):
+            skipped.append(f"Satır {line_number}: geçersiz id")
+            continue
+        students.append(OnboardStudent(**{key: value or None for key, value in row.items()}))
+    
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors[:20]))
+    
+    return await _import_students(students, skipped)
+
 @api_router.get("/students/{student_id}")
 async def get_student(student_id: str):
-    response = supabase.table("students").select("*").eq("id", student_id).execute()
+    response = await supabase.table("students").select("*").eq("id", student_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
     return response.data[0]
 
 @api_router.get("/students/token/{token}")
 async def get_student_by_token(token: str):
-    response = supabase.table("students").select("*").eq("token", token).execute()
+    response = await supabase.table("students").select("*").eq("token", token).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
     return response.data[0]
@@ -264,23 +414,45 @@ async def update_student(student_id: str, student: StudentCreate):
         "hedef": student.hedef,
         "notlar": student.notlar
     }
-    response = supabase.table("students").update(data).eq("id", student_id).execute()
+    response = await supabase.table("students").update(data).eq("id", student_id).execute()
     return response.data[0]
 
 @api_router.delete("/students/{student_id}")
+@query_budget(1)
 async def delete_student(student_id: str):
-    supabase.table("topics").delete().eq("student_id", student_id).execute()
-    supabase.table("tasks").delete().eq("student_id", student_id).execute()
-    supabase.table("exams").delete().eq("student_id", student_id).execute()
-    supabase.table("calendar_notes").delete().eq("student_id", student_id).execute()
-    response = supabase.table("students").delete().eq("id", student_id).execute()
-    return {"success": True}
+    """
+    Öğrenciyi ve tüm bağlı kayıtlarını tek RPC ile, tek transaction'da sil
+    (bkz. migrations/005_delete_student_cascade.sql). Tablo bazlı silinen satır sayılarını döner.
+    """
+    # UUID olmayan id RPC'deki dönüşümde 500'e dönerdi; böyle bir öğrenci olamaz
+    if not _is_uuid(student_id):
+        raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
+    response = await supabase.rpc("delete_student", {"p_student_id": student_id}).execute()
+    deleted = response.data or {}
+    if not deleted.get("students"):
+        raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
+    notification_hub.invalidate(student_id)
+    return {"success": True, "deleted": deleted}
+
+# Liste endpoint'leri keyset ile sayfalanır: (sıralama kolonları..., id).
+# Sonraki sayfa ?cursor=<X-Next-Cursor> ile istenir. Mevcut ekranlar cursor'u
+# izlemeden tek istek attığından tam liste dönen endpoint'lerin varsayılan
+# limiti en büyük sayfadır (PAGE_SIZE_MAX); bu ekranlarda liste yine de
+# PAGE_SIZE_MAX satırda kesilir.
+TOPIC_PAGE_KEYS = (("order_index", False), ("id", False))
+TASK_PAGE_KEYS = (("tarih", False), ("order_index", False), ("id", False))
+EXAM_PAGE_KEYS = (("tarih", True), ("id", True))
+DATED_PAGE_KEYS = (("date", True), ("id", True))
+NOTIFICATION_PAGE_KEYS = (("created_at", True), ("id", True))
+EXAM_UPLOAD_PAGE_KEYS = (("created_at", True), ("id", True))
 
 # Topics
-@api_router.get("/topics/{student_id}")
-async def get_topics(student_id: str):
-    response = supabase.table("topics").select("*").eq("student_id", student_id).order("order_index").execute()
-    return response.data
+@api_router.get("/topics/{student_id}", response_model=List[response_models.TopicRow])
+@query_budget(1)
+async def get_topics(student_id: str, request: Request, response: Response, limit: int = PAGE_SIZE_MAX, cursor: Optional[str] = None):
+    query = supabase.table("topics").select("*").eq("student_id", student_id)
+    rows, next_cursor = await fetch_page(query, TOPIC_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
 
 @api_router.post("/topics")
 async def create_topic(topic: TopicCreate):
@@ -293,82 +465,47 @@ async def create_topic(topic: TopicCreate):
         "sinav_turu": topic.sinav_turu,
         "order_index": topic.order_index
     }
-    response = supabase.table("topics").insert(data).execute()
+    response = await supabase.table("topics").insert(data).execute()
     return response.data[0]
 
 @api_router.put("/topics/{topic_id}")
 async def update_topic(topic_id: str, topic: TopicUpdate):
     data = {k: v for k, v in topic.model_dump().items() if v is not None}
-    response = supabase.table("topics").update(data).eq("id", topic_id).execute()
+    response = await supabase.table("topics").update(data).eq("id", topic_id).execute()
     return response.data[0]
 
 @api_router.delete("/topics/{topic_id}")
 async def delete_topic(topic_id: str):
-    response = supabase.table("topics").delete().eq("id", topic_id).execute()
+    response = await supabase.table("topics").delete().eq("id", topic_id).execute()
     return {"success": True}
 
 @api_router.post("/topics/init/{student_id}")
+@query_budget(1)
 async def init_topics(student_id: str, bolum: str):
     """Initialize TYT and AYT topics for a student - BULK INSERT"""
-    # Normalize bolum
-    bolum_normalized = bolum.strip().lower()
-    if 'sayisal' in bolum_normalized or 'sayısal' in bolum_normalized:
-        bolum = "Sayısal"
-    elif 'esit' in bolum_normalized or 'eşit' in bolum_normalized:
-        bolum = "Eşit Ağırlık"
-    elif 'sozel' in bolum_normalized or 'sözel' in bolum_normalized:
-        bolum = "Sözel"
-    
-    order_index = 0
-    all_topics = []
-    
-    # Prepare TYT Topics
-    for ders_name, konu_list in TYT_TOPICS.items():
-        for konu in konu_list:
-            all_topics.append({
-                "id": str(uuid.uuid4()),
-                "student_id": student_id,
-                "ders": f"TYT - {ders_name}",
-                "konu": konu,
-                "durum": "baslanmadi",
-                "sinav_turu": "TYT",
-                "order_index": order_index
-            })
-            order_index += 1
-    
-    # Prepare AYT Topics
-    ayt_topics_dict = {
-        "Sayısal": AYT_SAYISAL,
-        "Eşit Ağırlık": AYT_ESIT_AGIRLIK,
-        "Sözel": AYT_SOZEL
-    }
-    
-    if bolum in ayt_topics_dict:
-        for ders_name, konu_list in ayt_topics_dict[bolum].items():
-            for konu in konu_list:
-                all_topics.append({
-                    "id": str(uuid.uuid4()),
-                    "student_id": student_id,
-                    "ders": f"AYT - {ders_name}",
-                    "konu": konu,
-                    "durum": "baslanmadi",
-                    "sinav_turu": "AYT",
-                    "order_index": order_index
-                })
-                order_index += 1
-    
-    # BULK INSERT - Tek seferde tüm konuları ekle
+    # Bölüme göre hazır şablon (TYT + bölümün AYT konuları, sıralı)
+    template = BOLUM_TEMPLATES[normalize_bolum(bolum)]
+    all_topics = [
+        {**row, "id": str(uuid.uuid4()), "student_id": student_id}
+        for row in template
+    ]
+    
+    # BULK UPSERT - (student_id, ders, konu) zaten varsa atlanır, tekrar çağrı müfredatı çoğaltmaz
     if all_topics:
-        response = supabase.table("topics").insert(all_topics).execute()
+        response = await supabase.table("topics").upsert(
+            all_topics, on_conflict="student_id,ders,konu", ignore_duplicates=True
+        ).execute()
         return response.data
     
     return []
 
 # Tasks
-@api_router.get("/tasks/{student_id}")
-async def get_tasks(student_id: str):
-    response = supabase.table("tasks").select("*").eq("student_id", student_id).order("tarih").order("order_index").execute()
-    return response.data
+@api_router.get("/tasks/{student_id}", response_model=List[response_models.TaskRow])
+@query_budget(1)
+async def get_tasks(student_id: str, request: Request, response: Response, limit: int = PAGE_SIZE_MAX, cursor: Optional[str] = None):
+    query = supabase.table("tasks").select("*").eq("student_id", student_id)
+    rows, next_cursor = await fetch_page(query, TASK_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
 
 @api_router.post("/tasks")
 async def create_task(task: TaskCreate):
@@ -383,27 +520,29 @@ async def create_task(task: TaskCreate):
         "completed": task.completed,
         "verilme_tarihi": datetime.now(timezone.utc).isoformat()
     }
-    response = supabase.table("tasks").insert(data).execute()
+    response = await supabase.table("tasks").insert(data).execute()
     return response.data[0]
 
 @api_router.put("/tasks/{task_id}")
 async def update_task(task_id: str, task: TaskUpdate):
     data = {k: v for k, v in task.model_dump().items() if v is not None}
-    response = supabase.table("tasks").update(data).eq("id", task_id).execute()
+    response = await supabase.table("tasks").update(data).eq("id", task_id).execute()
     return response.data[0]
 
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
-    response = supabase.table("tasks").delete().eq("id", task_id).execute()
+    response = await supabase.table("tasks").delete().eq("id", task_id).execute()
     return {"success": True}
 
 # Exams
-@api_router.get("/exams/{student_id}")
-async def get_exams(student_id: str):
-    response = supabase.table("exams").select("*").eq("student_id", student_id).order("tarih", desc=True).execute()
-    for exam in response.data:
-        exam["net"] = exam["dogru"] - (exam["yanlis"] * 0.25)
-    return response.data
+@api_router.get("/exams/{student_id}", response_model=List[response_models.ExamRow])
+@query_budget(1)
+async def get_exams(student_id: str, request: Request, response: Response, limit: int = PAGE_SIZE_MAX, cursor: Optional[str] = None):
+    query = supabase.table("exams").select("*").eq("student_id", student_id)
+    rows, next_cursor = await fetch_page(query, EXAM_PAGE_KEYS, limit, cursor)
+    for exam in rows:
+        exam["net"] = (exam["dogru"] or 0) - ((exam["yanlis"] or 0) * 0.25)
+    return page_response(request, response, rows, next_cursor)
 
 @api_router.post("/exams")
 async def create_exam(exam: ExamCreate):
@@ -418,18 +557,18 @@ async def create_exam(exam: ExamCreate):
         "yanlis": exam.yanlis,
         "net": net
     }
-    response = supabase.table("exams").insert(data).execute()
+    response = await supabase.table("exams").insert(data).execute()
     return response.data[0]
 
 @api_router.delete("/exams/{exam_id}")
 async def delete_exam(exam_id: str):
-    response = supabase.table("exams").delete().eq("id", exam_id).execute()
+    response = await supabase.table("exams").delete().eq("id", exam_id).execute()
     return {"success": True}
 
 # Calendar Notes
 @api_router.get("/calendar/{student_id}")
 async def get_calendar_notes(student_id: str):
-    response = supabase.table("calendar_notes").select("*").eq("student_id", student_id).order("date").execute()
+    response = await supabase.table("calendar_notes").select("*").eq("student_id", student_id).order("date").execute()
     return response.data
 
 @api_router.post("/calendar")
@@ -440,18 +579,18 @@ async def create_calendar_note(note: CalendarNoteCreate):
         "date": note.date,
         "note": note.note
     }
-    response = supabase.table("calendar_notes").insert(data).execute()
+    response = await supabase.table("calendar_notes").insert(data).execute()
     return response.data[0]
 
 @api_router.put("/calendar/{note_id}")
 async def update_calendar_note(note_id: str, note: CalendarNoteUpdate):
     data = {"note": note.note}
-    response = supabase.table("calendar_notes").update(data).eq("id", note_id).execute()
+    response = await supabase.table("calendar_notes").update(data).eq("id", note_id).execute()
     return response.data[0]
 
 @api_router.delete("/calendar/{note_id}")
 async def delete_calendar_note(note_id: str):
-    response = supabase.table("calendar_notes").delete().eq("id", note_id).execute()
+    response = await supabase.table("calendar_notes").delete().eq("id", note_id).execute()
     return {"success": True}
 
 # ====================================
@@ -461,7 +600,7 @@ async def delete_calendar_note(note_id: str):
 # Coach Calendar Events
 @api_router.get("/coach/calendar")
 async def get_coach_calendar():
-    response = supabase.table("coach_calendar").select("*").order("date").execute()
+    response = await supabase.table("coach_calendar").select("*").order("date").execute()
     return response.data
 
 @api_router.post("/coach/calendar")
@@ -472,18 +611,18 @@ async def create_coach_calendar_event(event: CoachCalendarEvent):
         "date": event.date,
         "note": event.note
     }
-    response = supabase.table("coach_calendar").insert(data).execute()
+    response = await supabase.table("coach_calendar").insert(data).execute()
     return response.data[0]
 
 @api_router.delete("/coach/calendar/{event_id}")
 async def delete_coach_calendar_event(event_id: str):
-    response = supabase.table("coach_calendar").delete().eq("id", event_id).execute()
+    response = await supabase.table("coach_calendar").delete().eq("id", event_id).execute()
     return {"success": True}
 
 # Coach Notes
 @api_router.get("/coach/notes")
 async def get_coach_notes():
-    response = supabase.table("coach_notes").select("*").order("created_at", desc=True).execute()
+    response = await supabase.table("coach_notes").select("*").order("created_at", desc=True).execute()
     return response.data
 
 @api_router.post("/coach/notes")
@@ -495,25 +634,25 @@ async def create_coach_note(note: CoachNote):
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    response = supabase.table("coach_notes").insert(data).execute()
+    response = await supabase.table("coach_notes").insert(data).execute()
     return response.data[0]
 
 @api_router.put("/coach/notes/{note_id}")
 async def update_coach_note(note_id: str, note: CoachNoteUpdate):
     data = {k: v for k, v in note.model_dump().items() if v is not None}
     data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    response = supabase.table("coach_notes").update(data).eq("id", note_id).execute()
+    response = await supabase.table("coach_notes").update(data).eq("id", note_id).execute()
     return response.data[0]
 
 @api_router.delete("/coach/notes/{note_id}")
 async def delete_coach_note(note_id: str):
-    response = supabase.table("coach_notes").delete().eq("id", note_id).execute()
+    response = await supabase.table("coach_notes").delete().eq("id", note_id).execute()
     return {"success": True}
 
 # Book Recommendations
 @api_router.get("/books")
 async def get_books():
-    response = supabase.table("book_recommendations").select("*").order("level").order("order_index").execute()
+    response = await supabase.table("book_recommendations").select("*").order("level").order("order_index").execute()
     # Sort by level: Kolay -> Orta -> Zor
     level_order = {"Kolay": 1, "Orta": 2, "Zor": 3}
     sorted_books = sorted(response.data, key=lambda x: level_order.get(x["level"], 999))
@@ -528,18 +667,18 @@ async def create_book(book: BookRecommendation):
         "description": book.description,
         "order_index": 0
     }
-    response = supabase.table("book_recommendations").insert(data).execute()
+    response = await supabase.table("book_recommendations").insert(data).execute()
     return response.data[0]
 
 @api_router.delete("/books/{book_id}")
 async def delete_book(book_id: str):
-    response = supabase.table("book_recommendations").delete().eq("id", book_id).execute()
+    response = await supabase.table("book_recommendations").delete().eq("id", book_id).execute()
     return {"success": True}
 
 # Task Pool
 @api_router.get("/task-pool/{student_id}")
 async def get_task_pool(student_id: str):
-    response = supabase.table("task_pool").select("*").eq("student_id", student_id).execute()
+    response = await supabase.table("task_pool").select("*").eq("student_id", student_id).execute()
     return response.data
 
 @api_router.post("/task-pool")
@@ -550,19 +689,19 @@ async def create_task_pool_item(item: TaskPoolItem):
         "aciklama": item.aciklama,
         "sure": item.sure
     }
-    response = supabase.table("task_pool").insert(data).execute()
+    response = await supabase.table("task_pool").insert(data).execute()
     return response.data[0]
 
 @api_router.delete("/task-pool/{item_id}")
 async def delete_task_pool_item(item_id: str):
-    response = supabase.table("task_pool").delete().eq("id", item_id).execute()
+    response = await supabase.table("task_pool").delete().eq("id", item_id).execute()
     return {"success": True}
 
 # Task Assignment from Pool (move to specific date)
 @api_router.post("/task-pool/{item_id}/assign")
 async def assign_task_from_pool(item_id: str, tarih: str, gun: str):
     # Get pool item
-    pool_item = supabase.table("task_pool").select("*").eq("id", item_id).execute()
+    pool_item = await supabase.table("task_pool").select("*").eq("id", item_id).execute()
     if not pool_item.data:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -580,15 +719,16 @@ async def assign_task_from_pool(item_id: str, tarih: str, gun: str):
         "completed": False,
         "verilme_tarihi": datetime.now(timezone.utc).isoformat()
     }
-    response = supabase.table("tasks").insert(task_data).execute()
+    response = await supabase.table("tasks").insert(task_data).execute()
     
     # Delete from pool
-    supabase.table("task_pool").delete().eq("id", item_id).execute()
+    await supabase.table("task_pool").delete().eq("id", item_id).execute()
     
     return response.data[0]
 
 # Last 7 Days Summary for Student
 @api_router.get("/student/{student_id}/last-7-days-summary")
+@query_budget(2)
 async def get_last_7_days_summary(student_id: str):
     from datetime import timedelta, date
     
@@ -596,13 +736,13 @@ async def get_last_7_days_summary(student_id: str):
     seven_days_ago = today - timedelta(days=7)
     
     # Get completed tasks in last 7 days
-    tasks_response = supabase.table("tasks").select("*").eq("student_id", student_id).gte("tarih", seven_days_ago.isoformat()).lte("tarih", today.isoformat()).execute()
+    tasks_response = await supabase.table("tasks").select(projections.TASK_ACTIVITY).eq("student_id", student_id).gte("tarih", seven_days_ago.isoformat()).lte("tarih", today.isoformat()).execute()
     
     completed_tasks = [t for t in tasks_response.data if t.get("completed")]
     total_minutes = sum(t.get("sure", 0) for t in completed_tasks)
     
-    # Get topics updated in last 7 days
-    topics_response = supabase.table("topics").select("*").eq("student_id", student_id).execute()
+    # Topic count (HEAD + count, satır taşınmaz)
+    total_topics = await supabase.count("topics", student_id=student_id)
     
     # Count by day for chart
     daily_data = {}
@@ -623,13 +763,13 @@ async def get_last_7_days_summary(student_id: str):
     return {
         "total_minutes": total_minutes,
         "completed_tasks_count": len(completed_tasks),
-        "total_topics": len(topics_response.data),
+        "total_topics": total_topics,
         "daily_activity": list(daily_data.values())
     }
 
 @api_router.get("/student/{student_id}/onboarding")
 async def get_student_onboarding(student_id: str):
-    response = supabase.table("students").select("*").eq("id", student_id).execute()
+    response = await supabase.table("students").select("*").eq("id", student_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
     
@@ -660,7 +800,7 @@ async def complete_student_onboarding(student_id: str, data: StudentOnboarding):
         "program_onceligi": data.program_onceligi
     }
     
-    response = supabase.table("students").update(update_data).eq("id", student_id).execute()
+    response = await supabase.table("students").update(update_data).eq("id", student_id).execute()
     
     # Create welcome notification
     notification_data = {
@@ -672,13 +812,22 @@ async def complete_student_onboarding(student_id: str, data: StudentOnboarding):
         "is_read": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    supabase.table("notifications").insert(notification_data).execute()
+    await _insert_notifications(notification_data)
     
     return {"success": True, "message": "Onboarding tamamlandı"}
 
 # 2. SORU TAKİP
-@api_router.get("/student/{student_id}/soru-takip")
-async def get_soru_takip(student_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+@api_router.get("/student/{student_id}/soru-takip", response_model=List[response_models.SoruTakipRow])
+@query_budget(1)
+async def get_soru_takip(
+    student_id: str,
+    request: Request,
+    response: Response,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = PAGE_SIZE_MAX,
+    cursor: Optional[str] = None
+):
     query = supabase.table("soru_takip").select("*").eq("student_id", student_id)
     
     if start_date:
@@ -686,17 +835,23 @@ async def get_soru_takip(student_id: str, start_date: Optional[str] = None, end_
     if end_date:
         query = query.lte("date", end_date)
     
-    response = query.order("date", desc=True).execute()
-    return response.data
+    rows, next_cursor = await fetch_page(query, DATED_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
+
+def _canonical_topic(topic: Optional[str], lesson: str) -> Optional[str]:
+    """Katalogda karşılığı olan konu adını katalogdaki yazımıyla kaydet ("turev" -> "Türev")"""
+    match = find_topic(topic, subject=lesson) if topic else None
+    return match.topic if match else topic
 
 @api_router.post("/student/soru-takip")
+@query_budget(1)
 async def create_soru_takip(data: SoruTakip):
     record = {
         "id": str(uuid.uuid4()),
         "student_id": data.student_id,
         "date": data.date,
         "lesson": data.lesson,
-        "topic": data.topic,
+        "topic": _canonical_topic(data.topic, data.lesson),
         "source": data.source,
         "solved": data.solved,
         "correct": data.correct,
@@ -705,7 +860,8 @@ async def create_soru_takip(data: SoruTakip):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    response = supabase.table("soru_takip").insert(record).execute()
+    # soru_takip_daily özeti trigger ile artımlı güncellenir (bkz. migrations/002)
+    response = await supabase.table("soru_takip").insert(record).execute()
     return response.data[0]
 
 # BRANŞ TARAMA TESTİ
@@ -719,6 +875,7 @@ class BransTarama(BaseModel):
     total: int
 
 @api_router.post("/student/brans-tarama")
+@query_budget(3)
 async def create_brans_tarama(data: BransTarama):
     net = data.correct - (data.wrong / 4.0)
     accuracy = (data.correct / data.total * 100) if data.total > 0 else 0
@@ -737,35 +894,40 @@ async def create_brans_tarama(data: BransTarama):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    response = supabase.table("brans_tarama").insert(record).execute()
-    
-    # Öğrenci bilgisini al
-    student = supabase.table("students").select("*").eq("id", data.student_id).execute()
-    student_name = f"{student.data[0]['ad']} {student.data[0].get('soyad', '')}".strip() if student.data else "Öğrenci"
+    async def notify_coach(student, _insert_response):
+        student_name = f"{student.data[0]['ad']} {student.data[0].get('soyad', '')}".strip() if student.data else "Öğrenci"
+        
+        # Koça bildirim gönder
+        coach_notification = {
+            "id": str(uuid.uuid4()),
+            "user_id": "coach",
+            "type": "info",
+            "title": "Yeni Branş Tarama Testi",
+            "message": f"{student_name} branş tarama testi girişi yaptı: {data.lesson} (Net: {net:.2f})",
+            "is_read": False,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await _insert_notifications(coach_notification)
     
-    # Koça bildirim gönder
-    coach_notification = {
-        "id": str(uuid.uuid4()),
-        "user_id": "coach",
-        "type": "info",
-        "title": "Yeni Branş Tarama Testi",
-        "message": f"{student_name} branş tarama testi girişi yaptı: {data.lesson} (Net: {net:.2f})",
-        "is_read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    supabase.table("notifications").insert(coach_notification).execute()
+    # Kayıt ve öğrenci sorgusu eşzamanlı; bildirim ikisini de bekler
+    async with RequestTaskGroup() as group:
+        response = group.spawn(lambda: supabase.table("brans_tarama").insert(record).execute())
+        student = group.spawn(lambda: supabase.table("students").select(projections.STUDENT_NAME).eq("id", data.student_id).execute())
+        group.spawn(notify_coach, student, response)
     
-    return response.data[0]
+    return response.result().data[0]
 
 @api_router.get("/student/{student_id}/brans-tarama")
-async def get_brans_tarama(student_id: str):
-    response = supabase.table("brans_tarama").select("*").eq("student_id", student_id).order("date", desc=True).execute()
-    return response.data
+@query_budget(1)
+async def get_brans_tarama(student_id: str, request: Request, response: Response, limit: int = PAGE_SIZE_MAX, cursor: Optional[str] = None):
+    query = supabase.table("brans_tarama").select("*").eq("student_id", student_id)
+    rows, next_cursor = await fetch_page(query, DATED_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
 
 # 3. KAYNAK TAKİBİ
 @api_router.get("/student/{student_id}/sources")
 async def get_student_sources(student_id: str):
-    response = supabase.table("students_sources").select("*").eq("student_id", student_id).execute()
+    response = await supabase.table("students_sources").select("*").eq("student_id", student_id).execute()
     return response.data
 
 @api_router.post("/student/{student_id}/sources")
@@ -779,7 +941,7 @@ async def add_student_source(student_id: str, data: SourceUpdate):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    response = supabase.table("students_sources").insert(record).execute()
+    response = await supabase.table("students_sources").insert(record).execute()
     return response.data[0]
 
 @api_router.put("/student/sources/{source_id}")
@@ -789,7 +951,7 @@ async def update_source_progress(source_id: str, progress: int):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    response = supabase.table("students_sources").update(update_data).eq("id", source_id).execute()
+    response = await supabase.table("students_sources").update(update_data).eq("id", source_id).execute()
     return response.data[0]
 
 # 4. DETAYLI DENEME KAYDI
@@ -816,22 +978,52 @@ async def create_detailed_exam(data: ExamDetailed):
         "ders": "Toplam"
     }
     
-    response = supabase.table("exams").insert(record).execute()
+    response = await supabase.table("exams").insert(record).execute()
     return response.data[0]
 
 # 5. BİLDİRİMLER
+# Okunmamış sayıları süreç içinde önbelleklenir; bildirim yazan her yol
+# _insert_notifications üzerinden geçer ki sayaç güncellensin ve açık
+# akışlara iletilsin
+notification_hub = NotificationHub()
+
+async def _insert_notifications(records) -> List[Dict]:
+    response = await supabase.table("notifications").insert(records).execute()
+    notification_hub.publish(response.data)
+    return response.data
+
+async def _unread_count(user_id: str) -> int:
+    return await notification_hub.unread_count(
+        user_id, lambda: supabase.count("notifications", user_id=user_id, is_read=False)
+    )
+
 @api_router.get("/student/{student_id}/notifications")
-async def get_notifications(student_id: str, unread_only: bool = False):
+@query_budget(1)
+async def get_notifications(
+    student_id: str,
+    request: Request,
+    response: Response,
+    unread_only: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
     query = supabase.table("notifications").select("*").eq("user_id", student_id)
     
     if unread_only:
         query = query.eq("is_read", False)
     
-    response = query.order("created_at", desc=True).limit(50).execute()
-    return response.data
+    rows, next_cursor = await fetch_page(query, NOTIFICATION_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
 
 @api_router.get("/student/coach/notifications")
-async def get_coach_notifications(unread_only: bool = False):
+@query_budget(1)
+async def get_coach_notifications(
+    request: Request,
+    response: Response,
+    unread_only: bool = False,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
     """
     Koç için bildirimleri getir
     """
@@ -840,20 +1032,55 @@ async def get_coach_notifications(unread_only: bool = False):
     if unread_only:
         query = query.eq("is_read", False)
     
-    response = query.order("created_at", desc=True).limit(100).execute()
-    return response.data
+    rows, next_cursor = await fetch_page(query, NOTIFICATION_PAGE_KEYS, limit, cursor)
+    return page_response(request, response, rows, next_cursor)
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str):
-    response = supabase.table("notifications").update({"is_read": True}).eq("id", notification_id).execute()
+    response = await supabase.table("notifications").update({"is_read": True}).eq("id", notification_id).execute()
+    for notification in response.data:
+        notification_hub.invalidate(notification["user_id"])
     return {"success": True}
 
 @api_router.delete("/notifications/{notification_id}")
 async def delete_notification(notification_id: str):
     """Bildirimi sil"""
-    response = supabase.table("notifications").delete().eq("id", notification_id).execute()
+    response = await supabase.table("notifications").delete().eq("id", notification_id).execute()
+    for notification in response.data:
+        notification_hub.invalidate(notification["user_id"])
     return {"success": True}
 
+@api_router.get("/notifications/{user_id}/unread-count")
+async def get_unread_count(user_id: str):
+    """Okunmamış bildirim sayısı (koç için user_id = coach) - çoğunlukla önbellekten"""
+    return {"user_id": user_id, "unread": await _unread_count(user_id)}
+
+@api_router.get("/notifications/{user_id}/stream")
+async def stream_notifications(user_id: str, request: Request):
+    """
+    Bildirimleri server-sent events ile iter: bağlanınca ve sayaç değişince
+    unread olayı, her yeni bildirimde notification olayı gönderilir.
+    Bağlantı boştayken periyodik yorum satırı ile canlı tutulur.
+    """
+    async def events():
+        with notification_hub.subscribe(user_id) as queue:
+            yield _sse("unread", {"unread": await _unread_count(user_id)})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), NOTIFICATION_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is not RECOUNT:
+                    yield _sse("notification", event)
+                yield _sse("unread", {"unread": await _unread_count(user_id)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.post("/notifications")
 async def create_notification(data: Notification):
     record = {
@@ -866,32 +1093,49 @@ async def create_notification(data: Notification):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    response = supabase.table("notifications").insert(record).execute()
-    return response.data[0]
+    return (await _insert_notifications(record))[0]
+
+# 6. RAPORLAR
+# Günlük, haftalık, aylık ve serbest aralık raporları aynı motoru kullanır:
+# tek sorgu + reports.bucket_report ile tek geçişte kovalama
+REPORT_MAX_DAYS = 366
+
+async def _soru_report(student_id: str, start, end, bucket_days: int = 1) -> Dict:
+    """Öğrencinin [start, end] aralığı için kovalanmış soru raporu"""
+    rows = await fetch_all(
+        lambda: supabase.table("soru_takip_daily").select(projections.SORU_REPORT)
+            .eq("student_id", student_id)
+            .gte("date", start.isoformat())
+            .lte("date", end.isoformat())
+            .order("date")
+            .order("lesson")
+    )
+    return bucket_report(rows, start, end, bucket_days)
+
+def _most_studied_lesson(lessons: Dict) -> str:
+    return max(lessons.items(), key=lambda x: x[1]["solved"])[0] if lessons else "Yok"
 
-# 6. GÜNLÜK RAPOR
 @api_router.get("/student/{student_id}/reports/daily")
+@query_budget(2)
 async def get_daily_report(student_id: str, date: str):
-    from datetime import datetime as dt
-    
-    # Günlük soru çalışması
-    soru_response = supabase.table("soru_takip").select("*").eq("student_id", student_id).eq("date", date).execute()
+    from datetime import date as date_cls
     
-    # Günlük tamamlanan görevler
-    tasks_response = supabase.table("tasks").select("*").eq("student_id", student_id).eq("tarih", date).execute()
-    
-    total_solved = sum(s["solved"] for s in soru_response.data)
-    total_correct = sum(s["correct"] for s in soru_response.data)
+    try:
+        day = date_cls.fromisoformat(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih")
+    
+    # Günlük soru çalışması ve görevler eşzamanlı
+    async with RequestTaskGroup() as group:
+        report_task = group.spawn(lambda: _soru_report(student_id, day, day))
+        tasks_task = group.spawn(lambda: supabase.table("tasks").select(projections.TASK_STATUS).eq("student_id", student_id).eq("tarih", date).execute())
+    report = report_task.result()
+    tasks_response = tasks_task.result()
+    
+    total_solved = report["totals"]["solved"]
+    total_correct = report["totals"]["correct"]
     completed_tasks = [t for t in tasks_response.data if t.get("completed")]
     
-    # En çok çalışılan ders
-    lesson_counts = {}
-    for s in soru_response.data:
-        lesson = s["lesson"]
-        lesson_counts[lesson] = lesson_counts.get(lesson, 0) + s["solved"]
-    
-    most_studied = max(lesson_counts.items(), key=lambda x: x[1])[0] if lesson_counts else "Yok"
-    
     return {
         "date": date,
         "total_questions_solved": total_solved,
@@ -899,10 +1143,11 @@ async def get_daily_report(student_id: str, date: str):
         "accuracy_rate": (total_correct / total_solved * 100) if total_solved > 0 else 0,
         "completed_tasks": len(completed_tasks),
         "pending_tasks": len(tasks_response.data) - len(completed_tasks),
-        "most_studied_lesson": most_studied
+        "most_studied_lesson": _most_studied_lesson(report["lessons"])
     }
 
 @api_router.get("/student/{student_id}/reports/weekly")
+@query_budget(1)
 async def get_weekly_report(student_id: str):
     """
     Son 7 günlük detaylı haftalık rapor
@@ -912,82 +1157,50 @@ async def get_weekly_report(student_id: str):
     today = date.today()
     week_ago = today - timedelta(days=7)
     
-    # Son 7 günlük soru takip verileri
-    soru_data = supabase.table("soru_takip").select("*").eq("student_id", student_id).gte("date", week_ago.isoformat()).lte("date", today.isoformat()).execute()
-    
-    # Günlük breakdown
-    daily_data = {}
-    for i in range(7):
-        day = today - timedelta(days=6-i)
-        daily_data[day.isoformat()] = {
-            "date": day.isoformat(),
-            "solved": 0,
-            "correct": 0,
-            "accuracy": 0,
-            "lessons": []
+    report = await _soru_report(student_id, week_ago, today)
+    totals = report["totals"]
+    
+    # Günlük breakdown (son 7 gün)
+    daily_breakdown = [
+        {
+            "date": day["start"],
+            "solved": day["solved"],
+            "correct": day["correct"],
+            "accuracy": day["accuracy"],
+            "lessons": day["lessons"]
         }
-    
-    # Ders bazında toplam
-    lesson_totals = {}
-    
-    for record in soru_data.data:
-        record_date = record["date"]
-        if record_date in daily_data:
-            daily_data[record_date]["solved"] += record["solved"]
-            daily_data[record_date]["correct"] += record["correct"]
-            daily_data[record_date]["lessons"].append(record["lesson"])
-        
-        # Ders toplamı
-        lesson = record["lesson"]
-        if lesson not in lesson_totals:
-            lesson_totals[lesson] = {"solved": 0, "correct": 0}
-        lesson_totals[lesson]["solved"] += record["solved"]
-        lesson_totals[lesson]["correct"] += record["correct"]
-    
-    # Günlük başarı oranlarını hesapla
-    for day_data in daily_data.values():
-        if day_data["solved"] > 0:
-            day_data["accuracy"] = round((day_data["correct"] / day_data["solved"]) * 100, 1)
-    
-    # Genel toplam
-    total_solved = sum(s["solved"] for s in soru_data.data)
-    total_correct = sum(s["correct"] for s in soru_data.data)
-    overall_accuracy = round((total_correct / total_solved * 100), 1) if total_solved > 0 else 0
-    
-    # En çok çalışılan ders
-    most_studied = max(lesson_totals.items(), key=lambda x: x[1]["solved"])[0] if lesson_totals else "Yok"
+        for day in report["buckets"][-7:]
+    ]
     
     # Trend (son 3 gün vs önceki 4 gün)
-    recent_days = list(daily_data.values())[-3:]
-    older_days = list(daily_data.values())[:4]
-    
-    recent_avg = sum(d["solved"] for d in recent_days) / 3
-    older_avg = sum(d["solved"] for d in older_days) / 4
+    recent_avg = sum(d["solved"] for d in daily_breakdown[-3:]) / 3
+    older_avg = sum(d["solved"] for d in daily_breakdown[:4]) / 4
     
     trend = "Yükseliş" if recent_avg > older_avg else "Düşüş" if recent_avg < older_avg else "Sabit"
     
     return {
         "period": f"{week_ago.strftime('%d.%m.%Y')} - {today.strftime('%d.%m.%Y')}",
         "summary": {
-            "total_solved": total_solved,
-            "total_correct": total_correct,
-            "accuracy_rate": overall_accuracy,
-            "most_studied_lesson": most_studied,
+            "total_solved": totals["solved"],
+            "total_correct": totals["correct"],
+            "accuracy_rate": totals["accuracy"],
+            "most_studied_lesson": _most_studied_lesson(report["lessons"]),
             "trend": trend
         },
-        "daily_breakdown": list(daily_data.values()),
+        "daily_breakdown": daily_breakdown,
         "lesson_breakdown": [
             {
                 "lesson": lesson,
                 "solved": data["solved"],
                 "correct": data["correct"],
-                "accuracy": round((data["correct"] / data["solved"] * 100), 1) if data["solved"] > 0 else 0
+                "accuracy": data["accuracy"]
             }
-            for lesson, data in lesson_totals.items()
+            for lesson, data in report["lessons"].items()
         ]
     }
 
 @api_router.get("/student/{student_id}/reports/monthly")
+@query_budget(1)
 async def get_monthly_report(student_id: str):
     """
     Son 30 günlük aylık rapor
@@ -997,58 +1210,32 @@ async def get_monthly_report(student_id: str):
     today = date.today()
     month_ago = today - timedelta(days=30)
     
-    # Son 30 günlük soru takip verileri
-    soru_data = supabase.table("soru_takip").select("*").eq("student_id", student_id).gte("date", month_ago.isoformat()).lte("date", today.isoformat()).execute()
+    report = await _soru_report(student_id, month_ago, today, bucket_days=7)
+    totals = report["totals"]
     
-    # Haftalık breakdown (4 hafta)
+    # Haftalık breakdown (bugünle biten son 4 tam hafta)
     weekly_data = []
-    for week in range(4):
-        week_start = today - timedelta(days=(3-week)*7 + 6)
-        week_end = today - timedelta(days=(3-week)*7)
-        
-        week_records = [r for r in soru_data.data if week_start.isoformat() <= r["date"] <= week_end.isoformat()]
-        
-        week_solved = sum(r["solved"] for r in week_records)
-        week_correct = sum(r["correct"] for r in week_records)
-        
+    for week, bucket in enumerate(report["buckets"][-4:]):
         weekly_data.append({
             "week": f"Hafta {week + 1}",
-            "period": f"{week_start.strftime('%d.%m')} - {week_end.strftime('%d.%m')}",
-            "solved": week_solved,
-            "correct": week_correct,
-            "accuracy": round((week_correct / week_solved * 100), 1) if week_solved > 0 else 0
+            "period": f"{date.fromisoformat(bucket['start']).strftime('%d.%m')} - {date.fromisoformat(bucket['end']).strftime('%d.%m')}",
+            "solved": bucket["solved"],
+            "correct": bucket["correct"],
+            "accuracy": bucket["accuracy"]
         })
     
-    # Ders bazında aylık toplam
-    lesson_totals = {}
-    for record in soru_data.data:
-        lesson = record["lesson"]
-        if lesson not in lesson_totals:
-            lesson_totals[lesson] = {"solved": 0, "correct": 0, "wrong": 0}
-        lesson_totals[lesson]["solved"] += record["solved"]
-        lesson_totals[lesson]["correct"] += record["correct"]
-        lesson_totals[lesson]["wrong"] += record["wrong"]
-    
-    # Genel toplam
-    total_solved = sum(s["solved"] for s in soru_data.data)
-    total_correct = sum(s["correct"] for s in soru_data.data)
-    overall_accuracy = round((total_correct / total_solved * 100), 1) if total_solved > 0 else 0
-    
     # İlerleme (ilk 2 hafta vs son 2 hafta)
-    first_half = weekly_data[:2]
-    second_half = weekly_data[2:]
-    
-    first_avg = sum(w["solved"] for w in first_half) / 2
-    second_avg = sum(w["solved"] for w in second_half) / 2
+    first_avg = sum(w["solved"] for w in weekly_data[:2]) / 2
+    second_avg = sum(w["solved"] for w in weekly_data[2:]) / 2
     
     improvement = round(((second_avg - first_avg) / first_avg * 100), 1) if first_avg > 0 else 0
     
     return {
         "period": f"{month_ago.strftime('%d.%m.%Y')} - {today.strftime('%d.%m.%Y')}",
         "summary": {
-            "total_solved": total_solved,
-            "total_correct": total_correct,
-            "accuracy_rate": overall_accuracy,
+            "total_solved": totals["solved"],
+            "total_correct": totals["correct"],
+            "accuracy_rate": totals["accuracy"],
             "improvement_rate": improvement
         },
         "weekly_breakdown": weekly_data,
@@ -1058,17 +1245,39 @@ async def get_monthly_report(student_id: str):
                 "solved": data["solved"],
                 "correct": data["correct"],
                 "wrong": data["wrong"],
-                "accuracy": round((data["correct"] / data["solved"] * 100), 1) if data["solved"] > 0 else 0
+                "accuracy": data["accuracy"]
             }
-            for lesson, data in lesson_totals.items()
+            for lesson, data in report["lessons"].items()
         ]
     }
 
+@api_router.get("/student/{student_id}/reports/range")
+@query_budget(1)
+async def get_range_report(student_id: str, start: str, end: str, bucket_days: int = 1):
+    """
+    Serbest aralık raporu (örn. son 90 gün, sınav sezonu başından bugüne)
+    """
+    from datetime import date
+    
+    try:
+        start_day = date.fromisoformat(start)
+        end_day = date.fromisoformat(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih")
+    
+    if end_day < start_day or (end_day - start_day).days >= REPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Aralık en fazla {REPORT_MAX_DAYS} gün olabilir")
+    if bucket_days < 1:
+        raise HTTPException(status_code=400, detail="bucket_days en az 1 olmalı")
+    
+    return await _soru_report(student_id, start_day, end_day, bucket_days)
+
 # ====================================
 # FAZ 2: ANALİZ MOTORU
 # ====================================
 
 @api_router.get("/student/{student_id}/analysis")
+@query_budget(2)
 async def get_student_analysis(student_id: str):
     """
     Öğrenci için kapsamlı analiz:
@@ -1078,9 +1287,13 @@ async def get_student_analysis(student_id: str):
     """
     from datetime import date, timedelta
     
-    # Son 30 günlük soru takip verileri
+    # Son 30 günlük soru takip özetleri (gün x ders)
     thirty_days_ago = (date.today() - timedelta(days=30)).isoformat()
-    soru_data = supabase.table("soru_takip").select("*").eq("student_id", student_id).gte("date", thirty_days_ago).execute()
+    # Soru özetleri ve son denemeler eşzamanlı
+    async with RequestTaskGroup() as group:
+        soru_task = group.spawn(lambda: supabase.table("soru_takip_daily").select(projections.SORU_LESSON_TOTALS).eq("student_id", student_id).gte("date", thirty_days_ago).execute())
+        exams_task = group.spawn(lambda: supabase.table("exams").select("*").eq("student_id", student_id).order("tarih", desc=True).limit(5).execute())
+    soru_data = soru_task.result()
     
     # Ders bazında analiz
     lesson_stats = {}
@@ -1120,7 +1333,7 @@ async def get_student_analysis(student_id: str):
     overall_accuracy = round((total_correct / total_solved * 100), 1) if total_solved > 0 else 0
     
     # Deneme sonuçlarını da ekle
-    exams = supabase.table("exams").select("*").eq("student_id", student_id).order("tarih", desc=True).limit(5).execute()
+    exams = exams_task.result()
     
     return {
         "student_id": student_id,
@@ -1136,29 +1349,34 @@ async def get_student_analysis(student_id: str):
         "recent_exams": exams.data
     }
 
-@api_router.get("/coach/students-analysis")
+@api_router.get("/coach/students-analysis", response_model=response_models.StudentsAnalysis)
+@query_budget(2)
 async def get_all_students_analysis():
     """
     Koç için tüm öğrencilerin analiz özeti
     """
     from datetime import date, timedelta
     
-    students = supabase.table("students").select("*").execute()
-    
+    # Öğrenciler ve tüm öğrencilerin soru toplamları (GROUP BY student_id) eşzamanlı
+    # Bkz: migrations/001_student_activity_summary.sql
+    async with RequestTaskGroup() as group:
+        students_task = group.spawn(lambda: supabase.table("students").select(projections.STUDENT_SUMMARY).execute())
+        activity_task = group.spawn(lambda: supabase.rpc("student_activity_summary").execute())
+    students = students_task.result()
+    activity = activity_task.result()
+    activity_by_student = {row["student_id"]: row for row in activity.data}
+
     students_analysis = []
     for student in students.data:
-        # Her öğrenci için temel analiz
-        soru_data = supabase.table("soru_takip").select("*").eq("student_id", student["id"]).execute()
-        
-        total_solved = sum(s["solved"] for s in soru_data.data)
-        total_correct = sum(s["correct"] for s in soru_data.data)
+        stats = activity_by_student.get(student["id"], {})
+
+        total_solved = stats.get("total_solved", 0)
+        total_correct = stats.get("total_correct", 0)
         accuracy = round((total_correct / total_solved * 100), 1) if total_solved > 0 else 0
-        
+
         # Son aktivite tarihi
-        last_activity = None
-        if soru_data.data:
-            last_activity = max(s["date"] for s in soru_data.data)
-        
+        last_activity = stats.get("last_activity")
+
         students_analysis.append({
             "student_id": student["id"],
             "student_name": f"{student['ad']} {student.get('soyad', '')}".strip(),
@@ -1178,50 +1396,106 @@ async def get_all_students_analysis():
         "attention_needed": len([s for s in students_analysis if s["needs_attention"]])
     }
 
+# Toplu bildirimler tek tek değil, bu boyutta parçalar halinde eklenir
+BULK_NOTIFICATION_CHUNK_SIZE = int(os.environ.get('BULK_NOTIFICATION_CHUNK_SIZE', '100'))
+
 class BulkNotification(BaseModel):
-    student_ids: List[str]
+    student_ids: List[str] = []
+    all_students: bool = False  # Tüm öğrencilere gönder
+    bolum: Optional[str] = None  # Sadece bu bölümdeki öğrencilere gönder
     type: str
     title: str
     message: str
 
 @api_router.post("/coach/send-bulk-notification")
+@query_budget(2)
 async def send_bulk_notification(data: BulkNotification):
     """
     Koç tarafından birden fazla öğrenciye bildirim gönderme
+    Alıcılar: student_ids + (all_students veya bolum seçicisi)
     """
-    created_notifications = []
-    
-    for student_id in data.student_ids:
-        record = {
+    student_ids = list(data.student_ids)
+    
+    # Seçici verildiyse öğrenci id'lerini sunucuda çöz
+    if data.all_students or data.bolum:
+        query = supabase.table("students").select("id")
+        if data.bolum and not data.all_students:
+            query = query.eq("bolum", data.bolum)
+        students = await query.execute()
+        student_ids.extend(s["id"] for s in students.data)
+    
+    # Aynı öğrenciye iki kez gönderme (sıra korunur)
+    student_ids = list(dict.fromkeys(student_ids))
+    
+    created_at = datetime.now(timezone.utc).isoformat()
+    records = [
+        {
             "id": str(uuid.uuid4()),
             "user_id": student_id,
             "type": data.type,
             "title": data.title,
             "message": data.message,
             "is_read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": created_at
         }
-        
-        response = supabase.table("notifications").insert(record).execute()
-        created_notifications.extend(response.data)
+        for student_id in student_ids
+    ]
+    
+    created_notifications = []
+    failed_chunks = []
+    
+    for start in range(0, len(records), BULK_NOTIFICATION_CHUNK_SIZE):
+        chunk = records[start:start + BULK_NOTIFICATION_CHUNK_SIZE]
+        if start:
+            # İlk parça route bütçesinde; sonrakiler öğrenci sayısından gelir
+            metrics.allow_extra_calls()
+        try:
+            created_notifications.extend(await _insert_notifications(chunk))
+        except Exception as e:
+            # Başarılı parçalar korunur, hatalı parça raporlanır
+            failed_chunks.append({
+                "chunk": start // BULK_NOTIFICATION_CHUNK_SIZE,
+                "student_ids": [r["user_id"] for r in chunk],
+                "error": str(e)
+            })
     
     return {
-        "success": True,
+        "success": not failed_chunks,
         "notifications_sent": len(created_notifications),
-        "notifications": created_notifications
+        "notifications": created_notifications,
+        "failed_chunks": failed_chunks
     }
 
-@api_router.get("/coach/reports/weekly-summary")
-async def get_coach_weekly_summary():
+@api_router.get("/coach/reports/weekly-summary", response_model=response_models.WeeklySummary)
+@query_budget(2)
+async def get_coach_weekly_summary(window_days: int = 7):
     """
     Koç için haftalık özet rapor - tüm öğrencilerin performansı
+    window_days ile farklı pencereler karşılaştırılabilir (örn. 14 vs 14 gün)
     """
     from datetime import date, timedelta
     
-    today = date.today()
-    week_ago = today - timedelta(days=7)
+    if window_days < 1:
+        raise HTTPException(status_code=400, detail="window_days en az 1 olmalı")
     
-    students = supabase.table("students").select("*").execute()
+    today = date.today()
+    week_ago = today - timedelta(days=window_days)
+    two_weeks_ago = week_ago - timedelta(days=window_days)
+    
+    # İki pencerenin tüm verisi tek sorguda (öğrenci listesiyle eşzamanlı),
+    # tek geçişte kovalara ayrılır
+    async with RequestTaskGroup() as group:
+        students_task = group.spawn(lambda: supabase.table("students").select(projections.STUDENT_SUMMARY).execute())
+        soru_task = group.spawn(lambda: fetch_all(
+            lambda: supabase.table("soru_takip_daily")
+                .select(projections.SORU_WINDOW)
+                .gte("date", two_weeks_ago.isoformat())
+                .order("student_id")
+                .order("date")
+                .order("lesson")
+        ))
+    students = students_task.result()
+    windows = compare_windows(soru_task.result(), today, window_days)
     
     students_summary = []
     total_questions = 0
@@ -1229,23 +1503,19 @@ async def get_coach_weekly_summary():
     total_declined = 0
     
     for student in students.data:
-        # Öğrencinin haftalık verileri
-        soru_data = supabase.table("soru_takip").select("*").eq("student_id", student["id"]).gte("date", week_ago.isoformat()).execute()
-        
-        if not soru_data.data:
+        student_windows = windows.get(student["id"])
+        if not student_windows or not student_windows["current"]["entries"]:
             continue
         
-        week_solved = sum(s["solved"] for s in soru_data.data)
-        week_correct = sum(s["correct"] for s in soru_data.data)
-        week_accuracy = round((week_correct / week_solved * 100), 1) if week_solved > 0 else 0
+        current = student_windows["current"]
+        previous = student_windows["previous"]
         
-        # Önceki hafta ile karşılaştırma
-        two_weeks_ago = week_ago - timedelta(days=7)
-        prev_week_data = supabase.table("soru_takip").select("*").eq("student_id", student["id"]).gte("date", two_weeks_ago.isoformat()).lt("date", week_ago.isoformat()).execute()
+        week_solved = current["solved"]
+        week_accuracy = round((current["correct"] / week_solved * 100), 1) if week_solved > 0 else 0
         
-        prev_week_solved = sum(s["solved"] for s in prev_week_data.data)
-        prev_week_correct = sum(s["correct"] for s in prev_week_data.data)
-        prev_accuracy = round((prev_week_correct / prev_week_solved * 100), 1) if prev_week_solved > 0 else 0
+        # Önceki pencere ile karşılaştırma
+        prev_week_solved = previous["solved"]
+        prev_accuracy = round((previous["correct"] / prev_week_solved * 100), 1) if prev_week_solved > 0 else 0
         
         change = week_accuracy - prev_accuracy
         
@@ -1269,9 +1539,9 @@ async def get_coach_weekly_summary():
         
         total_questions += week_solved
     
-    # En çok gelişen ve gerileyen
+    # Ekran tüm listeyi değişime göre azalan gösterir: tek sıralama, uçlardan 3'er
     students_summary.sort(key=lambda x: x["change"], reverse=True)
-    most_improved = students_summary[:3] if len(students_summary) >= 3 else students_summary
+    most_improved = students_summary[:3]
     most_declined = students_summary[-3:] if len(students_summary) >= 3 else []
     
     return {
@@ -1303,17 +1573,28 @@ class ManualExamEntry(BaseModel):
 class TopicProgressUpdate(BaseModel):
     status: str
 
-# Analyzer instance
-exam_analyzer = ExamAnalyzer(api_key=os.environ.get('EMERGENT_LLM_KEY', ''))
+# Analyzer ve önbelleği ilk kullanımda kurulur (soğuk başlangıçta sqlite açılmaz),
+# sıcak örnekte yeniden kullanılır - ANALYSIS_CACHE_PATH boş bırakılırsa önbellek kapalı
+analysis_cache: Optional[AnalysisCache] = None
+_exam_analyzer: Optional[ExamAnalyzer] = None
+
+def get_exam_analyzer() -> ExamAnalyzer:
+    global analysis_cache, _exam_analyzer
+    if _exam_analyzer is None:
+        if ANALYSIS_CACHE_PATH:
+            analysis_cache = AnalysisCache()
+        _exam_analyzer = ExamAnalyzer(api_key=os.environ.get('EMERGENT_LLM_KEY', ''), cache=analysis_cache)
+    return _exam_analyzer
 
 @api_router.post("/exam/manual-entry")
+@query_budget(4)
 async def manual_exam_entry(entry: ManualExamEntry):
     """
     Manuel deneme sonucu girişi (AI analizi YOK - koç tarafından tetiklenecek)
     """
     try:
         # Net hesapla
-        calculation = exam_analyzer.calculate_net_from_manual(entry.subjects)
+        calculation = get_exam_analyzer().calculate_net_from_manual(entry.subjects)
         
         # exam_uploads tablosuna kaydet
         upload_record = {
@@ -1324,60 +1605,62 @@ async def manual_exam_entry(entry: ManualExamEntry):
             "file_type": "manual",
             "exam_date": entry.exam_date,
             "exam_name": entry.exam_name,
-            "analysis_status": "pending",  # Analiz bekliyor
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        upload_response = supabase.table("exam_uploads").insert(upload_record).execute()
-        upload_id = upload_response.data[0]["id"]
-        
-        # exam_analysis tablosuna temel veriyi kaydet (AI analizi sonra)
-        analysis_record = {
-            "id": str(uuid.uuid4()),
-            "upload_id": upload_id,
-            "student_id": entry.student_id,
-            "total_net": calculation["total_net"],
-            "subject_breakdown": json.dumps(calculation["subjects"]),
-            "topic_breakdown": json.dumps(entry.subjects),
-            "weak_topics": json.dumps([]),
-            "recommendations": "Analiz bekleniyor. Koç tarafından analiz edilecek.",
-            "ai_raw_response": json.dumps({
-                "exam_name": entry.exam_name,
-                "exam_type": entry.exam_type,
-                "subjects": entry.subjects
-            }),
+            **_analysis_status("pending"),  # Analiz bekliyor
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        supabase.table("exam_analysis").insert(analysis_record).execute()
+        async def save_analysis(upload_response):
+            # exam_analysis tablosuna temel veriyi kaydet (AI analizi sonra)
+            analysis_record = {
+                "id": str(uuid.uuid4()),
+                "upload_id": upload_response.data[0]["id"],
+                "student_id": entry.student_id,
+                "total_net": calculation["total_net"],
+                "subject_breakdown": json.dumps(calculation["subjects"]),
+                "topic_breakdown": json.dumps(entry.subjects),
+                "weak_topics": json.dumps([]),
+                "recommendations": "Analiz bekleniyor. Koç tarafından analiz edilecek.",
+                "ai_raw_response": json.dumps({
+                    "exam_name": entry.exam_name,
+                    "exam_type": entry.exam_type,
+                    "subjects": entry.subjects
+                }),
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            return await supabase.table("exam_analysis").insert(analysis_record).execute()
         
-        # Öğrenci bilgisini al
-        student = supabase.table("students").select("*").eq("id", entry.student_id).execute()
-        student_name = f"{student.data[0]['ad']} {student.data[0].get('soyad', '')}".strip() if student.data else "Öğrenci"
+        async def send_notifications(student, _analysis_response):
+            student_name = f"{student.data[0]['ad']} {student.data[0].get('soyad', '')}".strip() if student.data else "Öğrenci"
+            
+            # Öğrenciye ve koça (coach_id: "coach") bildirim - tek istekte
+            student_notification = {
+                "id": str(uuid.uuid4()),
+                "user_id": entry.student_id,
+                "type": "success",
+                "title": "Deneme Kaydedildi",
+                "message": f"{entry.exam_name} denemesi başarıyla kaydedildi. Toplam net: {calculation['total_net']}",
+                "is_read": False,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            coach_notification = {
+                "id": str(uuid.uuid4()),
+                "user_id": "coach",
+                "type": "info",
+                "title": "Yeni Deneme Girişi",
+                "message": f"{student_name} yeni bir deneme girişi yaptı: {entry.exam_name} (Net: {calculation['total_net']})",
+                "is_read": False,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            await _insert_notifications([student_notification, coach_notification])
         
-        # Öğrenciye bildirim gönder
-        student_notification = {
-            "id": str(uuid.uuid4()),
-            "user_id": entry.student_id,
-            "type": "success",
-            "title": "Deneme Kaydedildi",
-            "message": f"{entry.exam_name} denemesi başarıyla kaydedildi. Toplam net: {calculation['total_net']}",
-            "is_read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        supabase.table("notifications").insert(student_notification).execute()
+        # upload -> analysis -> bildirimler zinciri; öğrenci sorgusu eşzamanlı
+        async with RequestTaskGroup() as group:
+            upload = group.spawn(lambda: supabase.table("exam_uploads").insert(upload_record).execute())
+            analysis = group.spawn(save_analysis, upload)
+            student = group.spawn(lambda: supabase.table("students").select(projections.STUDENT_NAME).eq("id", entry.student_id).execute())
+            group.spawn(send_notifications, student, analysis)
         
-        # Koça bildirim gönder (coach_id: "coach")
-        coach_notification = {
-            "id": str(uuid.uuid4()),
-            "user_id": "coach",
-            "type": "info",
-            "title": "Yeni Deneme Girişi",
-            "message": f"{student_name} yeni bir deneme girişi yaptı: {entry.exam_name} (Net: {calculation['total_net']})",
-            "is_read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        supabase.table("notifications").insert(coach_notification).execute()
+        upload_id = upload.result().data[0]["id"]
         
         return {
             "success": True,
@@ -1388,133 +1671,387 @@ async def manual_exam_entry(entry: ManualExamEntry):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _analysis_status(status: str) -> Dict:
+    """
+    analysis_status güncellemesi; analysis_updated_at ile birlikte yazılır ki
+    ölen bir sunucu örneğinde queued/running kalan denemeler yaşından tanınsın
+    """
+    return {"analysis_status": status, "analysis_updated_at": datetime.now(timezone.utc).isoformat()}
+
+async def _load_exam_analyses(upload_ids: List[str]) -> Dict[str, object]:
+    """
+    Upload ve analiz kayıtlarını toplu okur, upload'ları running olarak işaretler.
+    Returns: {upload_id: (upload, analysis) | PermanentJobError}
+    """
+    async with RequestTaskGroup() as group:
+        uploads_task = group.spawn(lambda: supabase.table("exam_uploads").select(projections.EXAM_UPLOAD_TRIGGER).in_("id", upload_ids).execute())
+        analyses_task = group.spawn(lambda: supabase.table("exam_analysis").select(projections.EXAM_ANALYSIS_TRIGGER).in_("upload_id", upload_ids).execute())
+        group.spawn(lambda: supabase.table("exam_uploads").update(_analysis_status("running")).in_("id", upload_ids).execute())
+    uploads_by_id = {upload["id"]: upload for upload in uploads_task.result().data}
+    analyses_by_upload = {analysis["upload_id"]: analysis for analysis in analyses_task.result().data}
+    
+    loaded = {}
+    for upload_id in upload_ids:
+        if upload_id not in uploads_by_id:
+            loaded[upload_id] = PermanentJobError("Deneme bulunamadı")
+        elif upload_id not in analyses_by_upload:
+            loaded[upload_id] = PermanentJobError("Analiz kaydı bulunamadı")
+        else:
+            loaded[upload_id] = (uploads_by_id[upload_id], analyses_by_upload[upload_id])
+    return loaded
+
+async def _save_exam_analysis(upload_data: Dict, analysis_data: Dict, exam_data: Dict, ai_result: Dict) -> Dict:
+    """AI sonucunu, zayıf/güçlü konuları ve bildirimi kaydeder"""
+    # Başarısız sonuç kaydedilmez, kuyruk tekrar dener
+    if not ai_result.get("success"):
+        raise RuntimeError(ai_result.get("error") or "AI analizi yapılamadı")
+    ai_analysis = ai_result.get("ai_analysis", "Analiz yapılamadı")
+    
+    # Zayıf/güçlü konular exam_analyzer'daki ortak motorla
+    scores = score_topics(exam_topic_records(exam_data))
+    weak_topics = scores["weak_topics"]
+    strong_topics = scores["strong_topics"]
+    
+    # Öğrenciye bildirim
+    notification_record = {
+        "id": str(uuid.uuid4()),
+        "user_id": upload_data["student_id"],
+        "type": "info",
+        "title": "Deneme Analizi Tamamlandı",
+        "message": f"{upload_data['exam_name']} denemesi için AI analizi tamamlandı.",
+        "is_read": False,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    
+    # Analiz, upload status ve bildirim yazımları birbirinden bağımsız
+    async with RequestTaskGroup() as group:
+        group.spawn(lambda: supabase.table("exam_analysis").update({
+            "weak_topics": json.dumps(weak_topics),
+            "recommendations": ai_analysis
+        }).eq("id", analysis_data["id"]).execute())
+        group.spawn(lambda: supabase.table("exam_uploads").update(_analysis_status("completed")).eq("id", upload_data["id"]).execute())
+        group.spawn(lambda: _insert_notifications(notification_record))
+    
+    return {
+        "weak_topics": weak_topics,
+        "strong_topics": strong_topics,
+        "ai_analysis": ai_analysis
+    }
+
+async def run_exam_analysis(upload_id: str) -> Dict:
+    """
+    Bir denemenin AI analizini yapar ve sonuçları kaydeder (kuyruk worker'ı çağırır).
+    Hata yükseltirse kuyruk tekrar dener; kayıt yoksa tekrar denenmez.
+    """
+    loaded = (await _load_exam_analyses([upload_id]))[upload_id]
+    if isinstance(loaded, Exception):
+        raise loaded
+    upload_data, analysis_data = loaded
+    
+    exam_data = json.loads(analysis_data["ai_raw_response"])
+    ai_result = await get_exam_analyzer().analyze_exam_text(exam_data)
+    return await _save_exam_analysis(upload_data, analysis_data, exam_data, ai_result)
+
+async def run_exam_analysis_batch(upload_ids: List[str]) -> Dict[str, object]:
+    """
+    Kuyrukta birikmiş denemeleri toplu LLM çağrısıyla analiz eder.
+    Returns: {upload_id: sonuç | Exception} - hatalı olanlar kuyrukta tek tek tekrar denenir
+    """
+    outcomes = await _load_exam_analyses(upload_ids)
+    
+    ready = []
+    for upload_id, loaded in outcomes.items():
+        if isinstance(loaded, Exception):
+            continue
+        upload_data, analysis_data = loaded
+        try:
+            ready.append((upload_id, upload_data, analysis_data, json.loads(analysis_data["ai_raw_response"])))
+        except (TypeError, ValueError) as e:
+            outcomes[upload_id] = PermanentJobError(f"Deneme verisi okunamadı: {e}")
+    
+    ai_results = await get_exam_analyzer().analyze_exam_batch([exam_data for *_, exam_data in ready])
+    
+    async def save(item, ai_result):
+        upload_id, upload_data, analysis_data, exam_data = item
+        try:
+            outcomes[upload_id] = await _save_exam_analysis(upload_data, analysis_data, exam_data, ai_result)
+        except Exception as e:
+            outcomes[upload_id] = e
+    
+    await asyncio.gather(*(save(item, ai_result) for item, ai_result in zip(ready, ai_results)))
+    return outcomes
+
+async def mark_exam_analysis_failed(upload_id: str, error: str):
+    """Son deneme de başarısız olursa upload'ı failed olarak işaretle"""
+    await supabase.table("exam_uploads").update(_analysis_status("failed")).eq("id", upload_id).execute()
+
+# Bu süreden uzun queued/running kalan denemeler sahipsiz sayılır
+ANALYSIS_STALE_SECONDS = int(os.environ.get('ANALYSIS_STALE_SECONDS', '900'))
+
+analysis_queue = AnalysisQueue(
+    run_exam_analysis,
+    on_failure=mark_exam_analysis_failed,
+    batch_handler=run_exam_analysis_batch
+)
+
+def _job_summary(job: Dict) -> Dict:
+    return {"job_id": job["job_id"], "upload_id": job["upload_id"], "status": job["status"]}
+
 @api_router.post("/exam/trigger-analysis/{upload_id}")
 async def trigger_analysis(upload_id: str):
     """
-    Koç tarafından AI analizi tetikleme
+    Koç tarafından AI analizi tetikleme - analiz kuyruğa alınır, iş kimliği hemen döner.
+    Sonuç GET /exam/analysis-jobs/{job_id} veya upload'ın analysis_status'u ile izlenir.
     """
     try:
-        # Upload kaydını bul
-        upload = supabase.table("exam_uploads").select("*").eq("id", upload_id).execute()
-        if not upload.data:
-            raise HTTPException(status_code=404, detail="Deneme bulunamadı")
+        job = analysis_queue.active_job(upload_id)
+        if job is None:
+            queued = await supabase.table("exam_uploads").update(_analysis_status("queued")).eq("id", upload_id).execute()
+            if not queued.data:
+                raise HTTPException(status_code=404, detail="Deneme bulunamadı")
+            job = analysis_queue.submit(upload_id)
         
-        upload_data = upload.data[0]
+        return {"success": True, **_job_summary(job)}
         
-        # Mevcut analizi bul
-        analysis = supabase.table("exam_analysis").select("*").eq("upload_id", upload_id).execute()
-        if not analysis.data:
-            raise HTTPException(status_code=404, detail="Analiz kaydı bulunamadı")
-        
-        analysis_data = analysis.data[0]
-        
-        # AI analiz yap
-        exam_data = json.loads(analysis_data["ai_raw_response"])
-        ai_result = await exam_analyzer.analyze_exam_text(exam_data)
-        ai_analysis = ai_result.get("ai_analysis", "Analiz yapılamadı")
-        
-        # Zayıf konuları belirle
-        weak_topics = []
-        strong_topics = []
-        
-        for subject in exam_data.get('subjects', []):
-            for topic in subject.get('topics', []):
-                total = topic.get('total', 0)
-                correct = topic.get('correct', 0)
-                wrong = topic.get('wrong', 0)
-                
-                if total > 0:
-                    accuracy = (correct / total) * 100
-                    topic_info = f"{subject['name']} - {topic['name']}"
-                    
-                    if accuracy < 60 or wrong >= 3:
-                        weak_topics.append(topic_info)
-                    elif accuracy >= 80:
-                        strong_topics.append(topic_info)
-        
-        # Analizi güncelle
-        supabase.table("exam_analysis").update({
-            "weak_topics": json.dumps(weak_topics),
-            "recommendations": ai_analysis
-        }).eq("id", analysis_data["id"]).execute()
-        
-        # Upload status güncelle
-        supabase.table("exam_uploads").update({
-            "analysis_status": "completed"
-        }).eq("id", upload_id).execute()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Yanıttan sonra süren işler: event loop task'lara zayıf referans tutar,
+# referans burada saklanmazsa task bitmeden çöp toplanabilir
+_background_tasks = set()
+
+def _run_in_background(coro):
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@api_router.get("/exam/trigger-analysis/{upload_id}/stream")
+async def stream_analysis(upload_id: str):
+    """
+    AI analizini server-sent events ile canlı akıtır:
+    token olayları metni geldikçe taşır, akış bitince analiz kaydedilir ve
+    done olayı (weak_topics, strong_topics, ai_analysis) gönderilir.
+    Hata olursa error olayı gönderilir ve upload failed olarak işaretlenir.
+    """
+    # Akış süresince upload kuyrukta aktif iş olarak görünür (çift analiz yok)
+    job = analysis_queue.claim(upload_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Bu deneme zaten kuyrukta analiz ediliyor")
+    
+    try:
+        loaded = (await _load_exam_analyses([upload_id]))[upload_id]
+    except Exception as e:
+        analysis_queue.release(job, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    if isinstance(loaded, Exception):
+        analysis_queue.release(job, error=str(loaded))
+        raise HTTPException(status_code=404, detail=str(loaded))
+    upload_data, analysis_data = loaded
+    
+    async def events():
+        settled = False
+        try:
+            exam_data = json.loads(analysis_data["ai_raw_response"])
+            parts = []
+            async for chunk in get_exam_analyzer().stream_exam_text(exam_data):
+                parts.append(chunk)
+                yield _sse("token", {"text": chunk})
+            
+            ai_result = {"success": True, "ai_analysis": "".join(parts).strip()}
+            result = await _save_exam_analysis(upload_data, analysis_data, exam_data, ai_result)
+            settled = True
+            analysis_queue.release(job, result=result)
+            yield _sse("done", result)
+        except Exception as e:
+            settled = True
+            analysis_queue.release(job, error=str(e))
+            await mark_exam_analysis_failed(upload_id, str(e))
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Bağlantı yarıda koptuysa analiz tekrar tetiklenebilsin
+            if not settled:
+                analysis_queue.release(job, error="Akış bağlantısı koptu")
+                _run_in_background(
+                    supabase.table("exam_uploads").update(_analysis_status("pending")).eq("id", upload_id).execute()
+                )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/exam/trigger-analysis-pending")
+async def trigger_pending_analyses(limit: int = 100):
+    """
+    Analiz bekleyen (pending) tüm denemeleri kuyruğa al. Kuyruk bellekte
+    tutulduğundan, ANALYSIS_STALE_SECONDS'tan uzun süredir queued/running
+    kalan denemeler (işleyen sunucu örneği kapanmış) de yeniden alınır.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit en az 1 olmalı")
+    
+    stale_before = (datetime.now(timezone.utc) - timedelta(seconds=ANALYSIS_STALE_SECONDS)).isoformat()
+    try:
+        pending = await supabase.table("exam_uploads").select("id").or_(
+            f"analysis_status.eq.pending,"
+            f"and(analysis_status.in.(queued,running),analysis_updated_at.lt.\"{stale_before}\")"
+        ).order("created_at").limit(limit).execute()
+        # Bu örnekte hâlâ çalışan işler yeniden kuyruğa alınmaz
+        upload_ids = [upload["id"] for upload in pending.data if analysis_queue.active_job(upload["id"]) is None]
         
-        # Öğrenciye bildirim gönder
-        notification_record = {
-            "id": str(uuid.uuid4()),
-            "user_id": upload_data["student_id"],
-            "type": "info",
-            "title": "Deneme Analizi Tamamlandı",
-            "message": f"{upload_data['exam_name']} denemesi için AI analizi tamamlandı.",
-            "is_read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        supabase.table("notifications").insert(notification_record).execute()
+        if upload_ids:
+            await supabase.table("exam_uploads").update(_analysis_status("queued")).in_("id", upload_ids).execute()
         
-        return {
-            "success": True,
-            "weak_topics": weak_topics,
-            "strong_topics": strong_topics,
-            "ai_analysis": ai_analysis
-        }
+        jobs = [_job_summary(analysis_queue.submit(upload_id)) for upload_id in upload_ids]
+        return {"success": True, "queued": len(jobs), "jobs": jobs}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/exam/student-exams/{student_id}")
-async def get_student_exams(student_id: str):
+@api_router.get("/exam/analysis-jobs/{job_id}")
+async def get_analysis_job(job_id: str, upload_id: Optional[str] = None):
+    """
+    Kuyruktaki analiz işinin durumu. İş bu sunucu örneğinin belleğinde yoksa
+    (serverless'ta istek başka/yeniden başlatılmış örneğe düştüyse) upload_id
+    ile exam_uploads.analysis_status'tan okunur.
+    """
+    job = analysis_queue.jobs.get(job_id)
+    if job is not None:
+        return job
+    if not upload_id:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    
+    upload = await supabase.table("exam_uploads").select("analysis_status").eq("id", upload_id).execute()
+    if not upload.data:
+        raise HTTPException(status_code=404, detail="Deneme bulunamadı")
+    status = upload.data[0]["analysis_status"]
+    return {
+        "job_id": job_id,
+        "upload_id": upload_id,
+        "status": status,
+        "error": "Analiz başarısız oldu" if status == "failed" else None,
+        "result": None
+    }
+
+@api_router.get("/exam/analysis-cache/stats")
+async def get_analysis_cache_stats():
+    """AI analiz önbelleği isabet/ıska sayaçları"""
+    if not ANALYSIS_CACHE_PATH:
+        return {"enabled": False}
+    get_exam_analyzer()
+    return {"enabled": True, **analysis_cache.stats()}
+
+# Deneme listeleri (created_at, id) üzerinden cursor ile sayfalanır;
+# bir sonraki sayfanın cursor'u X-Next-Cursor header'ında döner
+EXAM_PAGE_MAX = 200
+
+async def _join_exam_uploads(uploads: List[Dict], with_student: bool = False) -> List[Dict]:
+    """
+    Bir sayfa exam_uploads kaydını analiz (ve öğrenci) kayıtlarıyla birleştirir.
+    Sayfa boyutundan bağımsız olarak en fazla 2 ek sorgu yapılır.
+    """
+    if not uploads:
+        return []
+    
+    async with RequestTaskGroup() as group:
+        analyses = group.spawn(lambda: supabase.table("exam_analysis").select(projections.EXAM_ANALYSIS_LIST).in_("upload_id", [u["id"] for u in uploads]).execute())
+        if with_student:
+            student_ids = list({u["student_id"] for u in uploads})
+            students = group.spawn(lambda: supabase.table("students").select(projections.STUDENT_SUMMARY).in_("id", student_ids).execute())
+    
+    analysis_by_upload = {}
+    for analysis in analyses.result().data:
+        analysis_by_upload.setdefault(analysis["upload_id"], analysis)
+    
+    students_by_id = {}
+    if with_student:
+        students_by_id = {s["id"]: s for s in students.result().data}
+    
+    results = []
+    for upload in uploads:
+        result = {"upload": upload}
+        if with_student:
+            result["student"] = students_by_id.get(upload["student_id"])
+        result["analysis"] = analysis_by_upload.get(upload["id"])
+        results.append(result)
+    
+    return results
+
+@api_router.get("/exam/student-exams/{student_id}", response_model=List[response_models.StudentExam])
+@query_budget(2)
+async def get_student_exams(student_id: str, request: Request, response: Response, limit: int = EXAM_PAGE_MAX, cursor: Optional[str] = None):
     """
     Öğrencinin tüm denemelerini getir
     """
     try:
-        # Uploads getir
-        uploads = supabase.table("exam_uploads").select("*").eq("student_id", student_id).order("created_at", desc=True).execute()
-        
-        results = []
-        for upload in uploads.data:
-            # İlgili analizi getir
-            analysis = supabase.table("exam_analysis").select("*").eq("upload_id", upload["id"]).execute()
-            
-            result = {
-                "upload": upload,
-                "analysis": analysis.data[0] if analysis.data else None
-            }
-            results.append(result)
-        
-        return results
+        query = supabase.table("exam_uploads").select("*").eq("student_id", student_id)
+        uploads, next_cursor = await fetch_page(query, EXAM_UPLOAD_PAGE_KEYS, min(limit, EXAM_PAGE_MAX), cursor)
+        return page_response(request, response, await _join_exam_uploads(uploads), next_cursor)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/exam/coach-overview")
-async def get_coach_exam_overview():
+@api_router.get("/exam/coach-overview", response_model=List[response_models.CoachExam])
+@query_budget(3)
+async def get_coach_exam_overview(request: Request, response: Response, limit: int = 50, cursor: Optional[str] = None):
     """
     Koç için tüm öğrencilerin denemelerini getir
     """
     try:
-        # Tüm uploads
-        uploads = supabase.table("exam_uploads").select("*").order("created_at", desc=True).limit(50).execute()
+        query = supabase.table("exam_uploads").select("*")
+        uploads, next_cursor = await fetch_page(query, EXAM_UPLOAD_PAGE_KEYS, min(limit, EXAM_PAGE_MAX), cursor)
+        return page_response(request, response, await _join_exam_uploads(uploads, with_student=True), next_cursor)
         
-        results = []
-        for upload in uploads.data:
-            # Öğrenci bilgisi
-            student = supabase.table("students").select("*").eq("id", upload["student_id"]).execute()
-            
-            # Analiz
-            analysis = supabase.table("exam_analysis").select("*").eq("upload_id", upload["id"]).execute()
-            
-            result = {
-                "upload": upload,
-                "student": student.data[0] if student.data else None,
-                "analysis": analysis.data[0] if analysis.data else None
-            }
-            results.append(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/exam/topic-scores/{student_id}")
+@query_budget(2)
+async def get_topic_scores(student_id: str, days: int = 90):
+    """
+    Öğrencinin tüm deneme konu sonuçları + soru takip geçmişinden
+    yakın döneme ağırlıklı zayıf/güçlü konu sıralaması
+    """
+    from datetime import date, timedelta
+    
+    if days < 1 or days > REPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days 1 ile {REPORT_MAX_DAYS} arasında olmalı")
+    
+    try:
+        since = date.today() - timedelta(days=days)
+        async with RequestTaskGroup() as group:
+            exams_task = group.spawn(lambda: fetch_all(
+                lambda: supabase.table("exam_analysis").select(projections.EXAM_TOPIC_HISTORY)
+                    .eq("student_id", student_id)
+                    .gte("created_at", since.isoformat())
+                    .order("created_at")
+            ))
+            soru_task = group.spawn(lambda: fetch_all(
+                lambda: supabase.table("soru_takip_daily").select(projections.SORU_TOPIC_HISTORY)
+                    .eq("student_id", student_id)
+                    .gte("date", since.isoformat())
+                    .order("date").order("lesson")
+            ))
         
-        return results
+        records = soru_takip_records(soru_task.result())
+        for exam in exams_task.result():
+            subjects = exam.get("topic_breakdown") or []
+            if isinstance(subjects, str):
+                subjects = json.loads(subjects)
+            records.extend(exam_topic_records({"subjects": subjects}, exam["created_at"]))
+        
+        return {"student_id": student_id, "days": days, **score_topics(records)}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1525,7 +2062,7 @@ async def get_topic_progress(student_id: str):
     Öğrencinin konu ilerleme durumunu getir
     """
     try:
-        progress = supabase.table("topic_progress").select("*").eq("student_id", student_id).execute()
+        progress = await supabase.table("topic_progress").select("*").eq("student_id", student_id).execute()
         return progress.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1536,7 +2073,7 @@ async def update_topic_progress(progress_id: str, update: TopicProgressUpdate):
     Konu ilerleme durumunu güncelle
     """
     try:
-        response = supabase.table("topic_progress").update({
+        response = await supabase.table("topic_progress").update({
             "status": update.status,
             "updated_at": datetime.now(timezone.utc).isoformat()
         }).eq("id", progress_id).execute()
@@ -1561,20 +2098,61 @@ async def create_topic_progress(student_id: str, topic_id: str, subject: str, to
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        response = supabase.table("topic_progress").insert(record).execute()
+        response = await supabase.table("topic_progress").insert(record).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 app.include_router(api_router)
 
+# Ölçümler (Prometheus metin formatı); sadece METRICS_TOKEN ayarlıysa açıktır
+# ve Bearer ile korunur. Token yoksa endpoint kapalıdır (404): route bazlı
+# gecikme ve çağrı sayıları herkese açık dağıtımda gösterilmez.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+metrics.REGISTRY.gauge(
+    "analysis_queue_jobs", "Analiz kuyruğundaki işler (duruma göre)",
+    lambda: [({"status": status}, sum(1 for job in analysis_queue.jobs.values() if job["status"] == status))
+             for status in ("queued", "running", "completed", "failed")]
+)
+def _analysis_cache_lookups():
+    if analysis_cache is None:
+        return []
+    stats = analysis_cache.stats()
+    return [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]
+
+metrics.REGISTRY.gauge("analysis_cache_lookups", "Analiz önbelleği isabet/ıska sayısı", _analysis_cache_lookups)
+metrics.REGISTRY.gauge(
+    "notification_streams", "Açık bildirim akışı (SSE) bağlantıları",
+    lambda: [({}, notification_hub.stats()["subscribers"])]
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Yetkisiz")
+    return Response(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+async def close_supabase_client():
+    await analysis_queue.stop()
+    await supabase.aclose()
+    if analysis_cache is not None:
+        analysis_cache.close()
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Ölçümler sıkıştırılmış (kablodaki) yanıt boyutunu görsün diye dışta
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -1,5 +1,10 @@
 # Güncel TYT ve AYT Konuları
 
+import re
+import uuid
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
 TYT_TOPICS = {
     "Türkçe": [
         "Sözcükte Anlam",
@@ -347,3 +352,141 @@ AYT_SOZEL = {
     "Tarih-1": AYT_ESIT_AGIRLIK["Tarih-1"],
     "Coğrafya-1": AYT_ESIT_AGIRLIK["Coğrafya-1"]
 }
+
+
+# ====================================
+# DERLENMİŞ KONU KATALOĞU
+# ====================================
+# Yukarıdaki sözlüklerden import anında bir kez kurulur ve değiştirilemez.
+# Konu id'leri uuid5 ile (sınav, ders, konu) üzerinden türetilir; her
+# çalıştırmada ve her sunucuda aynıdır.
+
+TOPIC_NAMESPACE = uuid.UUID("6f0e4c1e-3b8a-5d2f-9c47-1a2b3c4d5e6f")
+
+BOLUMLER = ("Sayısal", "Eşit Ağırlık", "Sözel")
+
+_AYT_BY_BOLUM = {
+    "Sayısal": AYT_SAYISAL,
+    "Eşit Ağırlık": AYT_ESIT_AGIRLIK,
+    "Sözel": AYT_SOZEL
+}
+
+_TURKISH_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+
+
+def normalize_name(text: str) -> str:
+    """
+    Büyük/küçük harf ve Türkçe karakter farkını yok sayan anahtar:
+    "Türev", "TÜREV", "turev" -> "turev"; "EBOB - EKOK" -> "ebob ekok"
+    """
+    text = text.replace("İ", "i").replace("I", "ı").lower().translate(_TURKISH_FOLD)
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text).split())
+
+
+class CatalogTopic(NamedTuple):
+    exam: str         # "TYT" | "AYT"
+    subject: str      # "Matematik"
+    topic: str        # "Türev"
+    id: str           # sabit uuid5
+    order_index: int  # katalog sırası (TYT, sonra AYT)
+
+
+def _build_catalog() -> Tuple[CatalogTopic, ...]:
+    entries = []
+    seen = set()
+    sources = [("TYT", TYT_TOPICS)] + [("AYT", topics) for topics in _AYT_BY_BOLUM.values()]
+    for exam, subjects in sources:
+        for subject, topics in subjects.items():
+            for topic in topics:
+                key = (exam, subject, topic)
+                if key in seen:
+                    continue
+                seen.add(key)
+                topic_id = str(uuid.uuid5(TOPIC_NAMESPACE, f"{exam}|{subject}|{topic}"))
+                entries.append(CatalogTopic(exam, subject, topic, topic_id, len(entries)))
+    return tuple(entries)
+
+
+TOPIC_CATALOG: Tuple[CatalogTopic, ...] = _build_catalog()
+
+
+def _group(key_of) -> Mapping:
+    groups = {}
+    for entry in TOPIC_CATALOG:
+        groups.setdefault(key_of(entry), []).append(entry)
+    return MappingProxyType({key: tuple(entries) for key, entries in groups.items()})
+
+
+TOPICS_BY_ID: Mapping[str, CatalogTopic] = MappingProxyType({entry.id: entry for entry in TOPIC_CATALOG})
+# (sınav, normalize ders) -> konular, katalog sırasıyla
+TOPICS_BY_SUBJECT: Mapping[Tuple[str, str], Tuple[CatalogTopic, ...]] = _group(
+    lambda entry: (entry.exam, normalize_name(entry.subject))
+)
+# normalize konu adı -> o adı taşıyan konular (farklı sınav/derslerde tekrar edebilir)
+TOPICS_BY_NAME: Mapping[str, Tuple[CatalogTopic, ...]] = _group(lambda entry: normalize_name(entry.topic))
+
+
+def _bolum_template(bolum: Optional[str]) -> Tuple[Mapping, ...]:
+    rows = []
+    sources = [("TYT", TYT_TOPICS)]
+    if bolum in _AYT_BY_BOLUM:
+        sources.append(("AYT", _AYT_BY_BOLUM[bolum]))
+    for exam, subjects in sources:
+        for subject, topics in subjects.items():
+            for topic in topics:
+                rows.append(MappingProxyType({
+                    "ders": f"{exam} - {subject}",
+                    "konu": topic,
+                    "durum": "baslanmadi",
+                    "sinav_turu": exam,
+                    "order_index": len(rows)
+                }))
+    return tuple(rows)
+
+
+# bölüm -> topics tablosu satır şablonları (id ve student_id hariç); None = sadece TYT
+BOLUM_TEMPLATES: Mapping[Optional[str], Tuple[Mapping, ...]] = MappingProxyType(
+    {bolum: _bolum_template(bolum) for bolum in (None, *BOLUMLER)}
+)
+
+
+def normalize_bolum(bolum: Optional[str]) -> Optional[str]:
+    """Serbest yazılmış bölümü ("sayisal", "EŞİT AĞIRLIK") kanonik ada çevirir, tanınmazsa None"""
+    folded = normalize_name(bolum or "")
+    if "sayisal" in folded:
+        return "Sayısal"
+    if "esit" in folded:
+        return "Eşit Ağırlık"
+    if "sozel" in folded:
+        return "Sözel"
+    return None
+
+
+def parse_lesson(lesson: str) -> Tuple[Optional[str], str]:
+    """ "TYT Matematik" / "AYT - Fizik" -> ("TYT", "Matematik"); öneksiz ders -> (None, ders)"""
+    match = re.match(r"\s*(TYT|AYT)\b[\s\-:]*(.*)", lesson or "", re.IGNORECASE)
+    if match:
+        return match.group(1).upper(), match.group(2).strip()
+    return None, (lesson or "").strip()
+
+
+def find_topic(name: str, subject: Optional[str] = None, exam: Optional[str] = None) -> Optional[CatalogTopic]:
+    """
+    Konu adını kataloğa çözümler (yazım/harf farkına duyarsız)
+
+    subject "TYT Matematik" gibi sınav önekli olabilir. Aynı ad birden fazla
+    ders/sınavda varsa subject ve exam ile daraltılır; yine de birden fazla
+    aday kalırsa ilki (katalog sırası) döner.
+    """
+    candidates = TOPICS_BY_NAME.get(normalize_name(name or ""))
+    if not candidates:
+        return None
+
+    if subject:
+        lesson_exam, subject = parse_lesson(subject)
+        exam = exam or lesson_exam
+        subject_key = normalize_name(subject)
+        candidates = tuple(entry for entry in candidates if normalize_name(entry.subject) == subject_key) or candidates
+    if exam:
+        candidates = tuple(entry for entry in candidates if entry.exam == exam.upper()) or candidates
+    return candidates[0]
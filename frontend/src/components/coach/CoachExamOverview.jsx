@@ -12,6 +12,8 @@ import {
 } from '@/components/ui/dialog';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const ANALYSIS_POLL_MS = 3000;
+const ANALYSIS_MAX_WAIT_MS = 5 * 60 * 1000;
 
 export default function CoachExamOverview() {
   const [exams, setExams] = useState([]);
@@ -35,13 +37,45 @@ export default function CoachExamOverview() {
     }
   };
 
+  const waitForAnalysisJob = async (jobId, uploadId) => {
+    // Analiz kuyrukta çalışır; iş bitene kadar (en fazla ANALYSIS_MAX_WAIT_MS)
+    // durumunu yokla. İş başka sunucu örneğindeyse durum upload'dan okunur.
+    const deadline = Date.now() + ANALYSIS_MAX_WAIT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, ANALYSIS_POLL_MS));
+      try {
+        const response = await axios.get(`${BACKEND_URL}/api/exam/analysis-jobs/${jobId}`, {
+          params: { upload_id: uploadId }
+        });
+        if (response.data.status === 'completed' || response.data.status === 'failed') {
+          return response.data;
+        }
+      } catch (error) {
+        if (error.response?.status === 404) {
+          return { status: 'failed', error: 'Analiz işi bulunamadı' };
+        }
+        throw error;
+      }
+    }
+    return { status: 'timeout' };
+  };
+
   const triggerAnalysis = async (uploadId) => {
     setAnalyzingId(uploadId);
     try {
       const response = await axios.post(`${BACKEND_URL}/api/exam/trigger-analysis/${uploadId}`);
       
       if (response.data.success) {
-        toast.success('AI analizi tamamlandı!');
+        toast.info('AI analizi kuyruğa alındı');
+        fetchExams();
+        const job = await waitForAnalysisJob(response.data.job_id, uploadId);
+        if (job.status === 'completed') {
+          toast.success('AI analizi tamamlandı!');
+        } else if (job.status === 'timeout') {
+          toast.info('Analiz hâlâ sürüyor, liste daha sonra güncellenecek');
+        } else {
+          toast.error('Analiz hatası: ' + job.error);
+        }
         fetchExams(); // Listeyi yenile
       }
     } catch (error) {
@@ -133,6 +167,10 @@ export default function CoachExamOverview() {
                   <span className="px-3 py-1 bg-yellow-100 text-yellow-700 text-xs rounded-full font-semibold">
                     Analiz Bekliyor
                   </span>
+                ) : upload.analysis_status === 'queued' || upload.analysis_status === 'running' ? (
+                  <span className="px-3 py-1 bg-purple-100 text-purple-700 text-xs rounded-full font-semibold">
+                    {upload.analysis_status === 'queued' ? 'Analiz Sırada' : 'Analiz Ediliyor'}
+                  </span>
                 ) : upload.analysis_status === 'completed' ? (
                   <span className="px-3 py-1 bg-green-100 text-green-700 text-xs rounded-full font-semibold">
                     ✓ Tamamlandı
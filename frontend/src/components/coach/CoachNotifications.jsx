@@ -16,6 +16,16 @@ export default function CoachNotifications() {
     fetchNotifications();
   }, [filter]);
 
+  // Yeni bildirimler sunucudan canlı gelir (her iki filtrede de okunmamıştır)
+  useEffect(() => {
+    const source = new EventSource(`${BACKEND_URL}/api/notifications/coach/stream`);
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+    });
+    return () => source.close();
+  }, []);
+
   const fetchNotifications = async () => {
     try {
       const unreadOnly = filter === 'unread';
@@ -16,6 +16,19 @@ export default function Notifications({ studentId }) {
     fetchNotifications();
   }, [studentId]);
 
+  // Yeni bildirimler ve okunmamış sayısı sunucudan canlı gelir
+  useEffect(() => {
+    const source = new EventSource(`${BACKEND_URL}/api/notifications/${studentId}/stream`);
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+    });
+    source.addEventListener('unread', (event) => {
+      setUnreadCount(JSON.parse(event.data).unread);
+    });
+    return () => source.close();
+  }, [studentId]);
+
   const fetchNotifications = async () => {
     try {
       const response = await axios.get(`${BACKEND_URL}/api/student/${studentId}/notifications`);
@@ -61,10 +61,8 @@ export default function CoachDashboard() {
       return;
     }
     try {
-      const response = await axios.post(`${BACKEND_URL}/api/students`, newStudent);
-      // Initialize topics - URL encode the bolum parameter
-      const encodedBolum = encodeURIComponent(newStudent.bolum);
-      await axios.post(`${BACKEND_URL}/api/topics/init/${response.data.id}?bolum=${encodedBolum}`);
+      // Öğrenci + bölüm konuları tek istekte
+      await axios.post(`${BACKEND_URL}/api/students/onboard`, newStudent);
       toast.success('Öğrenci başarıyla eklendi!');
       setOpenDialog(false);
       setNewStudent({ ad: '', soyad: '', bolum: 'Sayısal', hedef: '', notlar: '' });
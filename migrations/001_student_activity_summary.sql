@@ -0,0 +1,25 @@
+-- Koç Paneli: Öğrenci Aktivite Özeti (tek sorguda gruplanmış toplamlar)
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Kullanım: GET /api/coach/students-analysis -> rpc('student_activity_summary')
+
+CREATE OR REPLACE FUNCTION student_activity_summary(since DATE DEFAULT NULL)
+RETURNS TABLE (
+    student_id VARCHAR,
+    total_solved BIGINT,
+    total_correct BIGINT,
+    last_activity DATE
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        st.student_id,
+        COALESCE(SUM(st.solved), 0)::BIGINT AS total_solved,
+        COALESCE(SUM(st.correct), 0)::BIGINT AS total_correct,
+        MAX(st.date) AS last_activity
+    FROM soru_takip st
+    WHERE since IS NULL OR st.date >= since
+    GROUP BY st.student_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION student_activity_summary(DATE) TO anon, authenticated;
@@ -0,0 +1,150 @@
+-- Soru Takip Günlük Özet Tablosu (student_id, date, lesson)
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- soru_takip'e yapılan her INSERT/UPDATE/DELETE, trigger ile bu tabloya
+-- fark (delta) olarak yansır. Raporlar ham satırlar yerine bu tabloyu okur.
+
+-- 1. Özet tablosu
+CREATE TABLE IF NOT EXISTS soru_takip_daily (
+    student_id VARCHAR(255) NOT NULL,
+    date DATE NOT NULL,
+    lesson VARCHAR(100) NOT NULL,
+    solved INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    wrong INTEGER NOT NULL DEFAULT 0,
+    blank INTEGER NOT NULL DEFAULT 0,
+    entries INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (student_id, date, lesson)
+);
+
+-- 2. Delta uygulayan yardımcı fonksiyon
+CREATE OR REPLACE FUNCTION soru_takip_rollup_apply(
+    p_student_id VARCHAR,
+    p_date DATE,
+    p_lesson VARCHAR,
+    p_solved INTEGER,
+    p_correct INTEGER,
+    p_wrong INTEGER,
+    p_blank INTEGER,
+    p_entries INTEGER
+)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO soru_takip_daily AS d (student_id, date, lesson, solved, correct, wrong, blank, entries)
+    VALUES (p_student_id, p_date, p_lesson, p_solved, p_correct, p_wrong, p_blank, p_entries)
+    ON CONFLICT (student_id, date, lesson) DO UPDATE SET
+        solved = d.solved + EXCLUDED.solved,
+        correct = d.correct + EXCLUDED.correct,
+        wrong = d.wrong + EXCLUDED.wrong,
+        blank = d.blank + EXCLUDED.blank,
+        entries = d.entries + EXCLUDED.entries,
+        updated_at = NOW();
+$$;
+
+-- SECURITY DEFINER: istemciler /rpc ile çağırıp özet tabloya keyfi delta
+-- yazamasın; sadece trigger (sahibinin yetkisiyle) çağırır
+REVOKE EXECUTE ON FUNCTION soru_takip_rollup_apply(VARCHAR, DATE, VARCHAR, INTEGER, INTEGER, INTEGER, INTEGER, INTEGER)
+    FROM PUBLIC, anon, authenticated;
+
+-- 3. soru_takip trigger'ı (ekleme, düzenleme ve silmede artımlı güncelleme)
+CREATE OR REPLACE FUNCTION soru_takip_rollup_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM soru_takip_rollup_apply(
+            OLD.student_id, OLD.date, OLD.lesson,
+            -COALESCE(OLD.solved, 0), -COALESCE(OLD.correct, 0),
+            -COALESCE(OLD.wrong, 0), -COALESCE(OLD.blank, 0), -1
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM soru_takip_rollup_apply(
+            NEW.student_id, NEW.date, NEW.lesson,
+            COALESCE(NEW.solved, 0), COALESCE(NEW.correct, 0),
+            COALESCE(NEW.wrong, 0), COALESCE(NEW.blank, 0), 1
+        );
+    END IF;
+
+    -- Boşalan kovaları temizle
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM soru_takip_daily
+        WHERE student_id = OLD.student_id
+          AND date = OLD.date
+          AND lesson = OLD.lesson
+          AND entries <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+-- 4. Trigger'ı bağla ve mevcut verileri aktar: tek transaction, tablo
+--    kilitli. Arada yazılan bir satır ne aktarımda eksik kalır ne de iki
+--    kez sayılır; aktarım kovaları kaynaktan yeniden hesaplayıp üzerine
+--    yazar (tekrar çalıştırmak da güvenlidir).
+BEGIN;
+
+LOCK TABLE soru_takip IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS trg_soru_takip_rollup ON soru_takip;
+CREATE TRIGGER trg_soru_takip_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON soru_takip
+    FOR EACH ROW EXECUTE FUNCTION soru_takip_rollup_trigger();
+
+INSERT INTO soru_takip_daily (student_id, date, lesson, solved, correct, wrong, blank, entries)
+SELECT
+    student_id, date, lesson,
+    COALESCE(SUM(solved), 0), COALESCE(SUM(correct), 0),
+    COALESCE(SUM(wrong), 0), COALESCE(SUM(blank), 0), COUNT(*)
+FROM soru_takip
+GROUP BY student_id, date, lesson
+ON CONFLICT (student_id, date, lesson) DO UPDATE SET
+    solved = EXCLUDED.solved,
+    correct = EXCLUDED.correct,
+    wrong = EXCLUDED.wrong,
+    blank = EXCLUDED.blank,
+    entries = EXCLUDED.entries,
+    updated_at = NOW();
+
+-- Kaynakta artık satırı olmayan kovalar
+DELETE FROM soru_takip_daily d
+WHERE NOT EXISTS (
+    SELECT 1 FROM soru_takip s
+    WHERE s.student_id = d.student_id AND s.date = d.date AND s.lesson = d.lesson
+);
+
+COMMIT;
+
+-- 5. Koç özeti artık özet tablosundan okunur (bkz. 001)
+CREATE OR REPLACE FUNCTION student_activity_summary(since DATE DEFAULT NULL)
+RETURNS TABLE (
+    student_id VARCHAR,
+    total_solved BIGINT,
+    total_correct BIGINT,
+    last_activity DATE
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        d.student_id,
+        COALESCE(SUM(d.solved), 0)::BIGINT AS total_solved,
+        COALESCE(SUM(d.correct), 0)::BIGINT AS total_correct,
+        MAX(d.date) AS last_activity
+    FROM soru_takip_daily d
+    WHERE since IS NULL OR d.date >= since
+    GROUP BY d.student_id;
+$$;
+
+-- 6. RLS (yazma sadece trigger üzerinden)
+ALTER TABLE soru_takip_daily ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Enable read access for all users" ON soru_takip_daily;
+CREATE POLICY "Enable read access for all users" ON soru_takip_daily FOR SELECT USING (true);
@@ -0,0 +1,9 @@
+-- Deneme Analizi Kuyruk Durumları
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- AI analizi artık kuyruk üzerinden çalışır; exam_uploads.analysis_status
+-- pending -> queued -> running -> completed / failed akışını izler.
+
+ALTER TABLE exam_uploads DROP CONSTRAINT IF EXISTS exam_uploads_analysis_status_check;
+
+ALTER TABLE exam_uploads ADD CONSTRAINT exam_uploads_analysis_status_check
+    CHECK (analysis_status IN ('pending', 'queued', 'running', 'completed', 'failed'));
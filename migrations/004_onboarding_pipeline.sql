@@ -0,0 +1,102 @@
+-- Öğrenci Onboarding Pipeline (öğrenci + konu şablonu + profil tek işlemde)
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- topics tablosuna (student_id, ders, konu) tekilliği eklenir; böylece konu
+-- başlatma kaç kez çalışırsa çalışsın müfredat tekrar etmez.
+
+-- 1. Mevcut tekrarları temizle: her (student_id, ders, konu) için ilerlemesi
+--    olan (durum != 'baslanmadi'), yoksa en eski kayıt kalır
+DELETE FROM topics
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY student_id, ders, konu
+            ORDER BY (durum <> 'baslanmadi') DESC, created_at, id
+        ) AS rn
+        FROM topics
+    ) ranked
+    WHERE rn > 1
+);
+
+ALTER TABLE topics DROP CONSTRAINT IF EXISTS topics_student_ders_konu_key;
+ALTER TABLE topics ADD CONSTRAINT topics_student_ders_konu_key UNIQUE (student_id, ders, konu);
+
+-- 2. Toplu onboarding: tüm sınıf tek çağrıda, tek transaction içinde
+--
+-- p_students: [{id?, ad, soyad, bolum, hedef, notlar, token, template,
+--               onboarding?: {sinif, hedef_siralama, ...}}]
+-- p_templates: {template: [{ders, konu, sinav_turu, order_index}]}
+--
+-- Tekrar çalıştırmak güvenlidir: id'si verilen öğrenci varsa yeniden
+-- oluşturulmaz, profil alanları (ad, soyad, bolum, hedef, notlar) güncellenir
+-- (token değişmez), var olan konular atlanır, hoş geldin bildirimi sadece
+-- onboarding ilk kez tamamlandığında gönderilir.
+CREATE OR REPLACE FUNCTION onboard_students(p_students JSONB, p_templates JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    s JSONB;
+    o JSONB;
+    v_id UUID;
+    v_topics INTEGER;
+    v_onboarded BOOLEAN;
+    v_result JSONB := '[]'::jsonb;
+BEGIN
+    FOR s IN SELECT * FROM jsonb_array_elements(p_students) LOOP
+        v_id := COALESCE(NULLIF(s->>'id', '')::uuid, gen_random_uuid());
+
+        INSERT INTO students (id, ad, soyad, bolum, hedef, notlar, token)
+        VALUES (v_id, s->>'ad', s->>'soyad', s->>'bolum', s->>'hedef', s->>'notlar', s->>'token')
+        ON CONFLICT (id) DO UPDATE SET
+            ad = EXCLUDED.ad,
+            soyad = EXCLUDED.soyad,
+            bolum = EXCLUDED.bolum,
+            hedef = EXCLUDED.hedef,
+            notlar = EXCLUDED.notlar;
+
+        INSERT INTO topics (student_id, ders, konu, durum, sinav_turu, order_index)
+        SELECT v_id, t.ders, t.konu, 'baslanmadi', t.sinav_turu, t.order_index
+        FROM jsonb_to_recordset(COALESCE(p_templates -> (s->>'template'), '[]'::jsonb))
+            AS t(ders TEXT, konu TEXT, sinav_turu TEXT, order_index INTEGER)
+        ON CONFLICT (student_id, ders, konu) DO NOTHING;
+        GET DIAGNOSTICS v_topics = ROW_COUNT;
+
+        v_onboarded := FALSE;
+        o := s->'onboarding';
+        IF o IS NOT NULL AND jsonb_typeof(o) = 'object' THEN
+            UPDATE students SET
+                onboarding_completed = TRUE,
+                sinif = o->>'sinif',
+                hedef_siralama = (o->>'hedef_siralama')::integer,
+                gunluk_calisma_suresi = (o->>'gunluk_calisma_suresi')::integer,
+                guclu_dersler = ARRAY(SELECT jsonb_array_elements_text(COALESCE(o->'guclu_dersler', '[]'::jsonb))),
+                zayif_dersler = ARRAY(SELECT jsonb_array_elements_text(COALESCE(o->'zayif_dersler', '[]'::jsonb))),
+                deneme_ortalamasi = (o->>'deneme_ortalamasi')::decimal,
+                kullanilan_kaynaklar = ARRAY(SELECT jsonb_array_elements_text(COALESCE(o->'kullanilan_kaynaklar', '[]'::jsonb))),
+                program_onceligi = o->>'program_onceligi'
+            WHERE id = v_id AND onboarding_completed IS NOT TRUE;
+
+            IF FOUND THEN
+                v_onboarded := TRUE;
+                INSERT INTO notifications (user_id, type, title, message, is_read)
+                VALUES (
+                    v_id::text, 'success', 'Hoş Geldin!',
+                    'Profilin tamamlandı. Artık kişiselleştirilmiş çalışma planına erişebilirsin.',
+                    FALSE
+                );
+            END IF;
+        END IF;
+
+        v_result := v_result || jsonb_build_array(
+            (SELECT to_jsonb(st) FROM (
+                SELECT id, ad, soyad, bolum, hedef, notlar, token, onboarding_completed
+                FROM students WHERE id = v_id
+            ) st) || jsonb_build_object('topics_created', v_topics, 'onboarded', v_onboarded)
+        );
+    END LOOP;
+
+    RETURN v_result;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION onboard_students(JSONB, JSONB) TO anon, authenticated;
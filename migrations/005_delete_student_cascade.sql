@@ -0,0 +1,108 @@
+-- Öğrenci Silme: Cascade FK'lar + tek çağrılık delete_student RPC
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Eski silme akışı sadece 5 tabloyu temizliyordu; soru_takip, bildirimler,
+-- deneme kayıtları vb. yetim kalıp rapor sorgularının taradığı tabloları
+-- şişiriyordu.
+
+-- 1. Mevcut yetim kayıtları temizle
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'topics', 'tasks', 'exams', 'calendar_notes', 'exam_analysis', 'exam_uploads',
+        'topic_progress', 'brans_tarama', 'task_pool'
+    ] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %I WHERE student_id IS NOT NULL AND student_id NOT IN (SELECT id FROM students)', t);
+        END IF;
+    END LOOP;
+
+    -- student_id'si VARCHAR olan tablolar (FK eklenemez, RPC açıkça siler)
+    FOREACH t IN ARRAY ARRAY['soru_takip', 'soru_takip_daily', 'students_sources', 'weekly_plan'] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %I WHERE student_id NOT IN (SELECT id::text FROM students)', t);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Öğrenci bildirimleri (koç bildirimleri user_id = 'coach', dokunulmaz)
+DELETE FROM notifications
+WHERE user_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+  AND user_id NOT IN (SELECT id::text FROM students);
+
+-- 2. UUID student_id kolonlarında ON DELETE CASCADE garanti altına al
+DO $$
+DECLARE
+    t TEXT;
+    c TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'topics', 'tasks', 'exams', 'calendar_notes', 'exam_analysis', 'exam_uploads',
+        'topic_progress', 'brans_tarama', 'task_pool'
+    ] LOOP
+        IF to_regclass(t) IS NULL THEN
+            CONTINUE;
+        END IF;
+
+        FOR c IN
+            SELECT con.conname
+            FROM pg_constraint con
+            JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY (con.conkey)
+            WHERE con.conrelid = t::regclass AND con.contype = 'f' AND att.attname = 'student_id'
+        LOOP
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', t, c);
+        END LOOP;
+
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE',
+            t, t || '_student_id_fkey'
+        );
+    END LOOP;
+END $$;
+
+-- 3. Tek çağrıda öğrenci ve tüm bağlı kayıtlarını sil, tablo bazlı sayıları dön
+-- Cascade'li tablolar da sayım için açıkça silinir (aynı transaction).
+CREATE OR REPLACE FUNCTION delete_student(p_student_id UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    t TEXT;
+    n INTEGER;
+    v_counts JSONB := '{}'::jsonb;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'topics', 'tasks', 'exams', 'calendar_notes', 'exam_analysis', 'exam_uploads',
+        'topic_progress', 'brans_tarama', 'task_pool'
+    ] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %I WHERE student_id = $1', t) USING p_student_id;
+            GET DIAGNOSTICS n = ROW_COUNT;
+            v_counts := v_counts || jsonb_build_object(t, n);
+        END IF;
+    END LOOP;
+
+    -- soru_takip silinirken rollup trigger'ı soru_takip_daily'yi de boşaltır;
+    -- ardından kalan özet satırları (varsa) silinir
+    FOREACH t IN ARRAY ARRAY['soru_takip', 'soru_takip_daily', 'students_sources', 'weekly_plan'] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DELETE FROM %I WHERE student_id = $1', t) USING p_student_id::text;
+            GET DIAGNOSTICS n = ROW_COUNT;
+            v_counts := v_counts || jsonb_build_object(t, n);
+        END IF;
+    END LOOP;
+
+    DELETE FROM notifications WHERE user_id = p_student_id::text;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    v_counts := v_counts || jsonb_build_object('notifications', n);
+
+    DELETE FROM students WHERE id = p_student_id;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    v_counts := v_counts || jsonb_build_object('students', n);
+
+    RETURN v_counts;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION delete_student(UUID) TO anon, authenticated;
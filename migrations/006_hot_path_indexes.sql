@@ -0,0 +1,61 @@
+-- Sıcak Sorgu Yolları için Bileşik ve Kısmi İndeksler
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Her indeks server.py'deki bir sorgunun filtre + sıralamasına birebir karşılık
+-- gelir. Etkisi migrations/check_query_plans.py ile yerel Postgres'te görülebilir.
+-- Yeni bileşik indekslerin ön eki olan tek kolonlu indeksler kaldırılır
+-- (yazma maliyeti, aynı işi yapan iki indeks).
+
+-- Soru takip: öğrenci + tarih aralığı, tarihe göre azalan
+-- GET /student/{id}/soru-takip?start_date&end_date
+CREATE INDEX IF NOT EXISTS idx_soru_takip_student_date ON soru_takip(student_id, date DESC);
+DROP INDEX IF EXISTS idx_soru_takip_student;
+
+-- Günlük özet: öğrenci bazlı aralıklar PK (student_id, date, lesson) ile karşılanır;
+-- koç haftalık özeti tüm öğrencilerde son 2 haftayı tarar
+CREATE INDEX IF NOT EXISTS idx_soru_takip_daily_date ON soru_takip_daily(date);
+
+-- Bildirimler: kullanıcı + en yeniler önce (LIMIT 50/100)
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_id, created_at DESC);
+-- Okunmamış bildirimler: sadece is_read = false satırlarını tutan küçük indeks
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread ON notifications(user_id, created_at DESC)
+    WHERE is_read = FALSE;
+DROP INDEX IF EXISTS idx_notifications_user;
+DROP INDEX IF EXISTS idx_notifications_read;
+
+-- Görevler: öğrenci + tarih (aralık veya eşitlik), order_index ile sıralı
+CREATE INDEX IF NOT EXISTS idx_tasks_student_tarih ON tasks(student_id, tarih, order_index);
+DROP INDEX IF EXISTS idx_tasks_student_id;
+
+-- Konular: öğrencinin konuları order_index sırasıyla
+-- (topics_student_ders_konu_key tekilliği sıralamayı karşılamaz)
+CREATE INDEX IF NOT EXISTS idx_topics_student_order ON topics(student_id, order_index);
+DROP INDEX IF EXISTS idx_topics_student_id;
+
+-- Denemeler (eski tablo): öğrenci, tarihe göre azalan
+CREATE INDEX IF NOT EXISTS idx_exams_student_tarih ON exams(student_id, tarih DESC);
+DROP INDEX IF EXISTS idx_exams_student_id;
+
+-- Takvim notları: öğrenci, tarihe göre
+CREATE INDEX IF NOT EXISTS idx_calendar_notes_student_date ON calendar_notes(student_id, date);
+DROP INDEX IF EXISTS idx_calendar_notes_student_id;
+
+-- Branş tarama: öğrenci, tarihe göre azalan
+CREATE INDEX IF NOT EXISTS idx_brans_tarama_student_date ON brans_tarama(student_id, date DESC);
+DROP INDEX IF EXISTS idx_brans_tarama_student;
+
+-- Deneme yüklemeleri: öğrenci sayfası ve koç sayfası created_at cursor'ı ile
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_student_created ON exam_uploads(student_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_created ON exam_uploads(created_at DESC);
+-- Analiz kuyruğu: sadece bekleyenler, en eskiden
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_pending ON exam_uploads(created_at)
+    WHERE analysis_status = 'pending';
+DROP INDEX IF EXISTS idx_exam_uploads_student;
+DROP INDEX IF EXISTS idx_exam_uploads_status;
+
+-- Deneme analizi: upload_id ile birleştirme (in_ listesi) ve öğrenci konu geçmişi
+CREATE INDEX IF NOT EXISTS idx_exam_analysis_upload ON exam_analysis(upload_id);
+CREATE INDEX IF NOT EXISTS idx_exam_analysis_student_created ON exam_analysis(student_id, created_at);
+DROP INDEX IF EXISTS idx_exam_analysis_student;
+
+ANALYZE soru_takip, soru_takip_daily, notifications, tasks, topics, exams,
+    calendar_notes, brans_tarama, exam_uploads, exam_analysis;
@@ -0,0 +1,33 @@
+-- Keyset Sayfalama için İndeks Sıralamaları
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Liste endpoint'leri artık (sıralama kolonları..., id) ile sıralanıp
+-- ?cursor= ile sayfalanıyor. 006'daki indekslere id eklenir; böylece her
+-- sayfa ek sıralama (Incremental Sort) olmadan indeksten okunur.
+
+-- Konular: order_index, id
+CREATE INDEX IF NOT EXISTS idx_topics_student_order_id ON topics(student_id, order_index, id);
+DROP INDEX IF EXISTS idx_topics_student_order;
+
+-- Görevler: tarih, order_index, id
+-- (son 7 gün / günün görevleri sorguları aynı ön eki kullanır)
+CREATE INDEX IF NOT EXISTS idx_tasks_student_tarih_id ON tasks(student_id, tarih, order_index, id);
+DROP INDEX IF EXISTS idx_tasks_student_tarih;
+
+-- Denemeler (eski tablo): tarih, id azalan
+CREATE INDEX IF NOT EXISTS idx_exams_student_tarih_id ON exams(student_id, tarih DESC, id DESC);
+DROP INDEX IF EXISTS idx_exams_student_tarih;
+
+-- Soru takip ve branş tarama: date, id azalan
+CREATE INDEX IF NOT EXISTS idx_soru_takip_student_date_id ON soru_takip(student_id, date DESC, id DESC);
+DROP INDEX IF EXISTS idx_soru_takip_student_date;
+CREATE INDEX IF NOT EXISTS idx_brans_tarama_student_date_id ON brans_tarama(student_id, date DESC, id DESC);
+DROP INDEX IF EXISTS idx_brans_tarama_student_date;
+
+-- Bildirimler: created_at, id azalan (tümü ve sadece okunmamışlar)
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created_id ON notifications(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread_id ON notifications(user_id, created_at DESC, id DESC)
+    WHERE is_read = FALSE;
+DROP INDEX IF EXISTS idx_notifications_user_created;
+DROP INDEX IF EXISTS idx_notifications_user_unread;
+
+ANALYZE topics, tasks, exams, soru_takip, brans_tarama, notifications;
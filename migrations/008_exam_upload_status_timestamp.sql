@@ -0,0 +1,18 @@
+-- Deneme Analizi Durum Zamanı
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Analiz kuyruğu sunucu örneğinin belleğinde tutulur; örnek kapanırsa
+-- (serverless) queued/running kalan denemeleri işleyen kalmaz.
+-- analysis_updated_at her durum değişikliğinde uygulama tarafından yazılır;
+-- trigger-analysis-pending ANALYSIS_STALE_SECONDS'tan eski queued/running
+-- kayıtları da yeniden kuyruğa alır.
+
+ALTER TABLE exam_uploads ADD COLUMN IF NOT EXISTS analysis_updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+UPDATE exam_uploads SET analysis_updated_at = created_at;
+
+-- 006'daki kısmi indeks yerine: bekleyenler ve takılı kalanlar, en eskiden
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_unfinished ON exam_uploads(created_at)
+    WHERE analysis_status IN ('pending', 'queued', 'running');
+DROP INDEX IF EXISTS idx_exam_uploads_pending;
+
+ANALYZE exam_uploads;
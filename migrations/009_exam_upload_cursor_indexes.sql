@@ -0,0 +1,13 @@
+-- Deneme Listeleri için Keyset İndeksleri
+-- Bu dosya Supabase SQL Editor'da manuel olarak uygulanmalıdır
+-- Öğrenci deneme listesi ve koç deneme sayfası artık (created_at, id)
+-- azalan sırayla ve opak ?cursor= ile sayfalanıyor; aynı created_at'e sahip
+-- kayıtlar sayfa sınırında atlanmaz. 006'daki indekslere id eklenir.
+
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_student_created_id ON exam_uploads(student_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_exam_uploads_student_created;
+
+CREATE INDEX IF NOT EXISTS idx_exam_uploads_created_id ON exam_uploads(created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_exam_uploads_created;
+
+ANALYZE exam_uploads;
@@ -0,0 +1,211 @@
+"""
+Sorgu Planı Kontrolü
+server.py'deki sıcak sorguların yerel bir Postgres'te hangi planla çalıştığını
+gösterir (Seq Scan mı, indeks mi).
+
+Her şey tek transaction içinde çalışır ve sonunda geri alınır; veritabanı
+değişmeden kalır.
+
+Kullanım:
+    # Şema kurulu yerel veritabanında, sentetik veriyle, migration öncesi/sonrası
+    python migrations/check_query_plans.py --dsn postgresql://localhost/db \\
+        --seed 300 --apply-migration migrations/007_keyset_pagination_indexes.sql
+
+    # Migration zaten uygulanmışsa sadece mevcut planlar
+    python migrations/check_query_plans.py --seed 300 --strict
+
+Gerekli: psycopg2 (pip install psycopg2-binary) - sadece bu script için.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import psycopg2
+except ImportError:
+    sys.exit("psycopg2 gerekli: pip install psycopg2-binary")
+
+# (ad, tablo, sorgu) - server.py'deki filtre ve sıralamalarla aynı
+HOT_QUERIES = [
+    ("soru takip aralığı", "soru_takip",
+     "SELECT * FROM soru_takip WHERE student_id = %(sid)s AND date >= %(month_ago)s AND date <= %(today)s ORDER BY date DESC, id DESC LIMIT 500"),
+    ("rapor (günlük özet)", "soru_takip_daily",
+     "SELECT date, lesson, solved, correct, wrong, blank, entries FROM soru_takip_daily "
+     "WHERE student_id = %(sid)s AND date >= %(week_ago)s AND date <= %(today)s ORDER BY date, lesson"),
+    ("koç haftalık özeti", "soru_takip_daily",
+     "SELECT student_id, date, solved, correct FROM soru_takip_daily WHERE date >= %(two_weeks_ago)s "
+     "ORDER BY student_id, date, lesson"),
+    ("bildirimler", "notifications",
+     "SELECT * FROM notifications WHERE user_id = %(sid)s ORDER BY created_at DESC, id DESC LIMIT 50"),
+    ("okunmamış bildirimler", "notifications",
+     "SELECT * FROM notifications WHERE user_id = %(sid)s AND is_read = FALSE ORDER BY created_at DESC, id DESC LIMIT 50"),
+    ("görevler", "tasks",
+     "SELECT * FROM tasks WHERE student_id = %(sid)s ORDER BY tarih, order_index, id LIMIT 1000"),
+    ("son 7 gün görevleri", "tasks",
+     "SELECT tarih, sure, completed FROM tasks WHERE student_id = %(sid)s AND tarih >= %(week_ago)s AND tarih <= %(today)s"),
+    ("günün görevleri", "tasks",
+     "SELECT completed FROM tasks WHERE student_id = %(sid)s AND tarih = %(today)s"),
+    ("konular", "topics",
+     "SELECT * FROM topics WHERE student_id = %(sid)s ORDER BY order_index, id LIMIT 1000"),
+    ("denemeler", "exams",
+     "SELECT * FROM exams WHERE student_id = %(sid)s ORDER BY tarih DESC, id DESC LIMIT 200"),
+    ("bildirimler (2. sayfa)", "notifications",
+     "SELECT * FROM notifications WHERE user_id = %(sid)s AND (created_at < %(now)s OR (created_at = %(now)s AND id < %(max_id)s)) "
+     "ORDER BY created_at DESC, id DESC LIMIT 50"),
+    ("takvim notları", "calendar_notes",
+     "SELECT * FROM calendar_notes WHERE student_id = %(sid)s ORDER BY date"),
+    ("branş tarama", "brans_tarama",
+     "SELECT * FROM brans_tarama WHERE student_id = %(sid)s ORDER BY date DESC, id DESC LIMIT 200"),
+    ("öğrenci deneme listesi", "exam_uploads",
+     "SELECT * FROM exam_uploads WHERE student_id = %(sid)s ORDER BY created_at DESC, id DESC LIMIT 100"),
+    ("koç deneme sayfası", "exam_uploads",
+     "SELECT * FROM exam_uploads WHERE (created_at < %(now)s OR (created_at = %(now)s AND id < %(max_id)s)) "
+     "ORDER BY created_at DESC, id DESC LIMIT 50"),
+    ("bekleyen analizler", "exam_uploads",
+     "SELECT id FROM exam_uploads WHERE analysis_status = 'pending' OR (analysis_status IN ('queued', 'running') "
+     "AND analysis_updated_at < now() - interval '900 seconds') ORDER BY created_at LIMIT 100"),
+    ("analiz birleştirme", "exam_analysis",
+     "SELECT id, upload_id, total_net FROM exam_analysis WHERE upload_id = ANY(%(upload_ids)s::uuid[])"),
+]
+
+SEED_SQL = """
+CREATE TEMP TABLE seed_students ON COMMIT DROP AS
+    SELECT gen_random_uuid() AS id, n FROM generate_series(1, %(students)s) AS n;
+
+INSERT INTO students (id, ad, bolum, token)
+    SELECT id, 'Öğrenci ' || n, 'Sayısal', 'seed-' || id FROM seed_students;
+
+INSERT INTO topics (student_id, ders, konu, sinav_turu, order_index)
+    SELECT s.id, 'TYT - Matematik', 'Konu ' || k, 'TYT', k FROM seed_students s, generate_series(1, 150) AS k;
+
+INSERT INTO tasks (student_id, aciklama, sure, tarih, gun, order_index, completed)
+    SELECT s.id, 'Görev', 30, current_date - (k / 2), 'Pzt', k %% 2, k %% 3 = 0
+    FROM seed_students s, generate_series(1, 120) AS k;
+
+INSERT INTO exams (student_id, tarih, sinav_tipi, ders, dogru, yanlis)
+    SELECT s.id, current_date - k * 7, 'TYT', 'Matematik', 20, 5 FROM seed_students s, generate_series(1, 10) AS k;
+
+INSERT INTO calendar_notes (student_id, date, note)
+    SELECT s.id, current_date + k, 'Not' FROM seed_students s, generate_series(1, 10) AS k;
+
+INSERT INTO brans_tarama (student_id, date, lesson, correct, wrong, blank, total)
+    SELECT s.id, current_date - k, 'Matematik', 10, 5, 5, 20 FROM seed_students s, generate_series(1, 10) AS k;
+
+INSERT INTO soru_takip (student_id, date, lesson, solved, correct, wrong, blank)
+    SELECT s.id::text, current_date - (k %% 60), 'TYT Matematik', 20, 12, 5, 3
+    FROM seed_students s, generate_series(1, 60) AS k;
+
+INSERT INTO notifications (user_id, type, title, message, is_read, created_at)
+    SELECT s.id::text, 'info', 'Bildirim', 'Mesaj', k %% 5 <> 0, now() - k * interval '1 hour'
+    FROM seed_students s, generate_series(1, 60) AS k;
+
+INSERT INTO exam_uploads (id, student_id, uploaded_by, file_type, exam_name, analysis_status, created_at)
+    SELECT gen_random_uuid(), s.id, 'student', 'manual', 'Deneme ' || k,
+           CASE WHEN k = 1 THEN 'pending' ELSE 'completed' END, now() - k * interval '3 days'
+    FROM seed_students s, generate_series(1, 8) AS k;
+
+INSERT INTO exam_analysis (upload_id, student_id, total_net)
+    SELECT u.id, u.student_id, 50 FROM exam_uploads u JOIN seed_students s ON s.id = u.student_id;
+"""
+
+
+def _plan_nodes(plan, found):
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        found.append(f"{node} {plan['Index Name']}")
+    elif "Relation Name" in plan and "Scan" in node:
+        found.append(f"{node} {plan['Relation Name']}")
+    for child in plan.get("Plans", []):
+        _plan_nodes(child, found)
+    return found
+
+
+def explain_all(cursor, params, analyze=False):
+    results = {}
+    for name, table, sql in HOT_QUERIES:
+        options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+        cursor.execute(f"EXPLAIN ({options}) {sql}", params)
+        explained = cursor.fetchone()[0][0]
+        nodes = _plan_nodes(explained["Plan"], [])
+        results[name] = {
+            "table": table,
+            "nodes": nodes,
+            "seq_scan": any(node == f"Seq Scan {table}" for node in nodes),
+            "cost": explained["Plan"]["Total Cost"],
+            "time_ms": explained.get("Execution Time")
+        }
+    return results
+
+
+def _describe(result):
+    text = ", ".join(result["nodes"]) or "-"
+    text += f"  (cost {result['cost']:.0f}"
+    if result["time_ms"] is not None:
+        text += f", {result['time_ms']:.2f} ms"
+    return text + ")"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sıcak sorguların planlarını göster")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL", "postgresql://postgres@localhost/postgres"))
+    parser.add_argument("--seed", type=int, default=0, help="Eklenecek sentetik öğrenci sayısı")
+    parser.add_argument("--apply-migration", help="Önce/sonra karşılaştırması için uygulanacak SQL dosyası")
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (gerçek süreler)")
+    parser.add_argument("--strict", action="store_true", help="Son planda Seq Scan kalırsa çıkış kodu 1")
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(args.dsn)
+    cursor = connection.cursor()
+    try:
+        if args.seed:
+            started = time.perf_counter()
+            cursor.execute(SEED_SQL, {"students": args.seed})
+            print(f"{args.seed} öğrencilik sentetik veri eklendi ({time.perf_counter() - started:.1f} s)")
+        cursor.execute("ANALYZE")
+
+        cursor.execute("SELECT id::text FROM students ORDER BY id LIMIT 1")
+        row = cursor.fetchone()
+        if row is None:
+            sys.exit("students tablosu boş: --seed ile veri ekleyin")
+        student_id = row[0]
+        cursor.execute("SELECT id::text FROM exam_uploads WHERE student_id::text = %s LIMIT 20", (student_id,))
+        today = date.today()
+        params = {
+            "sid": student_id,
+            "today": today,
+            "week_ago": today - timedelta(days=6),
+            "two_weeks_ago": today - timedelta(days=14),
+            "month_ago": today - timedelta(days=30),
+            "now": datetime.now(timezone.utc) - timedelta(hours=10),
+            "max_id": "ffffffff-ffff-ffff-ffff-ffffffffffff",
+            "upload_ids": [upload_id for (upload_id,) in cursor.fetchall()]
+        }
+
+        before = None
+        if args.apply_migration:
+            before = explain_all(cursor, params, args.analyze)
+            with open(args.apply_migration, encoding="utf-8") as migration:
+                cursor.execute(migration.read())
+            cursor.execute("ANALYZE")
+        after = explain_all(cursor, params, args.analyze)
+
+        for name, result in after.items():
+            print(f"\n{name} [{result['table']}]")
+            if before is not None:
+                print(f"  önce : {_describe(before[name])}")
+                print(f"  sonra: {_describe(result)}")
+            else:
+                print(f"  {_describe(result)}")
+
+        remaining = [name for name, result in after.items() if result["seq_scan"]]
+        print(f"\nSeq Scan kalan sorgular: {', '.join(remaining) if remaining else 'yok'}")
+        return 1 if args.strict and remaining else 0
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
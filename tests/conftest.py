@@ -0,0 +1,13 @@
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py import edilmeden önce: canlı Supabase yok, önbellek kapalı,
+# sorgu bütçeleri zorunlu
+os.environ.setdefault("SUPABASE_URL", "https://fake.supabase.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "fake-key")
+os.environ.setdefault("ANALYSIS_CACHE_PATH", "")
+os.environ["QUERY_BUDGET_ENFORCE"] = "1"
@@ -0,0 +1,120 @@
+"""
+Analiz kuyruğu testleri: akışla (kuyruk dışında) yapılan analiz upload'ı
+aktif iş olarak tutar, eşzamanlı tetikleme ikinci bir analiz başlatmaz.
+Worker'lar tetikleyen isteğin context'ini devralmaz; ölen bir sunucu
+örneğinde queued/running kalan denemeler süresi dolunca yeniden alınır.
+"""
+import asyncio
+import contextvars
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import server
+from analysis_queue import AnalysisQueue
+from fake_supabase import FakeSupabase
+
+
+def _queue(calls):
+    async def handler(upload_id):
+        calls.append(upload_id)
+        return {"upload_id": upload_id}
+
+    return AnalysisQueue(handler, workers=1, backoff=0)
+
+
+def test_claimed_upload_is_not_analyzed_twice():
+    calls = []
+
+    async def scenario():
+        queue = _queue(calls)
+        job = queue.claim("u1")
+        assert queue.claim("u1") is None
+        # Akış sürerken tetikleme mevcut işi döner, kuyruğa yeni iş girmez
+        assert queue.submit("u1") is job
+        await queue.join()
+        queue.release(job, result={"ok": True})
+        await queue.stop()
+        return job, queue
+
+    job, queue = asyncio.run(scenario())
+    assert calls == []
+    assert job["status"] == "completed"
+    assert queue.active_job("u1") is None
+
+
+def test_released_upload_can_be_queued_again():
+    calls = []
+
+    async def scenario():
+        queue = _queue(calls)
+        queue.release(queue.claim("u1"), error="Akış bağlantısı koptu")
+        queued = queue.submit("u1")
+        await queue.join()
+        await queue.stop()
+        return queued
+
+    queued = asyncio.run(scenario())
+    assert calls == ["u1"]
+    assert queued["status"] == "completed"
+
+
+def test_workers_do_not_inherit_request_context():
+    request_var = contextvars.ContextVar("request_var", default=None)
+    seen = []
+
+    async def handler(upload_id):
+        seen.append(request_var.get())
+        return {}
+
+    async def scenario():
+        queue = AnalysisQueue(handler, workers=1, backoff=0)
+        request_var.set("istek")
+        queue.submit("u1")
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert seen == [None]
+
+
+def _ago(**delta) -> str:
+    return (datetime.now(timezone.utc) - timedelta(**delta)).isoformat()
+
+
+def test_trigger_pending_reclaims_stale_uploads(monkeypatch):
+    fake = FakeSupabase()
+    fake.load({"exam_uploads": [
+        {"id": "pending", "student_id": "s1", "analysis_status": "pending", "analysis_updated_at": _ago(seconds=5)},
+        {"id": "stale-queued", "student_id": "s1", "analysis_status": "queued", "analysis_updated_at": _ago(hours=1)},
+        {"id": "stale-running", "student_id": "s1", "analysis_status": "running", "analysis_updated_at": _ago(hours=2)},
+        {"id": "fresh-running", "student_id": "s1", "analysis_status": "running", "analysis_updated_at": _ago(seconds=30)},
+        {"id": "done", "student_id": "s1", "analysis_status": "completed", "analysis_updated_at": _ago(hours=3)},
+    ]})
+    # Worker'sız kuyruk: işler sadece kaydedilir, analiz çalışmaz
+    monkeypatch.setattr(server, "supabase", fake.client())
+    monkeypatch.setattr(server, "analysis_queue", AnalysisQueue(server.run_exam_analysis, workers=0))
+
+    response = TestClient(server.app).post("/api/exam/trigger-analysis-pending")
+
+    assert response.status_code == 200, response.text
+    assert {job["upload_id"] for job in response.json()["jobs"]} == {"pending", "stale-queued", "stale-running"}
+    statuses = {row["id"]: row["analysis_status"] for row in fake.rows("exam_uploads")}
+    assert statuses["stale-running"] == "queued" and statuses["fresh-running"] == "running"
+
+
+def test_analysis_job_falls_back_to_persisted_status(monkeypatch):
+    # İş başka bir sunucu örneğinin belleğinde: durum exam_uploads'tan okunur
+    fake = FakeSupabase()
+    fake.load({"exam_uploads": [
+        {"id": "done", "student_id": "s1", "analysis_status": "completed"},
+        {"id": "broken", "student_id": "s1", "analysis_status": "failed"},
+    ]})
+    monkeypatch.setattr(server, "supabase", fake.client())
+    monkeypatch.setattr(server, "analysis_queue", AnalysisQueue(server.run_exam_analysis, workers=0))
+    client = TestClient(server.app)
+
+    assert client.get("/api/exam/analysis-jobs/j1?upload_id=done").json()["status"] == "completed"
+    assert client.get("/api/exam/analysis-jobs/j1?upload_id=broken").json()["error"]
+    assert client.get("/api/exam/analysis-jobs/j1?upload_id=yok").status_code == 404
+    assert client.get("/api/exam/analysis-jobs/j1").status_code == 404
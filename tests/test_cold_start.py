@@ -0,0 +1,67 @@
+"""
+Soğuk başlangıç testleri: server import'u `python -X importtime` ile yeni bir
+süreçte ölçülür. Ağır ve nadir kullanılan modüller import sırasında
+yüklenmemeli, toplam süre IMPORT_TIME_BUDGET_MS'i aşmamalıdır.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+
+from db import LazyDatabase
+from fake_supabase import FAKE_URL, FakeSupabase
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Yavaş CI makineleri için ortamdan gevşetilebilir
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# İlk kullanımda yüklenen paketler
+DEFERRED_PACKAGES = ("numpy", "postgrest", "emergentintegrations", "bcrypt")
+
+
+def _import_times():
+    """{modül adı: kümülatif süre (µs)}"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_server_import_defers_heavy_packages():
+    imported = {name.split(".")[0] for name in _import_times()}
+    assert not imported.intersection(DEFERRED_PACKAGES)
+
+
+def test_server_import_within_budget():
+    import_ms = _import_times()["server"] / 1000
+    assert import_ms <= IMPORT_TIME_BUDGET_MS, f"server import {import_ms:.0f} ms"
+
+
+def test_lazy_database_reuses_client_per_event_loop():
+    fake = FakeSupabase()
+    fake.load({"students": [{"id": "s1", "ad": "Ali", "bolum": "Sayısal"}]})
+    db = LazyDatabase(FAKE_URL, "fake-key", transport=httpx.MockTransport(fake.handle))
+
+    async def two_requests():
+        first = db.get()
+        await db.table("students").select("id").execute()
+        assert db.get() is first
+        return first
+
+    # Sıcak örnek aynı loop'ta istemciyi korur; yeni loop yeni havuz ister,
+    # eski istemcinin havuzu kapatılır
+    first = asyncio.run(two_requests())
+    second = asyncio.run(two_requests())
+    assert first is not second
+    assert first.http.is_closed and not second.http.is_closed
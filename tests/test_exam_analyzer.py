@@ -0,0 +1,205 @@
+"""
+Toplu deneme analizi testleri: sahte LLM (chat_factory) ile, emergentintegrations
+yüklenmeden. Bozuk/eksik toplu yanıt sadece ilgili denemeyi başarısız yapar;
+akışlı analiz sahte bir OpenAI uyumlu sağlayıcıdan parça parça okunur.
+"""
+import asyncio
+import json
+import sys
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+from exam_analyzer import ExamAnalyzer, exam_topic_records, score_topics, soru_takip_records, split_batch_response
+
+
+def _exam(name: str, correct: int = 20):
+    return {
+        "exam_name": name, "exam_type": "TYT",
+        "subjects": [{"name": "Matematik", "total": 40, "correct": correct, "wrong": 8, "blank": 40 - correct - 8}]
+    }
+
+
+class FakeChat:
+    def __init__(self, reply):
+        self.reply = reply
+        self.messages = []
+
+    async def send_message(self, message):
+        self.messages.append(message.text)
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return self.reply(message.text) if callable(self.reply) else self.reply
+
+
+class FakeLlm:
+    """chat_factory: her yeni sohbet aynı yanıt kuralını kullanır"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.chats = []
+
+    def __call__(self, session_id, system_message):
+        chat = FakeChat(self.reply)
+        self.chats.append(chat)
+        return chat
+
+
+@pytest.fixture(autouse=True)
+def no_llm_package(monkeypatch):
+    # Sahte LLM yolu gerçek paketi hiç import etmemeli
+    monkeypatch.setitem(sys.modules, "emergentintegrations", None)
+    monkeypatch.setitem(sys.modules, "emergentintegrations.llm", None)
+    monkeypatch.setitem(sys.modules, "emergentintegrations.llm.chat", None)
+
+
+def test_split_batch_response_skips_missing_empty_and_duplicate_sections():
+    response = (
+        "### DENEME 1\nBirinci analiz\n"
+        "### DENEME 3\n   \n"
+        "### DENEME 1\nTekrar\n"
+        "### DENEME 4\nFazladan\n"
+    )
+    assert split_batch_response(response, 3) == {0: "Birinci analiz"}
+
+
+def test_split_batch_response_without_headers():
+    assert split_batch_response("Başlıksız yanıt", 2) == {}
+
+
+def test_analyze_exam_batch_partial_failure():
+    # İkinci denemenin bölümü eksik: sadece o başarısız olur
+    llm = FakeLlm("### DENEME 1\nİlk analiz\n### DENEME 3\nÜçüncü analiz")
+    analyzer = ExamAnalyzer(api_key="", chat_factory=llm)
+
+    results = asyncio.run(analyzer.analyze_exam_batch([_exam("A"), _exam("B", 25), _exam("C", 30)], batch_size=3))
+
+    assert len(llm.chats) == 1
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[0]["ai_analysis"] == "İlk analiz"
+    assert results[2]["ai_analysis"] == "Üçüncü analiz"
+    assert "bulunamadı" in results[1]["error"]
+
+
+def test_analyze_exam_batch_failed_call_fails_only_its_group():
+    def reply(text):
+        if "Deneme Adı: B" in text:
+            raise RuntimeError("LLM zaman aşımı")
+        return "### DENEME 1\nA analizi\n### DENEME 2\nB analizi"
+
+    class FailingChat(FakeChat):
+        async def send_message(self, message):
+            return reply(message.text)
+
+    analyzer = ExamAnalyzer(api_key="", chat_factory=lambda session_id, system_message: FailingChat(None))
+    exams = [_exam("A"), _exam("C", 25), _exam("B", 30), _exam("D", 35)]
+
+    results = asyncio.run(analyzer.analyze_exam_batch(exams, batch_size=2))
+
+    assert [result["success"] for result in results] == [True, True, False, False]
+    assert results[2]["error"] == "LLM zaman aşımı"
+
+
+def test_analyze_exam_batch_single_exam_group():
+    llm = FakeLlm("Tek analiz")
+    analyzer = ExamAnalyzer(api_key="", chat_factory=llm)
+
+    results = asyncio.run(analyzer.analyze_exam_batch([_exam("A")]))
+
+    assert results[0]["success"] and results[0]["ai_analysis"] == "Tek analiz"
+    assert llm.chats[0].messages[0].startswith("Bu deneme sonuçlarını analiz et")
+
+
+STREAM_URL = "https://llm.example/v1"
+
+
+def _provider(chunks, status_code=200):
+    """OpenAI uyumlu stream=True yanıtı veren sahte sağlayıcı"""
+    requests = []
+
+    def handle(request):
+        requests.append(json.loads(request.content))
+        lines = [f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}" for chunk in chunks]
+        body = "\n\n".join(lines + ["data: [DONE]"]) + "\n\n"
+        return httpx.Response(status_code, text=body, headers={"content-type": "text/event-stream"})
+
+    return httpx.MockTransport(handle), requests
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_stream_exam_text_streams_from_provider():
+    transport, requests = _provider(["Zayıf ", "konular: ", "Türev"])
+    analyzer = ExamAnalyzer(api_key="", stream_transport=transport, stream_url=STREAM_URL, stream_api_key="key")
+
+    chunks = asyncio.run(_collect(analyzer.stream_exam_text(_exam("A"))))
+
+    assert chunks == ["Zayıf ", "konular: ", "Türev"]
+    assert requests[0]["stream"] is True
+    assert requests[0]["messages"][1]["content"].startswith("Bu deneme sonuçlarını analiz et")
+
+
+def test_stream_exam_text_provider_error():
+    transport, _ = _provider([], status_code=401)
+    analyzer = ExamAnalyzer(api_key="", stream_transport=transport, stream_url=STREAM_URL, stream_api_key="invalid")
+
+    with pytest.raises(RuntimeError, match="401"):
+        asyncio.run(_collect(analyzer.stream_exam_text(_exam("A"))))
+
+
+def test_stream_exam_text_without_stream_config_uses_chat():
+    llm = FakeLlm("Tek parça analiz")
+    analyzer = ExamAnalyzer(api_key="", chat_factory=llm, stream_url=None, stream_api_key=None)
+
+    chunks = asyncio.run(_collect(analyzer.stream_exam_text(_exam("A"))))
+
+    assert chunks == ["Tek parça analiz"]
+
+
+class MemoryCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+def test_empty_stream_is_not_cached():
+    transport, requests = _provider([])
+    cache = MemoryCache()
+    analyzer = ExamAnalyzer(api_key="", cache=cache, stream_transport=transport,
+                            stream_url=STREAM_URL, stream_api_key="key")
+
+    assert asyncio.run(_collect(analyzer.stream_exam_text(_exam("A")))) == []
+    assert cache.values == {}
+
+
+def test_practice_rows_are_not_weak_by_wrong_count():
+    # Günde 40 soru, %87.5 başarı: günlük 4 yanlış zayıf sayılmamalı
+    today = date(2024, 5, 20)
+    rows = [
+        {"lesson": "TYT Matematik", "date": (today - timedelta(days=i)).isoformat(),
+         "solved": 40, "correct": 35, "wrong": 4}
+        for i in range(10)
+    ]
+
+    scores = score_topics(soru_takip_records(rows), today=today)
+
+    assert scores["weak_topics"] == []
+    assert scores["strong_topics"] == ["TYT Matematik"]
+
+
+def test_exam_topics_keep_wrong_count_rule():
+    exam = {"exam_type": "TYT", "subjects": [{"name": "Matematik", "topics": [
+        {"name": "Türev", "total": 40, "correct": 35, "wrong": 4}
+    ]}]}
+
+    scores = score_topics(exam_topic_records(exam))
+
+    assert scores["weak_topics"] == ["Matematik - Türev"]
@@ -0,0 +1,24 @@
+"""
+/metrics testleri: METRICS_TOKEN ayarlı değilse endpoint kapalıdır,
+ayarlıysa Bearer token ister.
+"""
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_metrics_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", None)
+
+    assert TestClient(server.app).get("/metrics").status_code == 404
+
+
+def test_metrics_requires_token(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "gizli")
+    client = TestClient(server.app)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer yanlis"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer gizli"})
+    assert response.status_code == 200
+    assert "analysis_queue_jobs" in response.text
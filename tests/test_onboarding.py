@@ -0,0 +1,84 @@
+"""
+Toplu öğrenci içe aktarma testleri: id ile tekrar içe aktarma aynı öğrenciyi
+günceller (token değişmez), konular ve hoş geldin bildirimi tekrarlanmaz;
+id'si geçersiz satırlar toplu aktarımı bozmadan atlanır.
+"""
+from fastapi.testclient import TestClient
+
+import server
+from fake_supabase import FakeSupabase
+
+STUDENT_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def test_reimport_updates_existing_student(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(server, "supabase", fake.client())
+    client = TestClient(server.app)
+    onboarding = {
+        "sinif": "12", "hedef_siralama": 5000, "gunluk_calisma_suresi": 6, "guclu_dersler": ["Matematik"],
+        "zayif_dersler": ["Fizik"], "deneme_ortalamasi": 75.5, "kullanilan_kaynaklar": [], "program_onceligi": "TYT"
+    }
+
+    first = client.post("/api/students/import", json={"students": [
+        {"id": STUDENT_ID, "ad": "Ali", "bolum": "Sayısal", "onboarding": onboarding}
+    ]})
+    second = client.post("/api/students/import", json={"students": [
+        {"id": STUDENT_ID, "ad": "Ali", "soyad": "Kaya", "bolum": "Eşit Ağırlık", "hedef": "Hukuk",
+         "onboarding": onboarding}
+    ]})
+
+    assert first.status_code == 200 and second.status_code == 200, second.text
+    [student] = fake.rows("students")
+    assert (student["soyad"], student["bolum"], student["hedef"]) == ("Kaya", "Eşit Ağırlık", "Hukuk")
+    assert student["token"] == first.json()["students"][0]["token"]
+    assert second.json()["students"][0]["onboarded"] is False
+    assert len(fake.rows("notifications")) == 1
+
+
+def _import_csv(client: TestClient, text: str):
+    return client.post("/api/students/import/csv", files={"file": ("sinif.csv", text.encode(), "text/csv")})
+
+
+def test_csv_import_skips_invalid_ids(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(server, "supabase", fake.client())
+
+    response = _import_csv(TestClient(server.app), (
+        "id;ad;bolum\n"
+        f"{STUDENT_ID};Ali;Sayısal\n"
+        "12-bozuk;Veli;Sözel\n"
+        ";Ayşe;Eşit Ağırlık\n"
+    ))
+
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 2
+    assert response.json()["skipped"] == ["Satır 3: geçersiz id"]
+    assert sorted(student["ad"] for student in fake.rows("students")) == ["Ali", "Ayşe"]
+
+
+def test_csv_reimport_updates_existing_student(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(server, "supabase", fake.client())
+    client = TestClient(server.app)
+
+    _import_csv(client, f"id,ad,bolum\n{STUDENT_ID},Ali,Sayısal\n")
+    response = _import_csv(client, f"id,ad,soyad,bolum\n{STUDENT_ID},Ali,Kaya,Sözel\n")
+
+    assert response.status_code == 200, response.text
+    [student] = fake.rows("students")
+    assert (student["soyad"], student["bolum"]) == ("Kaya", "Sözel")
+
+
+def test_json_import_skips_invalid_ids(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(server, "supabase", fake.client())
+
+    response = TestClient(server.app).post("/api/students/import", json={"students": [
+        {"id": "bozuk", "ad": "Veli", "bolum": "Sözel"},
+        {"ad": "Ayşe", "bolum": "Sayısal"},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 1
+    assert response.json()["skipped"] == ["Öğrenci 1: geçersiz id"]
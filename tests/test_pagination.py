@@ -0,0 +1,74 @@
+"""
+Deneme listesi sayfalama testleri: aynı created_at'e sahip kayıtlar sayfa
+sınırında atlanmaz, cursor URL'de olduğu gibi kullanılabilir.
+"""
+from urllib.parse import quote
+
+from fastapi.testclient import TestClient
+
+import server
+from fake_supabase import FakeSupabase
+
+CREATED_AT = "2024-05-01T10:00:00+00:00"
+
+
+def _pages(client: TestClient, path: str):
+    ids, cursor = [], None
+    while True:
+        url = f"{path}?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        ids += [exam["upload"]["id"] for exam in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+        assert quote(cursor, safe="") == cursor
+
+
+def test_exam_pages_do_not_skip_equal_timestamps(monkeypatch):
+    fake = FakeSupabase()
+    fake.load({
+        "students": [{"id": "s1", "ad": "Ayşe"}],
+        "exam_uploads": [
+            {"id": f"u{i}", "student_id": "s1", "analysis_status": "completed",
+             "created_at": CREATED_AT if i < 4 else "2024-04-01T10:00:00+00:00"}
+            for i in range(5)
+        ],
+    })
+    monkeypatch.setattr(server, "supabase", fake.client())
+    client = TestClient(server.app)
+
+    expected = ["u3", "u2", "u1", "u0", "u4"]
+    assert _pages(client, "/api/exam/student-exams/s1") == expected
+    assert _pages(client, "/api/exam/coach-overview") == expected
+
+
+def test_invalid_exam_cursor_is_rejected(monkeypatch):
+    monkeypatch.setattr(server, "supabase", FakeSupabase().client())
+
+    response = TestClient(server.app).get("/api/exam/coach-overview?cursor=bozuk")
+
+    assert response.status_code == 400
+
+
+def test_topic_pages_with_null_sort_keys(monkeypatch):
+    # order_index NULL olabilir: artan sırada sona düşer, hiçbiri atlanmaz
+    fake = FakeSupabase()
+    fake.load({"topics": [
+        {"id": f"t{i}", "student_id": "s1", "ders": "Matematik", "konu": f"Konu {i}",
+         "order_index": None if i % 2 else i}
+        for i in range(7)
+    ]})
+    monkeypatch.setattr(server, "supabase", fake.client())
+    client = TestClient(server.app)
+
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/topics/s1?limit=2" + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200, response.text
+        ids += [topic["id"] for topic in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert ids == ["t0", "t2", "t4", "t6", "t1", "t3", "t5"]
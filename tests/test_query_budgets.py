@@ -0,0 +1,182 @@
+"""
+Sorgu bütçesi testleri: her route iki farklı veri boyutunda çalıştırılır.
+Supabase round-trip sayısı veri büyüdükçe artmamalı ve route'un
+@query_budget ile bildirdiği sınırı aşmamalıdır (aşım QUERY_BUDGET_ENFORCE
+ile çağrı yapılmadan hata olur).
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db
+import server
+from benchmark import generate_cohort
+from fake_supabase import FakeSupabase
+
+SMALL = {"students": 3, "months": 1}
+LARGE = {"students": 12, "months": 3}
+
+# Gerçek eşikler (DB_PAGE_SIZE=1000 satır, 100 öğrencilik bildirim parçası)
+# test sınıflarında aşılmaz; sayfalı çalıştırmada bu boyutlara indirilir
+SMALL_PAGE_SIZE = 5
+SMALL_CHUNK_SIZE = 5
+
+TODAY = date.today().isoformat()
+QUARTER_AGO = (date.today() - timedelta(days=90)).isoformat()
+
+READ_ROUTES = [
+    "/api/students",
+    "/api/student/{sid}/reports/daily?date={today}",
+    "/api/student/{sid}/reports/weekly",
+    "/api/student/{sid}/reports/monthly",
+    "/api/student/{sid}/reports/range?start={quarter_ago}&end={today}&bucket_days=7",
+    "/api/student/{sid}/last-7-days-summary",
+    "/api/student/{sid}/analysis",
+    "/api/exam/topic-scores/{sid}",
+    "/api/exam/student-exams/{sid}",
+    "/api/exam/coach-overview",
+    "/api/coach/students-analysis",
+    "/api/coach/reports/weekly-summary",
+    "/api/student/{sid}/soru-takip",
+    "/api/student/{sid}/brans-tarama",
+    "/api/topics/{sid}",
+    "/api/tasks/{sid}",
+    "/api/exams/{sid}",
+    "/api/student/{sid}/notifications",
+    "/api/student/coach/notifications",
+]
+
+
+def _manual_exam(cohort):
+    return {
+        "student_id": cohort["students"][0]["id"], "exam_name": "TYT Deneme", "exam_date": TODAY,
+        "exam_type": "TYT",
+        "subjects": [{"name": "Matematik", "correct": 20, "wrong": 8, "blank": 12, "total": 40}]
+    }
+
+
+# (metod, yol, gövde üreten fonksiyon); gövde sınıf boyutuyla büyüyebilir
+WRITE_ROUTES = [
+    ("POST", "/api/coach/send-bulk-notification",
+     lambda cohort: {"all_students": True, "type": "info", "title": "Duyuru", "message": "Deneme cumartesi"}),
+    ("POST", "/api/students/import",
+     lambda cohort: {"students": [{"ad": f"Yeni{i}", "bolum": "Sayısal"} for i in range(len(cohort["students"]))]}),
+    ("POST", "/api/exam/manual-entry", _manual_exam),
+    ("POST", "/api/student/soru-takip",
+     lambda cohort: {"student_id": cohort["students"][0]["id"], "date": TODAY, "lesson": "TYT Matematik",
+                     "topic": "türev", "solved": 30, "correct": 20, "wrong": 6, "blank": 4}),
+    ("POST", "/api/student/brans-tarama",
+     lambda cohort: {"student_id": cohort["students"][0]["id"], "date": TODAY, "lesson": "Matematik",
+                     "correct": 12, "wrong": 4, "blank": 4, "total": 20}),
+    ("POST", "/api/topics/init/{sid}?bolum=Sayısal", None),
+    ("DELETE", "/api/students/{last_sid}", None),
+]
+
+
+class Environment:
+    def __init__(self, students: int, months: int):
+        self.cohort = generate_cohort(students, months, seed=students)
+        self.fake = FakeSupabase()
+        self.fake.load(self.cohort)
+        self.db = self.fake.client()
+        self.values = {
+            "sid": self.cohort["students"][0]["id"],
+            "last_sid": self.cohort["students"][-1]["id"],
+            "today": TODAY,
+            "quarter_ago": QUARTER_AGO,
+        }
+
+    def request(self, client: TestClient, method: str, path: str, body=None):
+        server.supabase = self.db
+        self.fake.reset_calls()
+        response = client.request(method, path.format(**self.values), json=body)
+        assert response.status_code == 200, response.text
+        return response
+
+    def round_trips(self, client: TestClient, method: str, path: str, body=None) -> int:
+        self.request(client, method, path, body)
+        return len(self.fake.calls)
+
+
+@pytest.fixture(scope="module")
+def client():
+    original = server.supabase
+    yield TestClient(server.app)
+    server.supabase = original
+
+
+@pytest.fixture(scope="module")
+def environments():
+    return Environment(**SMALL), Environment(**LARGE)
+
+
+def _endpoint(method: str, path: str):
+    path = path.split("?", 1)[0].replace("{sid}", "x").replace("{last_sid}", "x")
+    for route in server.app.routes:
+        if method in getattr(route, "methods", ()) and route.path_regex.match(path):
+            return route.endpoint
+    raise AssertionError(f"{method} {path} için route bulunamadı")
+
+
+@pytest.mark.parametrize("path", READ_ROUTES)
+def test_read_route_round_trips_do_not_grow(client, environments, path):
+    small, large = environments
+    assert small.round_trips(client, "GET", path) == large.round_trips(client, "GET", path)
+
+
+@pytest.mark.parametrize("method, path, body", WRITE_ROUTES, ids=[f"{m} {p}" for m, p, _ in WRITE_ROUTES])
+def test_write_route_round_trips_do_not_grow(client, environments, method, path, body):
+    small, large = environments
+    counts = [
+        env.round_trips(client, method, path, body(env.cohort) if body else None)
+        for env in (small, large)
+    ]
+    assert counts[0] == counts[1]
+
+
+# Veri boyutuyla sayfa/parça eklemesi beklenen route'lar: fetch_all ve toplu bildirim
+PAGED_ROUTES = [
+    ("GET", "/api/coach/reports/weekly-summary", None),
+    ("GET", "/api/exam/topic-scores/{sid}", None),
+    ("POST", "/api/coach/send-bulk-notification", WRITE_ROUTES[0][2]),
+]
+
+
+@pytest.mark.parametrize("method, path, body", PAGED_ROUTES, ids=[f"{m} {p}" for m, p, _ in PAGED_ROUTES])
+def test_paged_routes_extend_budget(client, environments, monkeypatch, method, path, body):
+    small, large = environments
+    base = small.round_trips(client, method, path, body(small.cohort) if body else None)
+
+    monkeypatch.setattr(db, "DB_PAGE_SIZE", SMALL_PAGE_SIZE)
+    monkeypatch.setattr(server, "BULK_NOTIFICATION_CHUNK_SIZE", SMALL_CHUNK_SIZE)
+    response = large.request(client, method, path, body(large.cohort) if body else None)
+    paged = len(large.fake.calls)
+
+    # Eşik aşıldı, ek çağrılar bütçeye eklendi (zorunlu modda hata yok)
+    assert paged > base
+    if body:
+        assert response.json()["failed_chunks"] == []
+        chunks = -(-response.json()["notifications_sent"] // SMALL_CHUNK_SIZE)
+        assert paged == base + chunks - 1
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [("GET", path) for path in READ_ROUTES] + [(method, path) for method, path, _ in WRITE_ROUTES]
+)
+def test_route_declares_budget(method, path):
+    assert getattr(_endpoint(method, path), "query_budget", None) is not None, \
+        f"{method} {path} için @query_budget tanımlı değil"
+
+
+def test_budget_is_enforced(client, environments):
+    small, _ = environments
+    endpoint = server.get_students
+    budget = endpoint.query_budget
+    endpoint.query_budget = 0
+    try:
+        with pytest.raises(Exception, match="bütçe"):
+            small.round_trips(client, "GET", "/api/students")
+    finally:
+        endpoint.query_budget = budget
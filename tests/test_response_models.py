@@ -0,0 +1,27 @@
+"""
+Yanıt modeli testleri: NULL kolonlu satırlar (eski veya elle girilmiş
+kayıtlar) yanıt doğrulamasında 500'e dönmez, NULL olarak döner.
+"""
+from fastapi.testclient import TestClient
+
+import server
+from fake_supabase import FakeSupabase
+
+
+def test_rows_with_null_columns_are_returned(monkeypatch):
+    fake = FakeSupabase()
+    fake.load({
+        "tasks": [{"id": "t1", "student_id": "s1", "aciklama": None, "sure": None, "tarih": "2024-05-01", "gun": None}],
+        "exams": [{"id": "e1", "student_id": "s1", "tarih": "2024-05-01", "sinav_tipi": None, "ders": None,
+                   "dogru": None, "yanlis": None}],
+    })
+    monkeypatch.setattr(server, "supabase", fake.client())
+    client = TestClient(server.app)
+
+    tasks = client.get("/api/tasks/s1")
+    exams = client.get("/api/exams/s1")
+
+    assert tasks.status_code == 200, tasks.text
+    assert tasks.json()[0]["sure"] is None and tasks.json()[0]["gun"] is None
+    assert exams.status_code == 200, exams.text
+    assert exams.json()[0]["dogru"] is None
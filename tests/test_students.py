@@ -0,0 +1,17 @@
+"""
+Öğrenci silme testleri: UUID olmayan id veritabanına gitmeden 404 döner.
+"""
+from fastapi.testclient import TestClient
+
+import server
+from fake_supabase import FakeSupabase
+
+
+def test_delete_student_with_invalid_id_is_not_found(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(server, "supabase", fake.client())
+
+    response = TestClient(server.app).delete("/api/students/bozuk-id")
+
+    assert response.status_code == 404
+    assert fake.calls == []